@@ -16,11 +16,160 @@
 from shiny import App, ui, render, reactive  # Shiny core framework
 import pandas as pd       # for building the results table
 import json               # for JSON display
-from datetime import datetime, timedelta, date  # for date handling
+import asyncio            # for running the blocking fetch in a worker thread
+from datetime import timedelta, date  # for date handling
 import os                 # for path resolution
+import threading          # for the shared JSON cache lock
+from collections import OrderedDict  # for the LRU JSON cache
 
 # Import our custom NYT API helper module
-from nyt_api import fetch_articles, get_api_key, NYTApiError, VALID_ENDPOINTS, VALID_PERIODS
+from nyt_api import fetch_articles, article_from_dict, get_api_key, NYTApiError, VALID_ENDPOINTS
+from article_cache import ArticleCache  # shared cache across all sessions
+from shared_cache import SharedCache    # cross-process cache for multi-worker mode
+from nyt_pipeline.store import ArticleStore  # date-partitioned article history
+from date_index import DateIndex, DISPLAY_COLUMNS  # sorted dates + cached display table
+from facet_filter import FacetFilter, FACET_LABELS  # facet bitmaps + live counts
+from trend_chart import line_chart_svg  # small SVG chart for the Trends tab
+from nyt_pipeline.facets import FACET_KINDS  # 'des', 'org', 'per', 'geo'
+from nyt_pipeline.trends import FacetTrends  # incremental per-day facet counts
+from nyt_pipeline.rate_limit import all_metrics as rate_limit_metrics  # limiter queues and waits
+from nyt_api import get_cache_stats  # conditional-request (304) counters
+from metrics import (REGISTRY, REACTIVE_SECONDS, ACTIVE_SESSIONS, SESSIONS, FETCH_ERRORS,
+                     API_REQUESTS, timed, summary_rows, metrics_asgi)  # observability
+
+## 0.2 Shared Cache ############################
+
+# One cache per process, shared by every user session.
+# Article lists stay fresh for NYT_CACHE_TTL seconds (default 5 minutes);
+# after that they are served stale while a single background refresh runs.
+article_cache = ArticleCache(
+    ttl=float(os.environ.get("NYT_CACHE_TTL", "300")),
+    stale_ttl=float(os.environ.get("NYT_CACHE_STALE_TTL", "3600")),
+)
+
+# With several worker processes (see serve.py), NYT_SHARED_CACHE names an
+# SQLite file that all workers share, so a list is fetched from the NYT once
+# per TTL no matter how many workers miss on it. NYT_STORE_DIR makes the
+# worker that fetched a list also upsert it into the article store.
+shared_cache = SharedCache(os.environ["NYT_SHARED_CACHE"]) if os.environ.get("NYT_SHARED_CACHE") else None
+article_store = ArticleStore(os.environ["NYT_STORE_DIR"]) if os.environ.get("NYT_STORE_DIR") else None
+
+
+def load_articles(endpoint: str, period: int, api_key):
+    """Fetch the full list of 20 for (endpoint, period).
+    Goes through the cross-process cache when one is configured."""
+    def fetch():
+        articles = fetch_articles(endpoint=endpoint, period=period,
+                                  num_articles=20, api_key=api_key)
+        if article_store is not None:
+            article_store.upsert(articles)
+        return articles
+
+    if shared_cache is None:
+        return fetch()
+    data = shared_cache.load(f"{endpoint}/{period}",
+                             lambda: [article.to_dict() for article in fetch()],
+                             max_age=article_cache.ttl)
+    return [article_from_dict(article) for article in data]
+
+## 0.3 Facet Trends ############################
+
+# Per-day facet counts for the Trends tab, shared by all sessions.
+# Every fetched list is added as it arrives (articles already counted are
+# skipped), so the tab reads precomputed totals instead of grouping rows.
+TREND_WINDOW_DAYS = 7
+TREND_HISTORY_DAYS = 90
+facet_trends = FacetTrends(window_days=TREND_WINDOW_DAYS)
+
+
+def _load_trend_history():
+    """Count the last TREND_HISTORY_DAYS of the article store (if configured)."""
+    start = (date.today() - timedelta(days=TREND_HISTORY_DAYS)).isoformat()
+    facet_trends.add_batch(article_store.iter_records(start_date=start))
+
+
+if article_store is not None:
+    # In the background, so a long history does not delay startup
+    threading.Thread(target=_load_trend_history, daemon=True).start()
+
+## 0.4 Metrics ############################
+
+# Prometheus-style metrics are served at NYT_METRICS_PATH (default /metrics;
+# set it to an empty string to turn the endpoint off). NYT_DEBUG_PANEL=1 adds
+# a Debug tab with the same numbers. With serve.py each worker process keeps
+# its own metrics, so a scrape reports the worker that answered it.
+METRICS_PATH = os.environ.get("NYT_METRICS_PATH", "/metrics")
+DEBUG_PANEL = os.environ.get("NYT_DEBUG_PANEL", "").lower() in ("1", "true", "yes")
+
+
+def _collect_cache_metrics():
+    """Report the counters the caches and rate limiter already keep."""
+    stats = article_cache.stats()
+    for result, key in [("hit", "hits"), ("stale_hit", "stale_hits"), ("miss", "misses")]:
+        yield ("nyt_article_cache_lookups_total", "counter",
+               "Shared article cache lookups by result.", {"result": result}, stats[key])
+    yield ("nyt_article_cache_upstream_calls_total", "counter",
+           "Loads the article cache started (one per miss or refresh).", {}, stats["upstream_calls"])
+    for result, n in get_cache_stats().items():
+        yield ("nyt_api_conditional_total", "counter",
+               "Full downloads (misses) and 304 Not Modified replies (hits).", {"result": result}, n)
+    if shared_cache is not None:
+        for name, n in shared_cache.stats_snapshot().items():
+            yield ("nyt_shared_cache_events_total", "counter",
+                   "Cross-process cache hits, misses, upstream calls, and waits.", {"event": name}, n)
+    for key, limiter in rate_limit_metrics().items():
+        yield ("nyt_rate_limit_queue_depth", "gauge", "Requests waiting for a rate-limit token.",
+               {"key": key}, limiter["queue_depth"])
+        yield ("nyt_rate_limit_wait_seconds_total", "counter", "Total time spent waiting for tokens.",
+               {"key": key}, limiter["total_wait_s"])
+        yield ("nyt_rate_limit_throttled_total", "counter", "HTTP 429 pauses.",
+               {"key": key}, limiter["throttled"])
+
+
+REGISTRY.add_collector(_collect_cache_metrics)
+
+## 0.5 Per-Article JSON Cache ############################
+
+# Articles shown in the JSON tab per page
+JSON_PAGE_SIZE = 10
+
+# Serialized JSON per article URL, shared by all sessions (LRU, bounded).
+# Each entry keeps the article object it was built from, so a refreshed
+# copy of the same URL is serialized again instead of showing old JSON.
+JSON_CACHE_SIZE = 2000
+_json_cache = OrderedDict()
+_json_cache_lock = threading.Lock()
+
+
+def article_json(article) -> str:
+    """Pretty-printed JSON for one article, serialized once and then cached."""
+    key = article["url"]
+    with _json_cache_lock:
+        entry = _json_cache.get(key)
+        if entry is not None and entry[0] is article:
+            _json_cache.move_to_end(key)
+            return entry[1]
+
+    # Build a clean JSON representation (include list facets)
+    json_data = {
+        "title": article["title"],
+        "published_date": article["published_date"],
+        "section": article["section"],
+        "url": article["url"],
+        "abstract": article["abstract"],
+        "descriptors": article["des_facet_list"],
+        "people": article["per_facet_list"],
+        "organizations": article["org_facet_list"],
+        "locations": article["geo_facet_list"],
+    }
+    json_str = json.dumps(json_data, indent=2, ensure_ascii=False)
+
+    with _json_cache_lock:
+        _json_cache[key] = (article, json_str)
+        _json_cache.move_to_end(key)
+        while len(_json_cache) > JSON_CACHE_SIZE:
+            _json_cache.popitem(last=False)
+    return json_str
 
 # 1. UI Definition #################################
 
@@ -63,13 +212,28 @@ app_sidebar = ui.sidebar(
         end=date.today()
     ),
 
+    # Facet filters (client-side). Choices show how many articles each value
+    # would leave, given the date range and the other facet selections.
+    *[
+        ui.input_selectize(
+            id=f"facet_{kind}",
+            label=label,
+            choices=[],
+            multiple=True,
+            options={"placeholder": "Any"},
+        )
+        for kind, label in FACET_LABELS.items()
+    ],
+
     ui.hr(),
 
-    # Search button triggers the API query
-    ui.input_action_button(
+    # Search button triggers the API query.
+    # A task button shows a busy label while the background fetch runs.
+    ui.input_task_button(
         id="search",
         label="Search",
-        class_="btn-primary w-100"
+        label_busy="Fetching...",
+        class_="w-100"
     ),
 
     # Status / error message area
@@ -85,11 +249,34 @@ app_main = ui.navset_card_tab(
         "Articles Table",
         ui.output_data_frame("results_table")
     ),
-    # Tab 2: Raw JSON in an expandable accordion
+    # Tab 2: Raw JSON in an expandable accordion, one page at a time
     ui.nav_panel(
         "JSON View",
+        ui.div(
+            ui.input_action_button("json_prev", "‹ Prev", class_="btn-sm btn-outline-secondary"),
+            ui.output_text("json_page_label", inline=True),
+            ui.input_action_button("json_next", "Next ›", class_="btn-sm btn-outline-secondary"),
+            class_="d-flex align-items-center gap-3 mb-2",
+        ),
         ui.output_ui("json_view")
     ),
+    # Tab 3: Facet frequency over time, from the shared trend counts
+    ui.nav_panel(
+        "Trends",
+        ui.div(
+            ui.input_select("trend_kind", "Facet", choices=FACET_LABELS, selected="per"),
+            ui.input_select(
+                "trend_days", "Time Span",
+                choices={"14": "Last 14 Days", "30": "Last 30 Days", "90": "Last 90 Days"},
+                selected="14",
+            ),
+            class_="d-flex gap-3",
+        ),
+        ui.output_ui("trend_chart"),
+        ui.output_ui("trend_table"),
+    ),
+    # Tab 4 (NYT_DEBUG_PANEL=1 only): reactive timings and counters
+    *([ui.nav_panel("Debug", ui.output_ui("debug_panel"))] if DEBUG_PANEL else []),
 )
 
 # Combine sidebar and main area into the full page
@@ -113,87 +300,202 @@ app_ui = ui.page_sidebar(
 def server(input, output, session):
     """Server function: handles reactivity, API calls, and rendering."""
 
+    # Reactive values are named explicitly: otherwise Shiny inspects the call
+    # stack to guess each name, which costs tens of ms per value per session.
+
     # Reactive value to store fetched articles (list of dicts)
-    articles_data = reactive.value(None)
+    articles_data = reactive.value(None, name="articles_data")
     # Reactive value to store error/status messages
-    error_msg = reactive.value(None)
-    # Reactive value to track loading state
-    is_loading = reactive.value(False)
+    error_msg = reactive.value(None, name="error_msg")
+    # True while articles_data holds an older cached copy and a fresh fetch is running
+    is_partial = reactive.value(False, name="is_partial")
+    # Article count chosen when Search was clicked
+    requested_num = reactive.value(20, name="requested_num")
 
     # Check if API key is available on startup (loads from .env at project root)
     api_key = get_api_key()
 
-    ## 2.1 Fetch data when Search is clicked ################
+    # Session gauges for /metrics
+    SESSIONS.inc()
+    ACTIVE_SESSIONS.inc()
+    session.on_ended(ACTIVE_SESSIONS.dec)
+
+    ## 2.1 Fetch data in the background when Search is clicked ################
+
+    @ui.bind_task_button(button_id="search")
+    @reactive.extended_task
+    async def fetch_task(endpoint: str, period: int):
+        """Fetch one list in a worker thread, so a slow NYT API never blocks
+        this session (or any other session in the process).
+        Looks up the shared cache keyed on (endpoint, period): on a miss, one
+        call fetches the full list of 20 for everyone, and each session then
+        slices it to its own article count."""
+        @timed("fetch_task")
+        def fetch():
+            articles = article_cache.get((endpoint, period),
+                                         lambda: load_articles(endpoint, period, api_key))
+            facet_trends.add_batch(articles)  # articles already counted are skipped
+            return articles
+
+        return await asyncio.to_thread(fetch)
 
     @reactive.effect
     @reactive.event(input.search)
-    def _fetch_data():
+    def _start_fetch():
         """Triggered when user clicks the Search button.
-        Calls the NYT API and stores results or error messages."""
-        is_loading.set(True)
+        Shows the last cached copy of the list at once (if there is one),
+        then starts the background fetch for the fresh list."""
+        fetch_task.cancel()  # a newer search replaces any running one
+        endpoint = input.endpoint()
+        period = int(input.period())
+        requested_num.set(input.num_articles())
         error_msg.set(None)
-        articles_data.set(None)
-
-        try:
-            # Call our API helper with the user's selected parameters
-            articles = fetch_articles(
-                endpoint=input.endpoint(),
-                period=int(input.period()),
-                num_articles=input.num_articles(),
-                api_key=api_key
-            )
-            articles_data.set(articles)
-            error_msg.set(None)
 
-        except NYTApiError as e:
-            # Known API errors get a friendly message
-            error_msg.set(str(e))
-            articles_data.set(None)
+        cached = article_cache.peek((endpoint, period))
+        articles_data.set(cached[:input.num_articles()] if cached is not None else None)
+        is_partial.set(cached is not None)
+        fetch_task.invoke(endpoint, period)
 
-        except Exception as e:
-            # Unexpected errors
-            error_msg.set(f"An unexpected error occurred: {str(e)}")
+    @reactive.effect
+    @reactive.event(input.endpoint, input.period, ignore_init=True)
+    def _cancel_on_change():
+        """Inputs changed while a fetch was running: cancel it, so a late
+        reply for the old endpoint/period never lands in the table.
+        (The worker thread still finishes and fills the shared cache.)"""
+        if fetch_task.status() == "running":
+            fetch_task.cancel()
+
+    @reactive.effect
+    def _collect_result():
+        """Store the finished task's articles, or its error message."""
+        status = fetch_task.status()
+        if status == "success":
+            with reactive.isolate():
+                articles_data.set(fetch_task.result()[:requested_num.get()])
+            is_partial.set(False)
+        elif status == "error":
+            try:
+                fetch_task.result()
+            except NYTApiError as e:
+                # Known API errors get a friendly message
+                FETCH_ERRORS.inc(kind="api")
+                error_msg.set(str(e))
+            except Exception as e:
+                # Unexpected errors
+                FETCH_ERRORS.inc(kind="unexpected")
+                error_msg.set(f"An unexpected error occurred: {str(e)}")
             articles_data.set(None)
+            is_partial.set(False)
+        elif status == "cancelled":
+            is_partial.set(False)
 
-        finally:
-            is_loading.set(False)
+    ## 2.2 Filter articles by date range and facets ####################
 
-    ## 2.2 Filter articles by date range ####################
+    @reactive.calc
+    @timed("date_index")
+    def date_index():
+        """Sorted date index for the fetched articles.
+        Built once per fetch; date range changes reuse it."""
+        data = articles_data.get()
+        return DateIndex(data) if data is not None else None
 
     @reactive.calc
-    def filtered_articles():
-        """Apply the client-side date range filter to fetched articles.
+    @timed("date_positions")
+    def date_positions():
+        """Positions of the articles inside the chosen date range.
         The NYT API only supports fixed periods (1/7/30 days), so this
-        lets users narrow results to a specific date window."""
+        lets users narrow results to a specific date window.
+        Articles whose date cannot be parsed are included anyway."""
+        index = date_index()
+        if index is None:
+            return None
+        start_date, end_date = input.date_range()
+        return index.positions(start_date, end_date)
+
+    @reactive.calc
+    @timed("facet_filter")
+    def facet_filter():
+        """Facet bitmaps for the fetched articles, built once per fetch."""
         data = articles_data.get()
-        if data is None:
+        return FacetFilter(data) if data is not None else None
+
+    @reactive.calc
+    @timed("date_bitmap")
+    def date_bitmap():
+        """The date range result as a facet bitmap, shared by all facet counts."""
+        return facet_filter().bitmap_of(date_positions())
+
+    def facet_selections():
+        """Selected values per facet kind."""
+        return {kind: list(input[f"facet_{kind}"]() or ()) for kind in FACET_KINDS}
+
+    @reactive.calc
+    @timed("filtered_positions")
+    def filtered_positions():
+        """Positions of the articles that pass the date range and every facet
+        filter (values of one kind are ORed, kinds are ANDed)."""
+        positions = date_positions()
+        if positions is None:
             return None
+        selections = facet_selections()
+        if not any(selections.values()):
+            return positions
+        facets = facet_filter()
+        return facets.positions_of(facets.match(selections, date_bitmap()))
 
-        start_date, end_date = input.date_range()
+    @reactive.calc
+    @timed("filtered_articles")
+    def filtered_articles():
+        """Apply the client-side date range and facet filters to fetched articles."""
+        positions = filtered_positions()
+        if positions is None:
+            return None
+        articles = date_index().articles
+        return [articles[i] for i in positions]
 
-        filtered = []
-        for article in data:
-            try:
-                pub_date = datetime.strptime(article["published_date"], "%Y-%m-%d").date()
-                if start_date <= pub_date <= end_date:
-                    filtered.append(article)
-            except (ValueError, KeyError):
-                # If date parsing fails, include the article anyway
-                filtered.append(article)
+    # Choices last sent to each facet selector (all start empty)
+    sent_choices = {kind: {} for kind in FACET_KINDS}
 
-        return filtered
+    @reactive.effect
+    @timed("update_facet_choices")
+    def _update_facet_choices():
+        """Keep the facet selectors' choices and live counts up to date.
+        Each kind is counted with the date range and the other kinds'
+        selections applied, so a kind's own selection never changes its
+        counts. Only selectors whose choices changed are sent, which keeps
+        an open dropdown from being redrawn on every click."""
+        facets = facet_filter()
+        selections = facet_selections()
+        for kind in FACET_KINDS:
+            choices = ({} if facets is None
+                       else facets.choices(kind, selections, date_bitmap()))
+            if sent_choices[kind] == choices:
+                continue
+            sent_choices[kind] = choices
+            ui.update_selectize(f"facet_{kind}", choices=choices, selected=selections[kind])
 
     ## 2.3 Render the status / error message ################
 
     @render.ui
+    @timed("status_message")
     def status_message():
         """Display status or error messages below the Search button."""
         msg = error_msg.get()
         data = filtered_articles()
+        status = fetch_task.status()
 
-        if is_loading.get():
+        if status == "running":
+            note = ("Showing the last cached copy while fresh articles load..."
+                    if is_partial.get() else "Fetching articles...")
             return ui.div(
-                ui.p("Fetching articles...", class_="text-info"),
+                ui.p(note, class_="text-info"),
+                class_="mt-3"
+            )
+
+        if status == "cancelled" and data is None:
+            return ui.div(
+                ui.p("Search cancelled because the inputs changed. Click Search again.",
+                     class_="text-muted"),
                 class_="mt-3"
             )
 
@@ -205,12 +507,19 @@ def server(input, output, session):
         if data is not None:
             total = len(articles_data.get()) if articles_data.get() else 0
             shown = len(data)
+            # Shared cache counters, so we can see how many upstream calls we save
+            stats = article_cache.stats()
             return ui.div(
                 ui.div(
                     f"Showing {shown} of {total} articles fetched.",
                     class_="alert alert-success mt-3",
                     role="alert"
                 ),
+                ui.p(
+                    f"Cache hit ratio: {stats['hit_ratio']:.0%} | "
+                    f"Upstream calls: {stats['upstream_calls']}",
+                    class_="text-muted small"
+                ),
             )
 
         return ui.div()  # empty when no action yet
@@ -218,31 +527,108 @@ def server(input, output, session):
     ## 2.4 Render the Articles Table ########################
 
     @render.data_frame
+    @timed("results_table")
     def results_table():
         """Render filtered articles as a DataTable with key columns."""
-        data = filtered_articles()
-        if not data:
-            return pd.DataFrame(columns=["Title", "Date", "Section", "Abstract", "People", "URL"])
-
-        # Build a pandas DataFrame for display
-        display_df = pd.DataFrame({
-            "Title": [a["title"] for a in data],
-            "Date": [a["published_date"] for a in data],
-            "Section": [a["section"] for a in data],
-            "Abstract": [a["abstract"] for a in data],
-            "People": [a["per_facet"] for a in data],
-            "URL": [a["url"] for a in data],
-        })
+        positions = filtered_positions()
+        if positions is None or len(positions) == 0:
+            return pd.DataFrame(columns=list(DISPLAY_COLUMNS))
+
+        # Slice the cached display table instead of rebuilding it
+        display_df = date_index().frame_for(positions)
 
         return render.DataTable(display_df, width="100%", height="100%")
 
-    ## 2.5 Render the JSON View #############################
+    ## 2.5 Render the Trends Tab #############################
+
+    @reactive.calc
+    @timed("trend_values")
+    def trend_values():
+        """Values to chart: the sidebar selection for this kind if there is
+        one, else the kind's most frequent values in the latest window."""
+        articles_data.get()  # re-read the shared counts after each fetch
+        kind = input.trend_kind()
+        selected = list(input[f"facet_{kind}"]() or ())
+        if selected:
+            return selected[:6]
+        return [value for _, value, _ in facet_trends.top(kind, top=5)]
+
+    @render.ui
+    @timed("trend_chart")
+    def trend_chart():
+        """Daily article counts for the charted values (precomputed, zero-filled)."""
+        values = trend_values()
+        if not values or facet_trends.as_of is None:
+            return ui.p("No trend data yet. Click Search to fetch articles.",
+                        class_="text-muted p-3")
+        end = date.fromisoformat(facet_trends.as_of)
+        start = end - timedelta(days=int(input.trend_days()) - 1)
+        kind = input.trend_kind()
+        series = {value: facet_trends.series(kind, value, start.isoformat(), end.isoformat())
+                  for value in values}
+        return ui.HTML(line_chart_svg(series))
+
+    @render.ui
+    @timed("trend_table")
+    def trend_table():
+        """Values rising the most: latest window vs. the window before it.
+        A plain HTML table: a second DataTable output would add its own
+        per-session reactive setup for a read-only 15-row list."""
+        articles_data.get()  # re-read the shared counts after each fetch
+        rows = facet_trends.rising(input.trend_kind(), top=15)
+        if not rows:
+            return ui.div()
+        columns = {"value": "Value",
+                   "current": f"Last {TREND_WINDOW_DAYS} Days",
+                   "previous": f"Previous {TREND_WINDOW_DAYS} Days",
+                   "change": "Change"}
+        table = pd.DataFrame(rows, columns=["value", "current", "previous", "change"])
+        return ui.HTML(table.rename(columns=columns).to_html(
+            index=False, border=0, classes="table table-sm table-striped"))
+
+    ## 2.6 Render the JSON View #############################
+
+    # Current page of the JSON tab (0-based)
+    json_page = reactive.value(0, name="json_page")
+
+    @reactive.calc
+    def json_page_count():
+        data = filtered_articles()
+        return max(1, -(-len(data) // JSON_PAGE_SIZE)) if data else 1
+
+    @reactive.effect
+    def _reset_json_page():
+        """Go back to the first page whenever the filtered list changes."""
+        filtered_articles()
+        json_page.set(0)
+
+    @reactive.effect
+    @reactive.event(input.json_prev)
+    def _json_prev():
+        json_page.set(max(0, json_page.get() - 1))
+
+    @reactive.effect
+    @reactive.event(input.json_next)
+    def _json_next():
+        json_page.set(min(json_page_count() - 1, json_page.get() + 1))
+
+    @reactive.calc
+    def json_page_articles():
+        """Articles on the current page of the JSON tab."""
+        data = filtered_articles() or []
+        start = json_page.get() * JSON_PAGE_SIZE
+        return data[start:start + JSON_PAGE_SIZE]
+
+    @render.text
+    def json_page_label():
+        return f"Page {json_page.get() + 1} of {json_page_count()}"
 
     @render.ui
+    @timed("json_view")
     def json_view():
-        """Render the raw article data as expandable JSON.
-        Each article is wrapped in an accordion panel so users
-        can expand individual articles to inspect all fields."""
+        """Render the current page of articles as expandable JSON.
+        Only the page's headers are sent here; each panel holds its own
+        output, which Shiny renders only once that panel is expanded."""
         data = filtered_articles()
         if not data:
             return ui.div(
@@ -250,46 +636,72 @@ def server(input, output, session):
                      class_="text-muted p-3"),
             )
 
-        # Build an accordion with one panel per article
+        # Build an accordion with one panel per article on this page
+        first = json_page.get() * JSON_PAGE_SIZE
         panels = []
-        for i, article in enumerate(data):
+        for slot, article in enumerate(json_page_articles()):
             # Use title as the accordion header
-            header = f"{i+1}. {article['title']} ({article['published_date']})"
-
-            # Build a clean JSON representation (include list facets)
-            json_data = {
-                "title": article["title"],
-                "published_date": article["published_date"],
-                "section": article["section"],
-                "url": article["url"],
-                "abstract": article["abstract"],
-                "descriptors": article["des_facet_list"],
-                "people": article["per_facet_list"],
-                "organizations": article["org_facet_list"],
-                "locations": article["geo_facet_list"],
-            }
-            json_str = json.dumps(json_data, indent=2, ensure_ascii=False)
-
-            panels.append(
-                ui.accordion_panel(
-                    header,
-                    ui.pre(json_str, style="max-height: 400px; overflow-y: auto;"),
-                )
-            )
+            header = f"{first + slot + 1}. {article['title']} ({article['published_date']})"
+            panels.append(ui.accordion_panel(header, ui.output_ui(f"json_slot_{slot}")))
 
         return ui.accordion(*panels, id="json_accordion", open=False)
 
+    def _json_slot(slot: int):
+        """Define the output for one accordion panel on the page.
+        Hidden (collapsed) outputs are not rendered, so an article's JSON is
+        only built and sent when the user expands its panel."""
+        @output(id=f"json_slot_{slot}")
+        @render.ui
+        @timed("json_slot")
+        def _slot():
+            articles = json_page_articles()
+            if slot >= len(articles):
+                return ui.div()
+            return ui.pre(article_json(articles[slot]), style="max-height: 400px; overflow-y: auto;")
+
+    for slot in range(JSON_PAGE_SIZE):
+        _json_slot(slot)
+
+    ## 2.7 Debug Panel (NYT_DEBUG_PANEL=1) #############################
+
+    if DEBUG_PANEL:
+        @render.ui
+        def debug_panel():
+            """Reactive timings and API counters for this process, refreshed every 2 s."""
+            reactive.invalidate_later(2)
+            timings = pd.DataFrame(summary_rows(REACTIVE_SECONDS),
+                                   columns=["name", "calls", "mean_ms", "p50_ms", "p95_ms", "total_ms"])
+            requests_by_status = pd.DataFrame(
+                [(*key, n) for key, n in sorted(API_REQUESTS.values().items())],
+                columns=["endpoint", "period", "status", "requests"])
+            stats = article_cache.stats()
+            return ui.div(
+                ui.p(f"Active sessions: {ACTIVE_SESSIONS.values().get((), 0):g} | "
+                     f"Cache hit ratio: {stats['hit_ratio']:.0%} | "
+                     f"Upstream calls: {stats['upstream_calls']} | "
+                     f"Scrape: {METRICS_PATH or 'off'}", class_="text-muted"),
+                ui.h6("Reactive timings (p50/p95 are histogram bucket bounds)"),
+                ui.HTML(timings.to_html(index=False, border=0, float_format="{:.1f}".format,
+                                        classes="table table-sm table-striped")),
+                ui.h6("NYT API requests"),
+                ui.HTML(requests_by_status.to_html(index=False, border=0,
+                                                   classes="table table-sm table-striped")),
+            )
+
 
 # 3. Create App #################################
 
-# Combine UI and server into the Shiny App object
-app = App(app_ui, server)
+# Combine UI and server into the Shiny App object,
+# then add the metrics endpoint in front of it (other paths go to Shiny)
+shiny_app = App(app_ui, server)
+app = metrics_asgi(shiny_app, METRICS_PATH) if METRICS_PATH else shiny_app
 
 
 # 4. Run for deployment #################################
 # When the platform runs `python app.py`, this keeps the server running
 # and binds to 0.0.0.0:PORT so the app is reachable from outside.
 if __name__ == "__main__":
+    import uvicorn  # installed with shiny
     port = int(os.environ.get("PORT", "8080"))
-    app.run(host="0.0.0.0", port=port)
+    uvicorn.run(app, host="0.0.0.0", port=port)
 
@@ -0,0 +1,160 @@
+# article_cache.py
+# Shared TTL Cache for NYT Article Lists
+# Used by app.py
+# Jimmy
+
+# This module keeps one process-wide cache of fetched article lists,
+# keyed on (endpoint, period), so every Shiny session shares the same data.
+# Expired entries are served stale while one background thread refreshes them,
+# and concurrent misses for the same key are collapsed into a single upstream call.
+
+# 0. Setup #################################
+
+## 0.1 Load Packages ############################
+
+import threading  # for locks, events, and background refreshes
+import time       # for monotonic timestamps
+from typing import Any, Callable, Dict, Hashable, Optional  # for type hints
+
+# 1. Cache Class #################################
+
+class ArticleCache:
+    """Thread-safe TTL cache with stale-while-revalidate and single-flight loading.
+
+    Parameters:
+        ttl: Seconds an entry is considered fresh
+        stale_ttl: Extra seconds an expired entry may still be served
+            while a background refresh runs (None = no limit)
+    """
+
+    def __init__(self, ttl: float = 300, stale_ttl: Optional[float] = 3600):
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self._lock = threading.Lock()
+        self._entries = {}    # key -> (value, fetched_at)
+        self._in_flight = {}  # key -> threading.Event for the running load
+        self._errors = {}     # key -> exception from the last failed load
+        self._stats = {"hits": 0, "stale_hits": 0, "misses": 0,
+                       "upstream_calls": 0, "refresh_errors": 0}
+
+    ## 1.1 Public API ############################
+
+    def get(self, key: Hashable, loader: Callable[[], Any]) -> Any:
+        """Return the cached value for key, calling loader() only when needed.
+        Fresh entries are returned directly. Stale entries are returned at once
+        and refreshed in the background. Missing entries block until one load
+        finishes; other callers waiting on the same key share its result."""
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                value, fetched_at = entry
+                age = now - fetched_at
+                # Fresh: plain hit
+                if age < self.ttl:
+                    self._stats["hits"] += 1
+                    return value
+                # Stale but still usable: serve it and refresh once in the background
+                if self._usable(age):
+                    self._stats["stale_hits"] += 1
+                    if key not in self._in_flight:
+                        self._in_flight[key] = threading.Event()
+                        threading.Thread(target=self._refresh, args=(key, loader), daemon=True).start()
+                    return value
+
+            # Miss: either join a load that is already running, or start one
+            self._stats["misses"] += 1
+            event = self._in_flight.get(key)
+            leader = event is None
+            if leader:
+                event = threading.Event()
+                self._in_flight[key] = event
+
+        if leader:
+            return self._load(key, loader, event)
+
+        # Follower: wait for the leader, then read what it stored. If the
+        # leader was a background refresh that failed, the old entry is still
+        # there; it is only served while inside the stale window, otherwise
+        # the leader's error is raised
+        event.wait()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and self._usable(time.monotonic() - entry[1]):
+                return entry[0]
+            error = self._errors.get(key)
+        if error is not None:
+            raise error
+        # The entry was invalidated while we waited; try again
+        return self.get(key, loader)
+
+    def peek(self, key: Hashable) -> Optional[Any]:
+        """Return whatever is cached for key, however old, without loading or
+        counting a lookup. Lets the UI show the last known list right away
+        while a background fetch brings the fresh one."""
+        with self._lock:
+            entry = self._entries.get(key)
+        return entry[0] if entry is not None else None
+
+    def invalidate(self, key: Optional[Hashable] = None):
+        """Drop one key, or every key if key is None."""
+        with self._lock:
+            if key is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(key, None)
+
+    def stats(self) -> Dict[str, float]:
+        """Return counters plus the overall hit ratio (fresh + stale hits / lookups)."""
+        with self._lock:
+            stats = dict(self._stats)
+        lookups = stats["hits"] + stats["stale_hits"] + stats["misses"]
+        stats["hit_ratio"] = (stats["hits"] + stats["stale_hits"]) / lookups if lookups else 0.0
+        return stats
+
+    ## 1.2 Internal Helpers ############################
+
+    def _usable(self, age: float) -> bool:
+        """True if an entry this old may be served (fresh or inside the stale window)."""
+        return self.stale_ttl is None or age < self.ttl + self.stale_ttl
+
+    def _load(self, key, loader, event):
+        """Run loader() as the single leader for key and publish the result."""
+        try:
+            with self._lock:
+                self._stats["upstream_calls"] += 1
+            value = loader()
+        except Exception as e:
+            # Remember the error so waiting followers raise the same one
+            with self._lock:
+                self._entries.pop(key, None)
+                self._errors[key] = e
+                self._in_flight.pop(key, None)
+            event.set()
+            raise
+        with self._lock:
+            self._entries[key] = (value, time.monotonic())
+            self._errors.pop(key, None)
+            self._in_flight.pop(key, None)
+        event.set()
+        return value
+
+    def _refresh(self, key, loader):
+        """Background refresh for a stale key; on failure the stale value is kept."""
+        with self._lock:
+            event = self._in_flight[key]
+            self._stats["upstream_calls"] += 1
+        try:
+            value = loader()
+        except Exception as e:
+            with self._lock:
+                self._stats["refresh_errors"] += 1
+                self._errors[key] = e  # for followers that joined once the entry was too old
+                self._in_flight.pop(key, None)
+            event.set()
+            return
+        with self._lock:
+            self._entries[key] = (value, time.monotonic())
+            self._errors.pop(key, None)
+            self._in_flight.pop(key, None)
+        event.set()
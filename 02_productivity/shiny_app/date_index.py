@@ -0,0 +1,88 @@
+# date_index.py
+# Sorted Date Index and Cached Display Table for Fetched Articles
+# Used by app.py
+# Jimmy
+
+# The date range filter used to run strptime on every article on every
+# change, and the table was rebuilt from list comprehensions each time.
+# This module parses the published dates once per fetch into a sorted
+# array, answers a date range with two binary searches, and builds the
+# display DataFrame once, so each filter change only slices it.
+
+# 0. Setup #################################
+
+## 0.1 Load Packages ############################
+
+import numpy as np    # for the sorted date array and binary search
+import pandas as pd   # for date parsing and the display table
+from datetime import date  # for type hints
+from typing import List, Sequence  # for type hints
+
+# 1. Constants #################################
+
+# Columns shown in the Articles Table tab: display name -> article key
+DISPLAY_COLUMNS = {
+    "Title": "title",
+    "Date": "published_date",
+    "Section": "section",
+    "Abstract": "abstract",
+    "People": "per_facet",
+    "URL": "url",
+}
+
+# 2. Date Index #################################
+
+class DateIndex:
+    """Date lookups over one fetched list of articles.
+
+    Parameters:
+        articles: Parsed articles (dicts or CompactArticle), in display order
+    """
+
+    def __init__(self, articles: Sequence):
+        self.articles = list(articles)
+        # Parse every published_date once; bad or missing dates become NaT
+        parsed = pd.to_datetime(pd.Series([a.get("published_date") for a in self.articles], dtype=object),
+                                format="%Y-%m-%d", errors="coerce")
+        dated = parsed.notna().to_numpy()
+        days = parsed.to_numpy(dtype="datetime64[D]")
+
+        # Dated articles sorted by day (stable, so ties keep display order)
+        dated_positions = np.flatnonzero(dated)
+        order = np.argsort(days[dated_positions], kind="stable")
+        self._sorted_days = days[dated_positions][order]
+        self._sorted_positions = dated_positions[order]
+        # Articles whose date cannot be parsed always pass the filter
+        self._undated = np.flatnonzero(~dated)
+        self._frame = None
+
+    def positions(self, start: date, end: date) -> np.ndarray:
+        """Positions of articles published in [start, end] (plus undated ones),
+        in the original display order. Two binary searches, no per-article parsing."""
+        lo = np.searchsorted(self._sorted_days, np.datetime64(start, "D"), side="left")
+        hi = np.searchsorted(self._sorted_days, np.datetime64(end, "D"), side="right")
+        if lo == 0 and hi == len(self._sorted_days):
+            return np.arange(len(self.articles))  # whole list: skip the sort
+        return np.sort(np.concatenate([self._sorted_positions[lo:hi], self._undated]))
+
+    def filter(self, start: date, end: date) -> List:
+        """Articles published in [start, end], in display order."""
+        return [self.articles[i] for i in self.positions(start, end)]
+
+    def frame(self) -> pd.DataFrame:
+        """Display table for every article, built on first use and then reused."""
+        if self._frame is None:
+            self._frame = pd.DataFrame({
+                name: [a[key] for a in self.articles] for name, key in DISPLAY_COLUMNS.items()
+            })
+        return self._frame
+
+    def frame_for(self, positions: np.ndarray) -> pd.DataFrame:
+        """Rows of the cached display table at `positions` (no rebuild)."""
+        frame = self.frame()
+        if len(positions) == len(frame):
+            return frame
+        return frame.iloc[positions].reset_index(drop=True)
+
+    def __len__(self) -> int:
+        return len(self.articles)
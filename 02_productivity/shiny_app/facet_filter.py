@@ -0,0 +1,100 @@
+# facet_filter.py
+# Facet Filters With Live Counts for Fetched Articles
+# Used by app.py
+# Jimmy
+
+# The sidebar lets users narrow the table by descriptor, organization,
+# person, and location, and shows how many articles each value would leave.
+# Counting with pandas groupbys on every click gets slow as lists grow.
+# This module builds a FacetIndex (nyt_pipeline/facet_index.py) once per
+# fetch, so a filter change is a few bitmap ANDs and every count is a
+# popcount over one bitmap.
+
+# 0. Setup #################################
+
+## 0.1 Load Packages ############################
+
+import numpy as np  # for converting between bitmaps and row positions
+from typing import Dict, Iterable, List, Mapping, Optional, Sequence, Tuple  # for type hints
+
+from nyt_pipeline.facet_index import FacetIndex, bitmap_count, bitmap_from_ids, bitmap_mask  # bitmap index over facet values
+
+# 1. Constants #################################
+
+# Sidebar label for each facet kind
+FACET_LABELS = {
+    "des": "Descriptors",
+    "org": "Organizations",
+    "per": "People",
+    "geo": "Locations",
+}
+
+# 2. Facet Filter #################################
+
+class FacetFilter:
+    """Facet bitmaps over one fetched list of articles.
+    Row positions match the list order (and DateIndex positions).
+
+    Parameters:
+        articles: Parsed articles (dicts or CompactArticle), in display order
+    """
+
+    def __init__(self, articles: Sequence):
+        self.index = FacetIndex()
+        # Article id for each row (a URL listed twice shares one id)
+        self._doc_of = np.array(self.index.add_many(articles), dtype=np.int64)
+        self._doc_count = int(self._doc_of.max()) + 1 if len(self._doc_of) else 0
+
+    ## 2.1 Bitmaps and Positions ############################
+
+    def bitmap_of(self, positions: Iterable[int]) -> int:
+        """Bitmap of the articles at these row positions."""
+        return bitmap_from_ids(self._doc_of[np.asarray(positions, dtype=np.int64)].tolist())
+
+    def positions_of(self, bitmap: int) -> np.ndarray:
+        """Row positions (ascending) of the articles in a bitmap."""
+        return np.flatnonzero(bitmap_mask(bitmap, self._doc_count)[self._doc_of])
+
+    ## 2.2 Filtering ############################
+
+    def selection_bitmap(self, kind: str, values: Iterable[str]) -> int:
+        """Articles carrying any of the selected values of one kind (OR)."""
+        bitmap = 0
+        for value in values:
+            bitmap |= self.index.bitmap(kind, value)
+        return bitmap
+
+    def match(self, selections: Mapping[str, Sequence[str]], within: int,
+              skip_kind: Optional[str] = None) -> int:
+        """Articles in `within` that match every kind with a selection (AND across
+        kinds, OR within a kind). skip_kind leaves one kind out, which is what
+        that kind's own counts need."""
+        result = within
+        for kind, values in selections.items():
+            if values and kind != skip_kind:
+                result &= self.selection_bitmap(kind, values)
+        return result
+
+    def counts(self, kind: str, within: int) -> List[Tuple[str, int]]:
+        """(value, article count inside `within`) for every value of one kind
+        that occurs there, most frequent first."""
+        rows = []
+        for value in self.index.values(kind):
+            n = bitmap_count(self.index.bitmap(kind, value) & within)
+            if n:
+                rows.append((value, n))
+        rows.sort(key=lambda row: (-row[1], row[0].lower()))
+        return rows
+
+    def choices(self, kind: str, selections: Mapping[str, Sequence[str]], within: int) -> Dict[str, str]:
+        """Selectize choices for one kind: {value: 'value (count)'}, counted with
+        the other kinds' selections applied. Selected values stay listed even
+        when their count drops to zero, so they can be cleared."""
+        counts = self.counts(kind, self.match(selections, within, skip_kind=kind))
+        choices = {value: f"{value} ({n})" for value, n in counts}
+        for value in selections.get(kind) or ():
+            choices.setdefault(value, f"{value} (0)")
+        return choices
+
+    def __len__(self) -> int:
+        return len(self._doc_of)
@@ -0,0 +1,284 @@
+# metrics.py
+# Counters, Gauges, and Timing Histograms for the Shiny App
+# Used by app.py and nyt_api.py; scraped at /metrics
+# Jimmy
+
+# When the app feels slow we need to know where the time goes: the NYT
+# call, the date/facet filters, or rendering the table or JSON view.
+# This module keeps a few in-process metrics (no extra dependency) and
+# writes them in the Prometheus text format, so any scraper, or plain curl,
+# can read them. Each metric has labels, e.g. the reactive's name or the
+# HTTP status. Updating a metric is one dict update under a lock.
+
+# 0. Setup #################################
+
+## 0.1 Load Packages ############################
+
+import bisect     # for finding a histogram bucket
+import functools  # for keeping the wrapped function's name
+import math       # for the +Inf bucket
+import threading  # for thread-safe updates
+import time       # for timing
+from typing import Callable, Dict, Iterable, List, Optional, Tuple  # for type hints
+
+# 1. Constants #################################
+
+# Histogram bucket upper bounds in seconds (1 ms to 10 s)
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# Content type of the Prometheus text format
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# 2. Metric Types #################################
+
+def _escape(value) -> str:
+    """Escape a label value (backslash, double quote, newline)."""
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(names: Tuple[str, ...], values: Tuple[str, ...], extra: str = "") -> str:
+    """Render {name="value",...} (empty string when there are no labels)."""
+    pairs = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+class _Metric:
+    """Shared parts of every metric: name, help text, label names, and a lock."""
+
+    kind = "untyped"
+
+    def __init__(self, name: str, help_text: str, labels: Iterable[str] = ()):
+        self.name = name
+        self.help_text = help_text
+        self.label_names = tuple(labels)
+        self._lock = threading.Lock()
+
+    def _key(self, labels: Dict[str, str]) -> Tuple[str, ...]:
+        return tuple(str(labels.get(name, "")) for name in self.label_names)
+
+    def header(self) -> List[str]:
+        return [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} {self.kind}"]
+
+
+class Counter(_Metric):
+    """A count that only goes up, e.g. API calls by status."""
+
+    kind = "counter"
+
+    def __init__(self, name: str, help_text: str, labels: Iterable[str] = ()):
+        super().__init__(name, help_text, labels)
+        self._values = {}
+
+    def inc(self, amount: float = 1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def values(self) -> Dict[Tuple[str, ...], float]:
+        with self._lock:
+            return dict(self._values)
+
+    def render(self) -> List[str]:
+        values = self.values()
+        if not values and not self.label_names:
+            values = {(): 0}  # report 0 rather than nothing before the first update
+        return self.header() + [f"{self.name}{_format_labels(self.label_names, key)} {value:g}"
+                                for key, value in sorted(values.items())]
+
+
+class Gauge(Counter):
+    """A value that goes up and down, e.g. active sessions."""
+
+    kind = "gauge"
+
+    def dec(self, amount: float = 1, **labels):
+        self.inc(-amount, **labels)
+
+    def set(self, value: float, **labels):
+        with self._lock:
+            self._values[self._key(labels)] = value
+
+
+class Histogram(_Metric):
+    """Durations counted into fixed buckets, plus their sum and count.
+
+    Parameters:
+        buckets: Upper bounds in seconds (sorted); +Inf is added automatically
+    """
+
+    kind = "histogram"
+
+    def __init__(self, name: str, help_text: str, labels: Iterable[str] = (),
+                 buckets: Iterable[float] = DEFAULT_BUCKETS):
+        super().__init__(name, help_text, labels)
+        self.buckets = tuple(sorted(buckets)) + (math.inf,)
+        self._series = {}  # label values -> [bucket counts, sum, count]
+
+    def observe(self, seconds: float, **labels):
+        key = self._key(labels)
+        index = bisect.bisect_left(self.buckets, seconds)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = [[0] * len(self.buckets), 0.0, 0]
+            series[0][index] += 1
+            series[1] += seconds
+            series[2] += 1
+
+    def time(self, **labels):
+        """Context manager that observes the time spent inside it."""
+        return _Timer(self, labels)
+
+    def snapshot(self) -> Dict[Tuple[str, ...], Tuple[List[int], float, int]]:
+        """{label values: (per-bucket counts, sum, count)}."""
+        with self._lock:
+            return {key: (list(s[0]), s[1], s[2]) for key, s in self._series.items()}
+
+    def quantile(self, q: float, **labels) -> Optional[float]:
+        """Upper bound of the bucket holding quantile q (None with no data).
+        Coarse, but enough to tell 5 ms from 500 ms."""
+        series = self.snapshot().get(self._key(labels))
+        if series is None or series[2] == 0:
+            return None
+        target, running = q * series[2], 0
+        for bound, count in zip(self.buckets, series[0]):
+            running += count
+            if running >= target:
+                return bound
+        return math.inf
+
+    def render(self) -> List[str]:
+        lines = self.header()
+        for key, (counts, total, count) in sorted(self.snapshot().items()):
+            running = 0
+            for bound, n in zip(self.buckets, counts):
+                running += n
+                le = "+Inf" if bound == math.inf else f"{bound:g}"
+                labels = _format_labels(self.label_names, key, 'le="' + le + '"')
+                lines.append(f"{self.name}_bucket{labels} {running}")
+            labels = _format_labels(self.label_names, key)
+            lines.append(f"{self.name}_sum{labels} {total:.6f}")
+            lines.append(f"{self.name}_count{labels} {count}")
+        return lines
+
+
+class _Timer:
+    """Observe the elapsed time of a with-block into a histogram."""
+
+    def __init__(self, histogram: Histogram, labels: Dict[str, str]):
+        self.histogram = histogram
+        self.labels = labels
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.histogram.observe(time.perf_counter() - self.started, **self.labels)
+        return False
+
+# 3. Registry #################################
+
+class Registry:
+    """All metrics of the process, plus callbacks that report numbers other
+    modules already keep (cache stats, rate limiter queues) at scrape time."""
+
+    def __init__(self):
+        self._metrics = []
+        self._collectors = []
+
+    def register(self, metric):
+        self._metrics.append(metric)
+        return metric
+
+    def add_collector(self, collect: Callable[[], Iterable[Tuple[str, str, str, Dict[str, str], float]]]):
+        """collect() returns (name, kind, help, labels, value) rows when scraped."""
+        self._collectors.append(collect)
+
+    def render(self) -> str:
+        """Every metric in the Prometheus text format."""
+        lines = []
+        for metric in self._metrics:
+            lines.extend(metric.render())
+        seen = set()
+        for collect in self._collectors:
+            try:
+                rows = list(collect())
+            except Exception as e:  # a broken collector must not break the scrape
+                lines.append(f"# collector error: {type(e).__name__}: {e}")
+                continue
+            for name, kind, help_text, labels, value in rows:
+                if name not in seen:
+                    seen.add(name)
+                    lines += [f"# HELP {name} {help_text}", f"# TYPE {name} {kind}"]
+                names = tuple(labels)
+                lines.append(f"{name}{_format_labels(names, tuple(labels[n] for n in names))} {value:g}")
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+
+# 4. App Metrics #################################
+
+API_REQUESTS = REGISTRY.register(Counter(
+    "nyt_api_requests_total", "NYT API requests by endpoint, period, and HTTP status "
+    "(status 'network' for connection errors and timeouts).", ["endpoint", "period", "status"]))
+API_SECONDS = REGISTRY.register(Histogram(
+    "nyt_api_request_seconds", "Time for one NYT API call, including rate-limit waits and retries.",
+    ["endpoint"]))
+FETCH_ERRORS = REGISTRY.register(Counter(
+    "shiny_fetch_errors_total", "Searches that ended in an error shown to the user.", ["kind"]))
+REACTIVE_SECONDS = REGISTRY.register(Histogram(
+    "shiny_reactive_seconds", "Time spent in each instrumented reactive calc, effect, or output.",
+    ["name"]))
+ACTIVE_SESSIONS = REGISTRY.register(Gauge(
+    "shiny_active_sessions", "Browser sessions currently connected to this process."))
+SESSIONS = REGISTRY.register(Counter(
+    "shiny_sessions_total", "Browser sessions started in this process."))
+
+# 5. Helpers #################################
+
+def timed(name: str, histogram: Histogram = REACTIVE_SECONDS):
+    """Decorator that records how long each call of a function takes.
+    Put it under Shiny's decorators, e.g. @render.data_frame then @timed("results_table").
+    functools.wraps keeps the function's name, which Shiny uses as the output id."""
+    def decorator(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            started = time.perf_counter()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                histogram.observe(time.perf_counter() - started, name=name)
+        return wrapper
+    return decorator
+
+
+def summary_rows(histogram: Histogram = REACTIVE_SECONDS) -> List[Dict]:
+    """One row per label set: calls, mean, p50, p95, and total ms (for the debug panel)."""
+    rows = []
+    for key, (_, total, count) in histogram.snapshot().items():
+        labels = dict(zip(histogram.label_names, key))
+        rows.append({**labels, "calls": count, "mean_ms": 1000 * total / count if count else 0.0,
+                     "p50_ms": 1000 * histogram.quantile(0.5, **labels),
+                     "p95_ms": 1000 * histogram.quantile(0.95, **labels),
+                     "total_ms": 1000 * total})
+    rows.sort(key=lambda row: -row["total_ms"])
+    return rows
+
+
+def metrics_asgi(app, path: str = "/metrics"):
+    """Wrap an ASGI app (the Shiny App) so GET `path` returns REGISTRY.render().
+    Every other request, websocket, and lifespan event goes to app unchanged."""
+    async def wrapped(scope, receive, send):
+        if scope["type"] == "http" and scope["path"] == path:
+            body = REGISTRY.render().encode("utf-8")
+            await send({"type": "http.response.start", "status": 200,
+                        "headers": [(b"content-type", CONTENT_TYPE.encode()),
+                                    (b"content-length", str(len(body)).encode())]})
+            await send({"type": "http.response.body", "body": body})
+            return
+        await app(scope, receive, send)
+    return wrapped
@@ -12,131 +12,148 @@
 ## 0.1 Load Packages ############################
 
 import requests  # for HTTP requests to NYT API
+import hashlib   # for keying the conditional cache by API key without storing it
 import os        # for environment variable access
-import json      # for JSON parsing
-from datetime import datetime  # for date handling
-from typing import List, Dict, Optional  # for type hints
+import sys       # for making the project-root package importable
+import threading # for guarding shared session and cache state
+from typing import Callable, List, Dict, Optional  # for type hints
+from requests.adapters import HTTPAdapter  # for connection pooling
+from concurrent.futures import ThreadPoolExecutor, as_completed  # for running requests in parallel
 
-# 1. Constants #################################
+## 0.2 Shared Package ############################
+
+# The shared nyt_pipeline package lives at the project root
+# (shiny_app -> 02_productivity -> root), so add that folder to the import path
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+if PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT)
 
-# NYT Most Popular API base URL
-BASE_URL = "https://api.nytimes.com/svc/mostpopular/v2"
+from nyt_pipeline.facets import FacetVocabulary, CompactArticle, compact_article  # interned facets
+from nyt_pipeline.ingest import parse_article_compact, request_popular, read_results  # shared fetch
+from nyt_pipeline.rate_limit import default_max_wait, get_limiter  # sizing batch waits
+from metrics import API_REQUESTS, API_SECONDS  # request counters and timings (see /metrics)
 
-# Valid endpoint types and period options
-VALID_ENDPOINTS = {"viewed": "Most Viewed", "emailed": "Most Emailed", "shared": "Most Shared"}
-VALID_PERIODS = [1, 7, 30]
+# 1. Constants #################################
 
-# 2. Custom Exception #################################
+# Valid endpoint types and period options (defined once in nyt_pipeline.ingest)
+from nyt_pipeline.ingest import VALID_ENDPOINTS, VALID_PERIODS
 
-class NYTApiError(Exception):
-    """Custom exception for NYT API errors.
-    Provides friendly error messages for common issues
-    like invalid keys, network failures, and rate limits."""
-    pass
+# Default number of pooled keep-alive connections (override with NYT_POOL_SIZE)
+DEFAULT_POOL_SIZE = 10
 
-# 3. Environment Setup #################################
+# Global cap on in-flight NYT requests across all threads (override with NYT_MAX_CONCURRENCY)
+MAX_CONCURRENT_REQUESTS = int(os.getenv("NYT_MAX_CONCURRENCY", "4"))
 
-def _root_env_path():
-    """Path to .env at project root (3 levels up from this file: shiny_app -> 02_productivity -> root)."""
-    this_dir = os.path.dirname(os.path.abspath(__file__))
-    root = os.path.dirname(os.path.dirname(os.path.dirname(this_dir)))  # shiny_app -> 02_productivity -> root
-    return os.path.join(root, ".env")
-
-
-def load_env_file(filepath=None):
-    """Load variables from .env file into environment.
-    Reads each line, skips comments and blanks,
-    and sets key=value pairs as environment variables.
-    If filepath is None, uses .env at project root."""
-    if filepath is None:
-        filepath = _root_env_path()
-    if os.path.exists(filepath):
-        with open(filepath, "r") as f:
-            for line in f:
-                line = line.strip()
-                if line and not line.startswith("#") and "=" in line:
-                    key, value = line.split("=", 1)
-                    os.environ[key.strip()] = value.strip()
-        return True
-    return False
+# 2. Shared Helpers #################################
 
+# The exception class and .env loading live in the nyt_pipeline package so
+# query_nyapi.py, RAG.py, and this app share one copy. NYTApiError is
+# re-exported here, so `from nyt_api import NYTApiError` keeps working.
+from nyt_pipeline.ingest import NYTApiError  # friendly API error messages
+from nyt_pipeline.env import load_env_file  # .env loader (defaults to project root)
+
+# 3. Environment Setup #################################
 
 def get_api_key(env_path=None):
     """Load .env and return the TEST_API_KEY value.
     If env_path is None, looks for .env at project root (same folder as query_nyapi.py, etc.).
     Returns None if the key is not found (instead of raising),
     so the caller can show a friendly message."""
-    if env_path is None:
-        env_path = _root_env_path()
     load_env_file(env_path)
     return os.getenv("TEST_API_KEY")
 
 # 4. Name Normalization #################################
 
-def normalize_nyt_person(name: str) -> str:
-    """Convert NYT person facet from 'Last, First Middle' to 'First Middle Last'.
-    Keeps suffixes reasonably well (e.g., 'King Jr., Martin Luther' -> 'Martin Luther King Jr.')."""
-    if not name or not isinstance(name, str):
-        return name
-
-    name = name.strip()  # remove redundant spaces
+# Person names are normalized in nyt_pipeline.names (used by parse_article_compact)
 
-    # If there's no comma, assume it's already in display order
-    if "," not in name:
-        return " ".join(name.split())
-
-    # Split only on the first comma
-    last, rest = name.split(",", 1)
-    last = last.strip()
-    rest = rest.strip()
-
-    # Combine as 'First Last' (handles suffixes like Jr. naturally)
-    display = f"{rest} {last}".strip()
+# 5. Article Parsing #################################
 
-    # Normalize whitespace
-    return " ".join(display.split())
+# One facet vocabulary for the whole process: each distinct descriptor,
+# organization, person, or location string is stored once and shared by id
+FACET_VOCAB = FacetVocabulary()
 
-# 5. Article Parsing #################################
 
-def parse_article(article: dict) -> dict:
+def parse_article(article: dict) -> CompactArticle:
     """Parse a single article from the NYT API response.
     Extracts title, date, section, url, abstract, and all facets.
-    Returns a flat dictionary suitable for both table and JSON display."""
-    # Normalize person names: 'Last, First' -> 'First Last'
-    per_raw = article.get("per_facet", []) or []
-    per = [normalize_nyt_person(name) for name in per_raw]
-
-    des = article.get("des_facet", []) or []
-    org = article.get("org_facet", []) or []
-    geo = article.get("geo_facet", []) or []
-
-    # Convert lists to comma-separated strings for table display
-    des_str = ", ".join(des) if des else ""
-    org_str = ", ".join(org) if org else ""
-    per_str = ", ".join(per) if per else ""
-    geo_str = ", ".join(geo) if geo else ""
-
-    return {
-        "title": article.get("title", "N/A"),
-        "published_date": article.get("published_date", "N/A"),
-        "section": article.get("section", "N/A"),
-        "url": article.get("url", "N/A"),
-        "abstract": article.get("abstract", "N/A"),
-        "des_facet": des_str,
-        "org_facet": org_str,
-        "per_facet": per_str,
-        "geo_facet": geo_str,
-        # Keep original lists for JSON view
-        "des_facet_list": des,
-        "org_facet_list": org,
-        "per_facet_list": per,
-        "geo_facet_list": geo,
-    }
-
-# 6. Main API Fetch #################################
+    Facets are interned into FACET_VOCAB and kept as integer id arrays.
+    The result reads like a dict: article["per_facet"] gives the
+    comma-joined string and article["per_facet_list"] gives the list.
+    Person names are normalized and spelling variants merged (see nyt_pipeline.names)."""
+    return parse_article_compact(article, FACET_VOCAB)
+
+
+def article_from_dict(data: dict) -> CompactArticle:
+    """Rebuild a CompactArticle from its to_dict() form (e.g. read back from
+    the shared cross-process cache), interning facets into FACET_VOCAB."""
+    return compact_article(data, FACET_VOCAB)
+
+# 6. Pooled Session and Conditional Cache #################################
+
+# One shared session per process, so repeated searches reuse the same
+# keep-alive TCP+TLS connection instead of opening a new one each time.
+_session = None
+_session_lock = threading.Lock()
+
+# Conditional-request cache keyed on (API key hash, endpoint, period), so a
+# validator or body fetched with one key is never reused for another.
+# Each entry keeps the ETag / Last-Modified validators and the parsed articles,
+# so a 304 Not Modified reply can be answered without re-downloading the JSON.
+_conditional_cache = {}
+_cache_lock = threading.Lock()
+_cache_stats = {"hits": 0, "misses": 0}
+
+# Semaphore enforcing MAX_CONCURRENT_REQUESTS for every fetch_articles call
+_request_slots = threading.BoundedSemaphore(MAX_CONCURRENT_REQUESTS)
+
+
+def get_session(pool_size: Optional[int] = None) -> requests.Session:
+    """Return the shared pooled requests.Session, creating it on first use.
+    pool_size sets the number of keep-alive connections kept open;
+    if None, reads NYT_POOL_SIZE from the environment (default 10)."""
+    global _session
+    with _session_lock:
+        if _session is None:
+            if pool_size is None:
+                pool_size = int(os.getenv("NYT_POOL_SIZE", DEFAULT_POOL_SIZE))
+            adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+            session = requests.Session()
+            session.mount("https://", adapter)
+            session.mount("http://", adapter)
+            _session = session
+        return _session
+
+
+def configure_session(pool_size: int = DEFAULT_POOL_SIZE) -> requests.Session:
+    """Replace the shared session with a new one using the given pool size.
+    Closes the old session so its pooled connections are released."""
+    global _session
+    with _session_lock:
+        old, _session = _session, None
+    if old is not None:
+        old.close()
+    return get_session(pool_size)
+
+
+def get_cache_stats() -> Dict[str, int]:
+    """Return a copy of the conditional-cache counters.
+    'hits' counts 304 replies served from cache; 'misses' counts full 200 downloads."""
+    with _cache_lock:
+        return dict(_cache_stats)
+
+
+def clear_cache():
+    """Forget all cached validators and articles, and reset the hit/miss counters."""
+    with _cache_lock:
+        _conditional_cache.clear()
+        _cache_stats["hits"] = 0
+        _cache_stats["misses"] = 0
+
+# 7. Main API Fetch #################################
 
 def fetch_articles(endpoint: str = "viewed", period: int = 1,
-                   num_articles: int = 20, api_key: Optional[str] = None) -> List[Dict]:
+                   num_articles: int = 20, api_key: Optional[str] = None,
+                   max_wait: Optional[float] = None) -> List[Dict]:
     """Fetch most popular articles from the NYT API.
     
     Parameters:
@@ -144,6 +161,7 @@ def fetch_articles(endpoint: str = "viewed", period: int = 1,
         period: Time period in days (1, 7, or 30)
         num_articles: Number of articles to return (1-20)
         api_key: NYT API key (if None, loads from .env)
+        max_wait: Longest wait for a rate-limit token (default NYT_RATE_MAX_WAIT, 30 s)
     
     Returns:
         List of parsed article dictionaries
@@ -151,57 +169,172 @@ def fetch_articles(endpoint: str = "viewed", period: int = 1,
     Raises:
         NYTApiError: On any API or network error with a friendly message
     """
-    # Validate inputs
-    if endpoint not in VALID_ENDPOINTS:
-        raise NYTApiError(f"Invalid endpoint '{endpoint}'. Choose from: {list(VALID_ENDPOINTS.keys())}")
-    if period not in VALID_PERIODS:
-        raise NYTApiError(f"Invalid period '{period}'. Choose from: {VALID_PERIODS}")
-
-    # Get API key if not provided
+    # Get API key if not provided (it is part of the cache key)
     if not api_key:
         api_key = get_api_key()
     if not api_key:
         raise NYTApiError("API key not found. Please add TEST_API_KEY to your .env file.")
 
-    # Build request URL and parameters
-    url = f"{BASE_URL}/{endpoint}/{period}.json"
-    params = {"api-key": api_key}
+    # Send the validators from the last good response (if any),
+    # so the server can answer 304 Not Modified when the list is unchanged
+    cache_key = (hashlib.sha256(api_key.encode("utf-8")).hexdigest()[:16], endpoint, period)
+    with _cache_lock:
+        cached = _conditional_cache.get(cache_key)
+    headers = {}
+    if cached:
+        if cached.get("etag"):
+            headers["If-None-Match"] = cached["etag"]
+        if cached.get("last_modified"):
+            headers["If-Modified-Since"] = cached["last_modified"]
+
+    # One HTTP attempt on the pooled session. The semaphore keeps the total
+    # number of in-flight requests under the global cap, and every attempt
+    # (retries included) is counted by status.
+    def get(url, **kwargs):
+        with _request_slots:
+            try:
+                response = get_session().get(url, **kwargs)
+            except requests.RequestException:
+                API_REQUESTS.inc(endpoint=endpoint, period=period, status="network")
+                raise
+        API_REQUESTS.inc(endpoint=endpoint, period=period, status=response.status_code)
+        return response
+
+    # URL building, input checks, the rate limiter (up to max_wait, with
+    # Retry-After on HTTP 429), and error messages are shared with
+    # nyt_pipeline.ingest.fetch_popular()
+    with API_SECONDS.time(endpoint=endpoint):
+        response = request_popular(endpoint, period, api_key, max_wait=max_wait,
+                                   headers=headers, get=get)
+
+    # Not modified: reuse the articles we parsed last time
+    if response.status_code == 304 and cached:
+        with _cache_lock:
+            _cache_stats["hits"] += 1
+        return cached["articles"][:num_articles]
+
+    results = read_results(response)
+    if not results:
+        raise NYTApiError("The API returned no articles for the selected parameters.")
 
-    # Make the request with error handling
-    try:
-        response = requests.get(url, params=params, timeout=15)
-    except requests.ConnectionError:
-        raise NYTApiError("Network error: Could not connect to the NYT API. Check your internet connection.")
-    except requests.Timeout:
-        raise NYTApiError("Request timed out. The NYT API is not responding. Please try again.")
-    except requests.RequestException as e:
-        raise NYTApiError(f"Request failed: {str(e)}")
-
-    # Handle HTTP error codes with friendly messages
-    if response.status_code == 401:
-        raise NYTApiError("Invalid API key. Please check your TEST_API_KEY in the .env file.")
-    elif response.status_code == 403:
-        raise NYTApiError("Access forbidden. Your API key may not have access to this endpoint.")
-    elif response.status_code == 429:
-        raise NYTApiError("Rate limit exceeded. Please wait a moment and try again.")
-    elif response.status_code != 200:
-        raise NYTApiError(f"API returned an error (HTTP {response.status_code}). Please try again later.")
-
-    # Parse JSON response
-    try:
-        data = response.json()
-    except (json.JSONDecodeError, ValueError):
-        raise NYTApiError("Could not parse the API response. The data format may have changed.")
+    # Parse every article once so later 304 replies can serve any num_articles
+    articles = [parse_article(article) for article in results]
+
+    # Remember the validators and parsed articles for the next conditional request
+    with _cache_lock:
+        _cache_stats["misses"] += 1
+        _conditional_cache[cache_key] = {
+            "etag": response.headers.get("ETag"),
+            "last_modified": response.headers.get("Last-Modified"),
+            "articles": articles,
+        }
+
+    # Limit to requested number
+    return articles[:num_articles]
+
+# 8. Bulk Snapshot Fetch #################################
+
+def fetch_all_snapshots(endpoints: Optional[List[str]] = None,
+                        periods: Optional[List[int]] = None,
+                        num_articles: int = 20, api_key: Optional[str] = None,
+                        max_workers: Optional[int] = None, max_wait: Optional[float] = None,
+                        on_list: Optional[Callable[[str, int, List], None]] = None,
+                        cancel: Optional[threading.Event] = None) -> Dict:
+    """Fetch every endpoint x period list concurrently and merge the results.
+    Every request still takes a token from the key's rate limiter, so at the
+    default 5 per minute all nine lists take about 50 seconds. By default each
+    list may wait as long as the limiter needs to serve the whole batch; lists
+    still waiting after max_wait seconds come back in 'errors'. Use on_list to
+    handle each list as soon as it arrives, and cancel to stop early.
 
-    # Extract results
-    if "results" not in data:
-        raise NYTApiError("Unexpected API response format: no 'results' field found.")
+    Parameters:
+        endpoints: Endpoints to fetch (default: all of VALID_ENDPOINTS)
+        periods: Periods to fetch (default: all of VALID_PERIODS)
+        num_articles: Number of articles per list (1-20)
+        api_key: NYT API key (if None, loads from .env)
+        max_workers: Thread pool size (default: MAX_CONCURRENT_REQUESTS)
+        max_wait: Longest wait per list for a rate-limit token (default: the
+            time the key's limiter needs for one token per list, and at least
+            NYT_RATE_MAX_WAIT, 30 s)
+        on_list: Called as on_list(endpoint, period, articles) in the calling
+            thread as each list arrives, in completion order
+        cancel: Event checked between lists; once set, lists that have not
+            started are skipped and requests already on the wire are not
+            waited for (both are reported in 'errors')
 
-    results = data["results"]
-    if not results:
-        raise NYTApiError("The API returned no articles for the selected parameters.")
+    Returns:
+        Dictionary with two keys:
+        - 'articles': list of parsed articles, deduplicated by URL. Each has an
+          'appearances' list of {'endpoint', 'period', 'rank'} records (rank starts at 1).
+        - 'errors': {(endpoint, period): message} for lists that failed.
 
-    # Parse each article and limit to requested number
-    articles = [parse_article(article) for article in results[:num_articles]]
-    return articles
+    Raises:
+        NYTApiError: If every list failed
+    """
+    if endpoints is None:
+        endpoints = list(VALID_ENDPOINTS.keys())
+    if periods is None:
+        periods = list(VALID_PERIODS)
+    if max_workers is None:
+        max_workers = MAX_CONCURRENT_REQUESTS
+
+    # Load the key once up front instead of once per thread
+    if not api_key:
+        api_key = get_api_key()
+    if not api_key:
+        raise NYTApiError("API key not found. Please add TEST_API_KEY to your .env file.")
 
+    combos = [(endpoint, period) for endpoint in endpoints for period in periods]
+    if max_wait is None:
+        # The last list in line waits for every token before it; +1 s of slack
+        max_wait = max(default_max_wait(), get_limiter(api_key).time_for(len(combos)) + 1)
+
+    def fetch_one(endpoint, period):
+        # A list still queued when the caller cancels never takes a rate-limit token
+        if cancel is not None and cancel.is_set():
+            raise NYTApiError("Cancelled before this list was fetched.")
+        return fetch_articles(endpoint, period, num_articles, api_key, max_wait)
+
+    # Submit all lists at once; the global semaphore in fetch_articles
+    # still bounds how many hit the network at the same time
+    pool = ThreadPoolExecutor(max_workers=max_workers)
+    futures = {pool.submit(fetch_one, *combo): combo for combo in combos}
+    results = {}
+    errors = {}
+    try:
+        # Hand each list to on_list as soon as it arrives
+        for future in as_completed(futures):
+            combo = futures[future]
+            try:
+                results[combo] = future.result()
+            except NYTApiError as e:
+                errors[combo] = str(e)
+            else:
+                if on_list is not None:
+                    on_list(combo[0], combo[1], results[combo])
+            if cancel is not None and cancel.is_set():
+                break
+    finally:
+        # After a cancel, drop queued lists and do not wait for running ones
+        pool.shutdown(wait=cancel is None or not cancel.is_set(), cancel_futures=True)
+    for combo in combos:
+        if combo not in results:
+            errors.setdefault(combo, "Cancelled before this list arrived.")
+
+    # Merge in a fixed order so the output does not depend on thread timing
+    merged = {}
+    for endpoint, period in combos:
+        articles = results.get((endpoint, period))
+        if articles is None:
+            continue
+        for rank, article in enumerate(articles, start=1):
+            url = article["url"]
+            if url not in merged:
+                merged[url] = dict(article, appearances=[])
+            merged[url]["appearances"].append({"endpoint": endpoint, "period": period, "rank": rank})
+
+    if combos and len(errors) == len(combos):
+        first_error = next(iter(errors.values()))
+        raise NYTApiError(f"All {len(combos)} requests failed. First error: {first_error}")
+
+    return {"articles": list(merged.values()), "errors": errors}
@@ -0,0 +1,299 @@
+# rank_poller.py
+# Popularity Rank Time Series for NYT Most Popular
+# Uses fetch_all_snapshots() from nyt_api.py
+# Jimmy
+
+# The Most Popular lists are ranked, but a single fetch only tells us
+# today's order. This module polls every endpoint/period list on a schedule
+# and records only what changed since the last poll: an article entering a
+# list, leaving it, or moving to a new rank. Storing deltas instead of full
+# snapshots keeps the history small, and lets us ask for rank trajectories
+# and the fastest climbers of the day.
+
+# 0. Setup #################################
+
+## 0.1 Load Packages ############################
+
+import argparse   # for the command line interface
+import os         # for paths
+import threading  # for running the poller in the background
+import time       # for timestamps and sleeping
+from datetime import datetime, timezone  # for "start of today"
+from typing import Dict, List, Optional, Tuple  # for type hints
+
+from nyt_api import fetch_all_snapshots, NYTApiError, VALID_ENDPOINTS, VALID_PERIODS, PROJECT_ROOT
+from nyt_pipeline.rate_limit import default_limits  # per-minute / per-day quotas
+from nyt_pipeline.sqlite_db import sqlite_connection  # open-commit-close connections
+
+# 1. Constants #################################
+
+# Default database file, in the data folder at the project root
+DEFAULT_DB_PATH = os.path.join(PROJECT_ROOT, "data", "rank_events.sqlite")
+
+# Share of the key's daily quota the poller may use; the rest is left for
+# interactive searches made with the same key
+QUOTA_SHARE = 0.9
+
+# Event codes stored in the log (one character each keeps rows small).
+# BASELINE marks an article's rank in the first poll of a list, so the
+# initial snapshot is not mistaken for articles entering the list.
+ENTER, EXIT, MOVE, BASELINE = "E", "X", "M", "B"
+
+# Table definitions: URLs and list names are stored once and referenced by id
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS articles (
+    id INTEGER PRIMARY KEY,
+    url TEXT UNIQUE NOT NULL,
+    title TEXT
+);
+CREATE TABLE IF NOT EXISTS lists (
+    id INTEGER PRIMARY KEY,
+    name TEXT UNIQUE NOT NULL          -- e.g. 'viewed/1'
+);
+CREATE TABLE IF NOT EXISTS rank_events (
+    ts INTEGER NOT NULL,               -- unix seconds (UTC)
+    list_id INTEGER NOT NULL,
+    article_id INTEGER NOT NULL,
+    event TEXT NOT NULL,               -- E(nter), X (exit), M(ove), B(aseline)
+    rank INTEGER,                      -- new rank (NULL for exits)
+    prev_rank INTEGER                  -- old rank (NULL for entries)
+);
+CREATE INDEX IF NOT EXISTS idx_events_article ON rank_events (article_id, ts);
+CREATE INDEX IF NOT EXISTS idx_events_ts ON rank_events (ts);
+CREATE TABLE IF NOT EXISTS current_ranks (
+    list_id INTEGER NOT NULL,
+    article_id INTEGER NOT NULL,
+    rank INTEGER NOT NULL,
+    PRIMARY KEY (list_id, article_id)
+);
+"""
+
+# 2. Helpers #################################
+
+def list_name(endpoint: str, period: int) -> str:
+    """Name used for one Most Popular list, e.g. 'viewed/7'."""
+    return f"{endpoint}/{period}"
+
+
+def diff_ranks(old: Dict[int, int], new: Dict[int, int]) -> List[Tuple[str, int, Optional[int], Optional[int]]]:
+    """Compare two {article_id: rank} snapshots of one list.
+    Returns (event, article_id, rank, prev_rank) tuples for entries, exits, and moves."""
+    events = []
+    for article_id, rank in new.items():
+        prev_rank = old.get(article_id)
+        if prev_rank is None:
+            events.append((ENTER, article_id, rank, None))
+        elif prev_rank != rank:
+            events.append((MOVE, article_id, rank, prev_rank))
+    for article_id, prev_rank in old.items():
+        if article_id not in new:
+            events.append((EXIT, article_id, None, prev_rank))
+    return events
+
+
+def min_interval(num_lists: int, per_day: Optional[float] = None) -> float:
+    """Shortest poll interval (seconds) that keeps num_lists requests per poll
+    within QUOTA_SHARE of the daily quota (default: NYT_RATE_PER_DAY, 500).
+    Nine lists at 500 per day give 1728 s, about one poll every 29 minutes."""
+    if per_day is None:
+        per_day = default_limits()[-1][0]  # (requests, 86400 seconds)
+    return 86400.0 * num_lists / (per_day * QUOTA_SHARE)
+
+
+def start_of_today() -> int:
+    """Unix timestamp of 00:00 UTC today."""
+    now = datetime.now(timezone.utc)
+    return int(now.replace(hour=0, minute=0, second=0, microsecond=0).timestamp())
+
+# 3. Rank Poller #################################
+
+class RankPoller:
+    """Polls NYT Most Popular lists and logs rank changes to SQLite.
+
+    Parameters:
+        db_path: SQLite file for the event log
+        interval: Seconds between polls when running on a schedule
+            (default: min_interval() for the tracked lists)
+        endpoints / periods: Lists to track (default: all nine combinations)
+        num_articles: List depth to track (1-20)
+        api_key: NYT API key (if None, loads from .env)
+
+    Raises:
+        ValueError: If interval would use more than QUOTA_SHARE of the daily quota
+    """
+
+    def __init__(self, db_path: str = DEFAULT_DB_PATH, interval: Optional[float] = None,
+                 endpoints: Optional[List[str]] = None, periods: Optional[List[int]] = None,
+                 num_articles: int = 20, api_key: Optional[str] = None):
+        self.db_path = db_path
+        self.endpoints = endpoints or list(VALID_ENDPOINTS.keys())
+        self.periods = periods or list(VALID_PERIODS)
+        # Each poll costs one request per list, so the daily quota sets the pace
+        shortest = min_interval(len(self.endpoints) * len(self.periods))
+        if interval is None:
+            interval = shortest
+        elif interval < shortest:
+            raise ValueError(f"interval={interval:g}s would poll {len(self.endpoints) * len(self.periods)} "
+                             f"lists more often than the daily quota allows; use at least {shortest:.0f}s.")
+        self.interval = interval
+        self.num_articles = num_articles
+        self.api_key = api_key
+        self._stop = threading.Event()
+        self._thread = None
+        if os.path.dirname(db_path):
+            os.makedirs(os.path.dirname(db_path), exist_ok=True)
+        with self._connect() as conn:
+            conn.executescript(SCHEMA)
+
+    def _connect(self):
+        """Open a connection, commit on success, and always close it."""
+        return sqlite_connection(self.db_path)
+
+    ## 3.1 Id Lookups ############################
+
+    @staticmethod
+    def _article_id(conn, url: str, title: str) -> int:
+        """Return the id for url, inserting the article on first sight."""
+        conn.execute("INSERT OR IGNORE INTO articles (url, title) VALUES (?, ?)", (url, title))
+        return conn.execute("SELECT id FROM articles WHERE url = ?", (url,)).fetchone()[0]
+
+    @staticmethod
+    def _list_id(conn, name: str) -> int:
+        """Return the id for a list name, inserting it on first sight."""
+        conn.execute("INSERT OR IGNORE INTO lists (name) VALUES (?)", (name,))
+        return conn.execute("SELECT id FROM lists WHERE name = ?", (name,)).fetchone()[0]
+
+    ## 3.2 Polling ############################
+
+    def poll_once(self, ts: Optional[int] = None) -> Dict[str, int]:
+        """Fetch every tracked list once and record the rank changes.
+        Lists that fail to load are skipped (no false exits are recorded).
+        Returns event counts: {'baseline': n, 'enter': n, 'exit': n, 'move': n, 'failed_lists': n}."""
+        ts = int(ts if ts is not None else time.time())
+        # A full poll is paced by the per-minute quota (about 50 s for nine lists
+        # at 5 per minute), so let each list wait up to one interval for a token.
+        # stop() cancels the lists not fetched yet; they are skipped like failures.
+        snapshot = fetch_all_snapshots(self.endpoints, self.periods,
+                                       num_articles=self.num_articles, api_key=self.api_key,
+                                       max_wait=self.interval, cancel=self._stop)
+
+        # Regroup merged articles into {list name: {url: rank}}
+        ranks_by_list = {list_name(e, p): {} for e in self.endpoints for p in self.periods}
+        titles = {}
+        for article in snapshot["articles"]:
+            titles[article["url"]] = article["title"]
+            for seen in article["appearances"]:
+                ranks_by_list[list_name(seen["endpoint"], seen["period"])][article["url"]] = seen["rank"]
+        for endpoint, period in snapshot["errors"]:
+            ranks_by_list.pop(list_name(endpoint, period), None)
+
+        counts = {"baseline": 0, "enter": 0, "exit": 0, "move": 0, "failed_lists": len(snapshot["errors"])}
+        names = {BASELINE: "baseline", ENTER: "enter", EXIT: "exit", MOVE: "move"}
+        with self._connect() as conn:
+            for name, url_ranks in ranks_by_list.items():
+                list_id = self._list_id(conn, name)
+                new = {self._article_id(conn, url, titles[url]): rank for url, rank in url_ranks.items()}
+                old = dict(conn.execute(
+                    "SELECT article_id, rank FROM current_ranks WHERE list_id = ?", (list_id,)))
+                first_poll = conn.execute(
+                    "SELECT 1 FROM rank_events WHERE list_id = ? LIMIT 1", (list_id,)).fetchone() is None
+                if first_poll:
+                    events = [(BASELINE, article_id, rank, None) for article_id, rank in new.items()]
+                else:
+                    events = diff_ranks(old, new)
+                conn.executemany(
+                    "INSERT INTO rank_events (ts, list_id, article_id, event, rank, prev_rank) "
+                    "VALUES (?, ?, ?, ?, ?, ?)",
+                    [(ts, list_id, article_id, event, rank, prev_rank)
+                     for event, article_id, rank, prev_rank in events])
+                # Replace the current snapshot for this list
+                conn.execute("DELETE FROM current_ranks WHERE list_id = ?", (list_id,))
+                conn.executemany("INSERT INTO current_ranks (list_id, article_id, rank) VALUES (?, ?, ?)",
+                                 [(list_id, article_id, rank) for article_id, rank in new.items()])
+                for event, *_ in events:
+                    counts[names[event]] += 1
+        return counts
+
+    def run(self):
+        """Poll every `interval` seconds until stop() is called.
+        API errors are printed and the next poll goes ahead as scheduled."""
+        while not self._stop.is_set():
+            started = time.monotonic()
+            try:
+                counts = self.poll_once()
+                print(f"[rank_poller] {datetime.now():%H:%M:%S} {counts}")
+            except NYTApiError as e:
+                print(f"[rank_poller] poll failed: {e}")
+            self._stop.wait(max(0.0, self.interval - (time.monotonic() - started)))
+
+    def start(self) -> threading.Thread:
+        """Run the poller in a background daemon thread."""
+        self._stop.clear()
+        self._thread = threading.Thread(target=self.run, daemon=True)
+        self._thread.start()
+        return self._thread
+
+    def stop(self):
+        """Ask the background poller to stop. A poll in progress skips the
+        lists it has not fetched yet and records the ones it has."""
+        self._stop.set()
+
+    ## 3.3 Queries ############################
+
+    def trajectory(self, url: str, endpoint: Optional[str] = None,
+                   period: Optional[int] = None) -> List[Dict]:
+        """Rank history of one article as a list of events:
+        {'ts', 'list', 'event', 'rank', 'prev_rank'} (rank is None after an exit).
+        Optionally limit to one list."""
+        sql = ("SELECT e.ts, l.name, e.event, e.rank, e.prev_rank FROM rank_events e "
+               "JOIN articles a ON a.id = e.article_id JOIN lists l ON l.id = e.list_id "
+               "WHERE a.url = ?")
+        params = [url]
+        if endpoint is not None and period is not None:
+            sql += " AND l.name = ?"
+            params.append(list_name(endpoint, period))
+        sql += " ORDER BY e.ts, l.name"
+        with self._connect() as conn:
+            rows = conn.execute(sql, params).fetchall()
+        return [{"ts": ts, "list": name, "event": event, "rank": rank, "prev_rank": prev}
+                for ts, name, event, rank, prev in rows]
+
+    def fastest_climbers(self, since: Optional[int] = None, endpoint: str = "viewed",
+                         period: int = 1, top: int = 10) -> List[Dict]:
+        """Articles that gained the most rank positions since `since` (default: 00:00 UTC today).
+        Entering the list counts as climbing from just below the bottom (num_articles + 1)."""
+        since = start_of_today() if since is None else since
+        floor = self.num_articles + 1
+        sql = ("SELECT a.url, a.title, "
+               "SUM(CASE e.event WHEN 'M' THEN e.prev_rank - e.rank "
+               "                 WHEN 'E' THEN ? - e.rank ELSE 0 END) AS climb "
+               "FROM rank_events e JOIN articles a ON a.id = e.article_id "
+               "JOIN lists l ON l.id = e.list_id "
+               "WHERE e.ts >= ? AND l.name = ? AND e.event IN ('M', 'E') "
+               "GROUP BY a.id HAVING climb > 0 ORDER BY climb DESC LIMIT ?")
+        with self._connect() as conn:
+            rows = conn.execute(sql, (floor, since, list_name(endpoint, period), top)).fetchall()
+        return [{"url": url, "title": title, "climb": climb} for url, title, climb in rows]
+
+# 4. Command Line #################################
+
+if __name__ == "__main__":
+    # Example: python rank_poller.py --interval 1800
+    parser = argparse.ArgumentParser(description="Poll NYT Most Popular lists and log rank changes.")
+    parser.add_argument("--db", default=DEFAULT_DB_PATH, help="SQLite file for the event log")
+    parser.add_argument("--interval", type=float, default=None,
+                        help="Seconds between polls (default: the shortest the daily quota allows)")
+    parser.add_argument("--once", action="store_true", help="Poll once and exit")
+    args = parser.parse_args()
+
+    try:
+        poller = RankPoller(db_path=args.db, interval=args.interval)
+    except ValueError as e:
+        parser.error(str(e))
+    if args.once:
+        print(poller.poll_once())
+    else:
+        try:
+            poller.run()
+        except KeyboardInterrupt:
+            poller.stop()
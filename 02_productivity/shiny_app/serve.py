@@ -0,0 +1,101 @@
+# serve.py
+# Production Launcher for the NYT Shiny App (Multiple Worker Processes)
+# Run with: python serve.py (one worker; see below before adding more)
+# Jimmy
+
+# Starts the app under uvicorn with the shared cache and article store
+# switched on. A Shiny session's page load, websocket, and any session
+# HTTP requests must all reach the process that holds the session.
+# Several uvicorn workers on one port share the socket and the kernel hands
+# each connection to any of them, so only --workers 1 is safe on its own.
+# To use more cores, run one serve.py per port (--port 8081, 8082, ...)
+# behind a proxy with sticky sessions and pass --instances with the count.
+# All processes share fetched lists through one SQLite cache (WAL mode)
+# and write to one article store, so more processes do not multiply NYT
+# API calls.
+
+# 0. Setup #################################
+
+## 0.1 Load Packages ############################
+
+import argparse  # for command line options
+import os        # for environment settings
+import sys       # for warnings on stderr
+
+# 1. Constants #################################
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+PROJECT_ROOT = os.path.dirname(os.path.dirname(HERE))
+
+# Shared files at the project root (same data folder as the article store)
+DEFAULT_SHARED_CACHE = os.path.join(PROJECT_ROOT, "data", "nyt_cache.sqlite")
+DEFAULT_STORE_DIR = os.path.join(PROJECT_ROOT, "data", "articles")
+
+# NYT quota for one API key (see nyt_pipeline/rate_limit.py)
+NYT_PER_MINUTE = 5
+NYT_PER_DAY = 500
+
+# 2. Configuration #################################
+
+def default_workers() -> int:
+    """WEB_CONCURRENCY if set (the usual platform setting), else 1."""
+    return int(os.environ.get("WEB_CONCURRENCY", "1"))
+
+
+def worker_quota(processes: int) -> tuple:
+    """(per minute, per day) requests for each of `processes` processes sharing
+    one key. Rounded down, so the total never exceeds NYT's limits
+    (5/min over 4 processes is 1/min each, not 1.25).
+
+    Raises:
+        ValueError: If there are more processes than requests per minute
+    """
+    per_minute, per_day = NYT_PER_MINUTE // processes, NYT_PER_DAY // processes
+    if per_minute < 1:
+        raise ValueError(f"{processes} processes cannot share one key's quota of "
+                         f"{NYT_PER_MINUTE} requests per minute; use at most {NYT_PER_MINUTE}.")
+    return per_minute, per_day
+
+
+def configure_environment(processes: int):
+    """Set the variables app.py reads in every worker (existing values win).
+    Each process has its own rate limiter, so the key's quota is split
+    between processes to keep the total under NYT's limits."""
+    os.environ.setdefault("NYT_SHARED_CACHE", DEFAULT_SHARED_CACHE)
+    os.environ.setdefault("NYT_STORE_DIR", DEFAULT_STORE_DIR)
+    if "NYT_RATE_PER_MINUTE" not in os.environ or "NYT_RATE_PER_DAY" not in os.environ:
+        per_minute, per_day = worker_quota(processes)
+        os.environ.setdefault("NYT_RATE_PER_MINUTE", str(per_minute))
+        os.environ.setdefault("NYT_RATE_PER_DAY", str(per_day))
+
+# 3. Launch #################################
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the NYT Shiny app in production.")
+    parser.add_argument("--workers", type=int, default=default_workers(),
+                        help="Worker processes on this port (default: WEB_CONCURRENCY or 1). "
+                             "Only 1 is safe without a sticky proxy in front of each worker.")
+    parser.add_argument("--instances", type=int, default=1,
+                        help="serve.py processes sharing the API key behind a sticky proxy "
+                             "(splits the quota; default 1)")
+    parser.add_argument("--host", default="0.0.0.0")
+    parser.add_argument("--port", type=int, default=int(os.environ.get("PORT", "8080")))
+    args = parser.parse_args()
+
+    try:
+        configure_environment(args.workers * args.instances)
+    except ValueError as e:
+        parser.error(str(e))
+    if args.workers > 1:
+        print("Warning: with several workers on one port, a session's requests can reach a "
+              "worker that does not hold it. Prefer --workers 1 per port behind a sticky proxy.",
+              file=sys.stderr)
+    import uvicorn  # installed with shiny
+    print(f"Starting {args.workers} workers on {args.host}:{args.port} "
+          f"(shared cache: {os.environ['NYT_SHARED_CACHE']})")
+    # Workers import app.py themselves, so pass it as an import string
+    uvicorn.run("app:app", host=args.host, port=args.port, workers=args.workers, app_dir=HERE)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,145 @@
+# shared_cache.py
+# Cross-Process Response Cache in SQLite (WAL Mode)
+# Used by app.py when several worker processes serve the app (see serve.py)
+# Jimmy
+
+# ArticleCache lives in one process. With N worker processes, each worker
+# would miss on its own and call the NYT API itself, multiplying upstream
+# calls by N. This module keeps fetched article lists in one SQLite file
+# opened in WAL mode (readers never block the writer), and hands out a
+# short lease per key so only one worker fetches a missing list while the
+# others wait for its result.
+
+# 0. Setup #################################
+
+## 0.1 Load Packages ############################
+
+import json       # for storing article lists as text
+import os         # for paths and the worker id
+import threading  # for guarding the stats counters
+import time       # for timestamps and polling
+import uuid       # for lease owner ids
+from typing import Any, Callable, Optional  # for type hints
+
+from nyt_pipeline.sqlite_db import sqlite_connection  # open-commit-close connections
+
+# 1. Constants #################################
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS entries (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL,          -- JSON
+    fetched_at REAL NOT NULL      -- unix seconds
+);
+CREATE TABLE IF NOT EXISTS leases (
+    key TEXT PRIMARY KEY,
+    owner TEXT NOT NULL,
+    expires REAL NOT NULL         -- unix seconds
+);
+"""
+
+# How often followers check for the leader's result
+POLL_INTERVAL = 0.1
+
+# 2. Shared Cache #################################
+
+class SharedCache:
+    """JSON values shared by every process that opens the same SQLite file.
+
+    Parameters:
+        path: SQLite file (created if missing)
+        lease_seconds: How long one worker may hold the fetch for a key
+            before another worker is allowed to take over
+    """
+
+    def __init__(self, path: str, lease_seconds: float = 30):
+        self.path = path
+        self.lease_seconds = lease_seconds
+        self.owner = f"{os.getpid()}-{uuid.uuid4().hex[:8]}"
+        self.stats = {"hits": 0, "misses": 0, "upstream_calls": 0, "waits": 0}
+        self._stats_lock = threading.Lock()  # load() runs in several threads
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")  # persistent: set once per file
+            conn.executescript(SCHEMA)
+
+    def _connect(self):
+        """Open a connection, commit on success, and always close it."""
+        return sqlite_connection(self.path, synchronous="NORMAL")  # safe with WAL, much faster commits
+
+    def _count(self, name: str):
+        with self._stats_lock:
+            self.stats[name] += 1
+
+    def stats_snapshot(self) -> dict:
+        """Copy of the counters, taken under the lock."""
+        with self._stats_lock:
+            return dict(self.stats)
+
+    ## 2.1 Reads and Writes ############################
+
+    def get(self, key: str, max_age: Optional[float] = None) -> Optional[Any]:
+        """Return the stored value for key, or None if missing or older than max_age seconds."""
+        with self._connect() as conn:
+            row = conn.execute("SELECT value, fetched_at FROM entries WHERE key = ?", (key,)).fetchone()
+        if row is None or (max_age is not None and time.time() - row[1] >= max_age):
+            return None
+        return json.loads(row[0])
+
+    def put(self, key: str, value: Any):
+        """Store value (must be JSON serializable) for key."""
+        with self._connect() as conn:
+            conn.execute("INSERT OR REPLACE INTO entries (key, value, fetched_at) VALUES (?, ?, ?)",
+                         (key, json.dumps(value, ensure_ascii=False), time.time()))
+
+    ## 2.2 Leases ############################
+
+    def _try_lease(self, key: str) -> bool:
+        """Take the fetch lease for key if nobody holds a live one."""
+        now = time.time()
+        with self._connect() as conn:
+            conn.execute("DELETE FROM leases WHERE key = ? AND expires < ?", (key, now))
+            cursor = conn.execute("INSERT OR IGNORE INTO leases (key, owner, expires) VALUES (?, ?, ?)",
+                                  (key, self.owner, now + self.lease_seconds))
+            return cursor.rowcount == 1
+
+    def _release(self, key: str):
+        with self._connect() as conn:
+            conn.execute("DELETE FROM leases WHERE key = ? AND owner = ?", (key, self.owner))
+
+    ## 2.3 Load Through ############################
+
+    def load(self, key: str, loader: Callable[[], Any], max_age: float) -> Any:
+        """Return a value no older than max_age, calling loader() in at most one
+        process at a time. Other processes wait for that result instead of
+        calling upstream themselves. If the leader fails or its lease runs
+        out, the next waiting process takes over."""
+        while True:
+            value = self.get(key, max_age)
+            if value is not None:
+                self._count("hits")
+                return value
+            if self._try_lease(key):
+                self._count("misses")
+                try:
+                    # Another worker may have finished between our read and the lease
+                    value = self.get(key, max_age)
+                    if value is None:
+                        self._count("upstream_calls")
+                        value = loader()
+                        self.put(key, value)
+                    return value
+                finally:
+                    self._release(key)
+            # Someone else is fetching: wait for their result or their lease to lapse
+            self._count("waits")
+            deadline = time.time() + self.lease_seconds
+            while time.time() < deadline:
+                time.sleep(POLL_INTERVAL)
+                value = self.get(key, max_age)
+                if value is not None:
+                    return value
+                with self._connect() as conn:
+                    if conn.execute("SELECT 1 FROM leases WHERE key = ?", (key,)).fetchone() is None:
+                        break  # leader gave up (error): try to lead ourselves
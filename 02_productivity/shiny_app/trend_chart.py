@@ -0,0 +1,72 @@
+# trend_chart.py
+# Small Inline SVG Line Chart for Facet Trends
+# Used by app.py (Trends tab)
+# Jimmy
+
+# The Trends tab charts daily counts for a handful of facet values.
+# Plotting libraries would add a heavy dependency and send a rendered
+# image on every change; a few SVG polylines are a couple of KB and
+# need nothing beyond the standard library.
+
+# 0. Setup #################################
+
+## 0.1 Load Packages ############################
+
+from html import escape  # for facet values inside SVG text
+from typing import Dict, List, Tuple  # for type hints
+
+# 1. Constants #################################
+
+# Line colors, one per charted value
+PALETTE = ["#1f77b4", "#ff7f0e", "#2ca02c", "#d62728", "#9467bd", "#8c564b"]
+
+# Space around the plot area, in pixels
+MARGIN_LEFT, MARGIN_RIGHT, MARGIN_TOP, MARGIN_BOTTOM = 36, 12, 12, 28
+LEGEND_ROW = 18
+
+# 2. Chart #################################
+
+def line_chart_svg(series: Dict[str, List[Tuple[str, int]]], width: int = 720,
+                   height: int = 260) -> str:
+    """Draw one line per value from {label: [(YYYY-MM-DD, count), ...]}.
+    Every series must cover the same days (FacetTrends.series zero-fills).
+    Returns an <svg> string, or "" when there is nothing to draw."""
+    series = {label: points for label, points in series.items() if points}
+    if not series:
+        return ""
+    days = [day for day, _ in next(iter(series.values()))]
+    peak = max(1, max(n for points in series.values() for _, n in points))
+
+    plot_w = width - MARGIN_LEFT - MARGIN_RIGHT
+    plot_h = height - MARGIN_TOP - MARGIN_BOTTOM
+    step = plot_w / max(1, len(days) - 1)
+
+    def x(i: int) -> float:
+        return MARGIN_LEFT + i * step
+
+    def y(n: int) -> float:
+        return MARGIN_TOP + plot_h * (1 - n / peak)
+
+    legend_h = LEGEND_ROW * len(series)
+    parts = [f'<svg xmlns="http://www.w3.org/2000/svg" viewBox="0 0 {width} {height + legend_h}" '
+             f'width="100%" style="max-width:{width}px;font:11px sans-serif">']
+
+    # Axes with the peak count and the first/last day as labels
+    parts.append(f'<line x1="{MARGIN_LEFT}" y1="{y(0):.1f}" x2="{width - MARGIN_RIGHT}" y2="{y(0):.1f}" stroke="#999"/>')
+    parts.append(f'<line x1="{MARGIN_LEFT}" y1="{MARGIN_TOP}" x2="{MARGIN_LEFT}" y2="{y(0):.1f}" stroke="#999"/>')
+    parts.append(f'<text x="{MARGIN_LEFT - 4}" y="{MARGIN_TOP + 4}" text-anchor="end">{peak}</text>')
+    parts.append(f'<text x="{MARGIN_LEFT - 4}" y="{y(0):.1f}" text-anchor="end">0</text>')
+    parts.append(f'<text x="{MARGIN_LEFT}" y="{height - 8}">{days[0]}</text>')
+    parts.append(f'<text x="{width - MARGIN_RIGHT}" y="{height - 8}" text-anchor="end">{days[-1]}</text>')
+
+    for i, (label, points) in enumerate(series.items()):
+        color = PALETTE[i % len(PALETTE)]
+        coords = " ".join(f"{x(j):.1f},{y(n):.1f}" for j, (_, n) in enumerate(points))
+        parts.append(f'<polyline fill="none" stroke="{color}" stroke-width="2" points="{coords}"/>')
+        total = sum(n for _, n in points)
+        legend_y = height + LEGEND_ROW * i + 10
+        parts.append(f'<rect x="{MARGIN_LEFT}" y="{legend_y - 8}" width="10" height="10" fill="{color}"/>')
+        parts.append(f'<text x="{MARGIN_LEFT + 16}" y="{legend_y + 1}">{escape(label)} ({total})</text>')
+
+    parts.append("</svg>")
+    return "".join(parts)
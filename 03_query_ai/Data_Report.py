@@ -1,13 +1,20 @@
 import requests
 import os
-import pandas as pd
 import json
 from datetime import datetime
 import sys
 import subprocess
 import re
-from datetime import datetime
-from openai import OpenAI
+
+# The shared nyt_pipeline package lives at the project root (one folder up)
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT)
+from nyt_pipeline.env import load_env_file  # shared .env loader
+from nyt_pipeline.ingest import fetch_popular, NYTApiError  # shared NYT query helper
+
+# openai, zyte_api, and docx are imported inside the functions that use them,
+# so importing this module never installs packages or builds API clients.
 
 #Summarizing the content of the articles and provide trend analysis of cryptocurrency market.
 
@@ -15,21 +22,26 @@ from openai import OpenAI
 #Workflow: NEWSDATA_API (pull url of any related currency articles) -> zyte API (instant extraction from any page, one parameter is all you need to extract main content of a page)
 # -> OPENAI API (summarize the content of the articles and provide trend analysis of cryptocurrency market)
 #-----------------------Prerequisites Function----------------------
-# Try to import zyte_api, auto-install if missing. zyte_api is used to extract the content of the articles.
-try:
-    from zyte_api import ZyteAPI
-except ImportError:
+# Import zyte_api on first use, auto-installing it if missing. zyte_api is used to extract the content of the articles.
+def _import_zyte():
+    """Return the ZyteAPI class, installing zyte-api first if it is missing"""
+    try:
+        from zyte_api import ZyteAPI
+        return ZyteAPI
+    except ImportError:
+        pass
     print("=" * 60)
     print("zyte_api not found. Attempting to install...")
     print(f"Using Python: {sys.executable}")
     print("=" * 60)
-    
+
     # Try to install using the current Python interpreter
     try:
         subprocess.check_call([sys.executable, "-m", "pip", "install", "zyte-api"])
         print("✅ Installation successful! Re-importing...")
         from zyte_api import ZyteAPI
         print("✅ zyte_api imported successfully!")
+        return ZyteAPI
     except subprocess.CalledProcessError:
         print("❌ Auto-installation failed.")
         print()
@@ -39,12 +51,14 @@ except ImportError:
         print("Or configure your IDE to use this Python:")
         print("  C:\\Users\\user\\AppData\\Local\\Programs\\Python\\Python314\\python.exe")
         sys.exit(1)
-# Try to import docx, auto-install if missing
-try:
-    from docx import Document
-except ImportError:
-    import sys
-    import subprocess
+# Import docx on first use, auto-installing python-docx if missing
+def _import_docx():
+    """Return the docx Document class, installing python-docx first if it is missing"""
+    try:
+        from docx import Document
+        return Document
+    except ImportError:
+        pass
     print("=" * 60)
     print("ERROR: docx module not found!")
     print("=" * 60)
@@ -56,6 +70,7 @@ except ImportError:
         print("✅ Installation successful! Re-importing...")
         from docx import Document
         print("✅ docx imported successfully!")
+        return Document
     except subprocess.CalledProcessError:
         print("❌ Auto-installation failed.")
         print()
@@ -163,7 +178,7 @@ def normalize_date(user_input: str) -> str:
     raise ValueError("Invalid date format. Please enter a valid date.")
 #Get full article data (includes headline, body, metadata, etc.)
 def extract_article_content(url: str):
-    result = client.get({
+    result = get_zyte_client().get({
         "url": url,
         "article": True  # Extracts structured article data
     })
@@ -195,27 +210,20 @@ schema = {
     "required": ["key_insights"]
 }
 #----------------------Step 1: Prerequisites----------------------
-# Load environment variables from .env file
-def load_env_file(filepath="../.env"):
-    """Load variables from .env file into environment"""
-    if os.path.exists(filepath):
-        with open(filepath, "r") as f:
-            for line in f:
-                line = line.strip() #is a string method that removes leading and Trailing spaces and Newline characters \n
-                if line and not line.startswith("#") and "=" in line:
-                    key, value = line.split("=", 1) #split the string only at the first = sign
-                    os.environ[key.strip()] = value.strip()
-#load .env file
-load_env_file()
-
-#Get API key from environment variable
-OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
-OLLAMA_API_KEY = os.getenv("OLLAMA_API_KEY")
-# NYT_API_KEY = os.getenv("TEST_API_KEY")
-ZYTE_API_KEY = os.getenv("ZYTE_API_KEY")
-# Extract only article content using Zyte API
-# According to https://python-zyte-api.readthedocs.io/en/stable/intro/basic.html
-client = ZyteAPI(api_key=ZYTE_API_KEY)
+# load_env_file() comes from nyt_pipeline.env and reads .env at the project root.
+# Keys are read when first needed, not at import time.
+_zyte_client = None
+
+def get_zyte_client():
+    """Return the shared Zyte client, loading .env and building it on first use"""
+    global _zyte_client
+    if _zyte_client is None:
+        ZyteAPI = _import_zyte()
+        load_env_file()
+        # Extract only article content using Zyte API
+        # According to https://python-zyte-api.readthedocs.io/en/stable/intro/basic.html
+        _zyte_client = ZyteAPI(api_key=os.getenv("ZYTE_API_KEY"))
+    return _zyte_client
 
 #----------------------Step 2: Extract Cypto Related Articles from NEWSDATA_API----------------------
 # According to https://newsdata.io/crypto-news-api
@@ -327,6 +335,9 @@ def get_latest_crypto_news( currency: str = "btc"):
 #     return f"Title: {document.get('title', '')} Date: {document.get('published_date', '')} Abstract: {document.get('abstract', '')}"
 #----------------------Step 3: Generate a report of the article using OPENAI API----------------------
 def get_data_report(articles_data):
+    from openai import OpenAI
+    load_env_file()
+    OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
     #Check if API key is set
     if not OPENAI_API_KEY:
         raise ValueError("OPENAI_API_KEY not found in .env file. Please set it up first.")
@@ -375,34 +386,27 @@ def query_nyt_api(period: int = 1, num_articles: int = 20):
     Returns:
         List of article dictionaries, or empty list on error
     """
-    articles_data = []
-    #NYT API endpoint - period must be 1, 7, or 30 days
-    nyt_base_url = "https://api.nytimes.com/svc/mostpopular/v2"
-    nyt_url = f"{nyt_base_url}/viewed/{period}.json"  # Period: 1, 7, or 30 days
-    params = {"api-key": NYT_API_KEY}
-    response = requests.get(nyt_url, params=params)
-    
-    if response.status_code == 200:
-        data = response.json()
-        data_articles = data['results'][:num_articles]  # Limit to num_articles
-
-        #Prepare data for saving /embedding
-        for i, article in enumerate(data_articles):
-            article_dict = {
-                "date" : article.get('published_date', ''),
-                "title" : article.get('title', ''),
-                "abstract" : article.get('abstract', ''),
-            }
-
-            articles_data.append(article_dict)
-        
-        return articles_data
-    else:
+    # Fetch with the shared helper (reads TEST_API_KEY from .env, respects the rate limit)
+    try:
+        data_articles = fetch_popular(endpoint="viewed", period=period)[:num_articles]  # Limit to num_articles
+    except NYTApiError as e:
         # Return empty list on error, or you could raise an exception
-        print(f"Error: API returned status code {response.status_code}")
-        print(f"Response: {response.text}")
+        print(f"Error: {e}")
         return []
 
+    #Prepare data for saving /embedding
+    articles_data = []
+    for i, article in enumerate(data_articles):
+        article_dict = {
+            "date" : article.get('published_date', ''),
+            "title" : article.get('title', ''),
+            "abstract" : article.get('abstract', ''),
+        }
+
+        articles_data.append(article_dict)
+
+    return articles_data
+
 def main():
     # period must be 1, 7, or 30 (days)
     # num_articles is how many articles to return
@@ -413,6 +417,7 @@ def main():
     data_report = get_data_report(articles_data)
 
     #save the data_report to a file
+    Document = _import_docx()
     doc = Document()
     for line in data_report.split("\n"):
         if line.startswith("# "):
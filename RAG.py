@@ -1,169 +1,140 @@
-from openai import OpenAI
-from pinecone import Pinecone, ServerlessSpec
-import pandas as pd
-import numpy as np
-from uuid import uuid4
-import requests
-from datetime import datetime
 import os
+import json
+from nyt_pipeline.env import load_env_file  # shared .env loader
+from nyt_pipeline import ingest  # shared NYT query helpers
 
-# Load environment variables from .env file
-def load_env_file(filepath=".env"):
-    """Load variables from .env file into environment"""
-    if os.path.exists(filepath):
-        with open(filepath, "r") as f:
-            for line in f:
-                line = line.strip() #is a string method that removes leading and Trailing spaces and Newline characters \n
-                if line and not line.startswith("#") and "=" in line:
-                    key, value = line.split("=", 1) #split the string only at the first = sign
-                    os.environ[key.strip()] = value.strip()
-#load .env file
-load_env_file()
-
-#Get API key from environment variable
-OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
-PINECONE_API_KEY = os.getenv("PINECONE_API_KEY")
-NYT_API_KEY = os.getenv("TEST_API_KEY")
-
-#Initialize OpenAI client
-client = OpenAI(api_key=OPENAI_API_KEY)
-# Check if API key is set
-if not NYT_API_KEY:
-    raise ValueError("TEST_API_KEY not found in .env file. Please set it up first.")
-
-def normalize_nyt_person(name: str) -> str:
-    """
-    Convert NYT person facet from 'Last, First Middle' to 'First Middle Last'.
-    Keeps suffixes reasonably well (e.g., 'King Jr., Martin Luther' -> 'Martin Luther King Jr.').
-    """
-    if not name or not isinstance(name, str):
-        return name
-
-    name = name.strip() #remove redundant spaces
-
-    # If there's no comma, assume it's already in display order
-    if "," not in name:
-        return " ".join(name.split()) #split words and join them with a space
-
-    # Split only on the first comma
-    last, rest = name.split(",", 1)
-    last = last.strip()
-    rest = rest.strip()
-
-    # Simple handling for suffixes that sometimes appear with last name (rare in NYT facets but possible)
-    # e.g., "King Jr., Martin Luther" -> last = "King Jr."
-    # This already works: "Martin Luther" + "King Jr."
-    display = f"{rest} {last}".strip()
-
-    # Normalize whitespace
-    return " ".join(display.split()) 
+# Heavy libraries (openai, pinecone, pandas, numpy) are imported inside the
+# functions that use them, so importing this module has no side effects:
+# no .env read, no API client built, and no network call until first use.
+
+_client = None
+
+def get_client():
+    """Return the shared OpenAI client, creating it (and loading .env) on first use"""
+    global _client
+    if _client is None:
+        from openai import OpenAI
+        load_env_file()
+        _client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+    return _client
 
 def query_nyt_api(num_articles: int = 20):
-    base_url = "https://api.nytimes.com/svc/mostpopular/v2"
-    url = f"{base_url}/viewed/1.json"
-    params = {"api-key": NYT_API_KEY}
-    response = requests.get(url, params=params)
-    if response.status_code == 200:
-        data = response.json()
-        data = data["results"][:num_articles]
-
-        # Prepare list for saving
-        articles_data = []
-        for i, article in enumerate(data):
-            date = article["published_date"]
-            title = article["title"]
-            section = article["section"]
-            url = article["url"]
-            abstract = article["abstract"]
-            per = article["per_facet"]
-            per = [normalize_nyt_person(name) for name in per]
-
-            # Convert lists to comma-seperated strings for CSV
-            per_str = ", ".join(per) if per else ""
-
-            # Store in dictionary for dataset
-            article_dict = {
-                "title": title,
-                "published_date": date,
-                "section": section,
-                "url": url,
-                "abstract": abstract,
-                "per_facet": per_str,
-            }
-            articles_data.append(article_dict)
-
-        # Save as CSV
-        df = pd.DataFrame(articles_data)
-        csv_filename = f"nyt_articles.csv"
-        df.to_csv(csv_filename, index=False, encoding='utf-8')
-        print(f"\n✅ Saved {len(articles_data)} articles to {csv_filename}")
-    
-    else:
-        print(f"Error: {response.status_code}")
-
-# This only needs to be run once to ingest documents into Pinecone
-def ingest_documents(csv_filename, index_name=None):
-    # Read the CSV file to ingest into Pinecone
+    import pandas as pd
+    # Fetch and parse with the shared helper (raises NYTApiError if TEST_API_KEY is missing)
+    try:
+        articles = ingest.query_nyt_api(num_articles=num_articles, save=False, verbose=False)
+    except ingest.NYTApiError as e:
+        print(f"Error: {e}")
+        return
+
+    # Keep only the columns used for embedding and retrieval.
+    # Facets are saved as JSON lists, so values that contain commas survive the CSV
+    articles_data = [
+        {**{key: article[key] for key in ["title", "published_date", "section", "url", "abstract"]},
+         **{field: json.dumps(article[f"{field}_list"], ensure_ascii=False) for field in ingest.FACET_FIELDS}}
+        for article in articles
+    ]
+
+    # Save as CSV
+    df = pd.DataFrame(articles_data)
+    csv_filename = f"nyt_articles.csv"
+    df.to_csv(csv_filename, index=False, encoding='utf-8')
+    print(f"\n✅ Saved {len(articles_data)} articles to {csv_filename}")
+
+# Safe to re-run: ids come from article URLs, and an incremental run only
+# embeds and upserts articles that are new or changed since the last one
+def ingest_documents(csv_filename, index_name=None, namespace="nyt-articles", incremental=True,
+                     prune_missing=False, retention_days=None, embed_workers=4, upsert_workers=2):
+    """Ingest a CSV of articles into the vector store.
+    incremental=False re-upserts every row. prune_missing=True treats the CSV
+    as the whole corpus and deletes vectors of articles not in it.
+    retention_days deletes (and skips) articles published longer ago than that.
+    Embedding and upserting run as a pipeline: embed_workers embedding requests
+    (rate limited by OPENAI_EMBED_RPM) and upsert_workers upserts at a time."""
+    import pandas as pd
+    from datetime import date, timedelta
+    from nyt_pipeline.vector_store import open_vector_store  # Pinecone or local index
+    from nyt_pipeline.embeddings import embed_texts  # embeddings through the content-hash cache
+    from nyt_pipeline.vector_manifest import content_hash, get_manifest, plan_sync, vector_id
+    from nyt_pipeline.facets import facet_cell_list  # facet CSV cells -> lists
+    from nyt_pipeline.ingest_pipeline import run_pipeline  # overlapped embed and upsert
+    from nyt_pipeline.rate_limit import get_limiter  # requests per minute for the embeddings API
+    client = get_client()
+    # Read the CSV file to ingest into the vector store
     df = pd.read_csv(csv_filename)
-    # Initialize Pinecone
-    pc = Pinecone(api_key=PINECONE_API_KEY)
-    existing = [idx.name for idx in pc.list_indexes()]
-    # Create index if it doesn't exist, or skip if it already exists
-    if index_name not in existing:
-        pc.create_index(
-            name=index_name,
-            dimension=1536,
-            spec=ServerlessSpec(
-                cloud="aws",
-                region="us-east-1",
-            ),
-        )
-    index = pc.Index(index_name)
-    #Ingesting documents into Pinecone
-    batch_limit = 100
-    num_batches = max(1, (len(df) + batch_limit - 1) // batch_limit)
-    for batch in np.array_split(df, num_batches):
-        def _str(v):
-            if v is None or (isinstance(v, float) and pd.isna(v)):
-                return ""
-            return str(v)
-
-        matadatas = [
-            {
-                "title": _str(row["title"]),
-                "published_date": _str(row["published_date"]),
-                "section": _str(row["section"]),
-                "url": _str(row["url"]),
-                "abstract": _str(row["abstract"]),
-                "per_facet": _str(row["per_facet"]),
-            }
-            for _, row in batch.iterrows()
-        ]
-        texts = batch["abstract"].tolist()
-        ids = [str(uuid4()) for _ in range(len(batch))]
-
-        response = client.embeddings.create(
-            input=texts,
-            model="text-embedding-3-small",
-        )
-        embeds = [np.array(r.embedding) for r in response.data]
+    # Pinecone by default; NYT_VECTOR_BACKEND=local keeps the index in data/vectors/
+    index = open_vector_store(index_name)
+    manifest = get_manifest()
+    index_key = index.name or f"index:{index_name}"
+    if namespace not in index.describe_index_stats()["namespaces"]:
+        manifest.forget(index_key, namespace)  # index was reset or deleted: start over
+
+    # Metadata for every row at once: missing cells become "", the rest strings.
+    # Facets are lists (all four kinds) and published_day is YYYYMMDD, so the
+    # vector store can filter on them (see retrieve)
+    columns = ["title", "published_date", "section", "url", "abstract"]
+    table = df[columns].astype(object).where(df[columns].notna(), "").astype(str)
+    for field in ingest.FACET_FIELDS:
+        table[field] = df[field].map(facet_cell_list) if field in df else [[] for _ in range(len(df))]
+    days = pd.to_datetime(table["published_date"].str[:10], format="%Y-%m-%d", errors="coerce")
+    table["published_day"] = (days.dt.year * 10000 + days.dt.month * 100 + days.dt.day).fillna(0).astype(int)
+    ids = [vector_id(url, title + abstract)
+           for url, title, abstract in zip(table["url"], table["title"], table["abstract"])]
+    # One row per article id (a URL listed twice keeps its last row)
+    rows = {id_: (metadata, content_hash(metadata["abstract"], metadata))
+            for id_, metadata in zip(ids, table.to_dict("records"))}
+
+    cutoff = (date.today() - timedelta(days=retention_days)).isoformat() if retention_days else None
+    to_upsert, to_delete = plan_sync(
+        manifest.entries(index_key, namespace),
+        {id_: (digest, metadata["published_date"]) for id_, (metadata, digest) in rows.items()},
+        incremental=incremental, prune_missing=prune_missing, cutoff=cutoff,
+    )
 
-        #Insert documents into Pinecone
+    # Remove vectors of articles that left the corpus or aged out (1000 ids per call)
+    for start in range(0, len(to_delete), 1000):
+        batch = to_delete[start:start + 1000]
+        index.delete(ids=batch, namespace=namespace)
+        manifest.forget(index_key, namespace, batch)
+
+    limiter = get_limiter("openai-embeddings", [(float(os.getenv("OPENAI_EMBED_RPM", 3000)), 60.0)])
+
+    def embed(batch):
+        # Only abstracts not already in the embedding cache go to the API
+        texts = [rows[id_][0]["abstract"] for id_ in batch]
+        return embed_texts(texts, client=client, model="text-embedding-3-small", limiter=limiter)
+
+    def upsert(batch, embeds):
+        #Insert documents into the vector store
         index.upsert(
-            vectors=zip(ids, embeds, matadatas),
-            namespace="nyt-articles",
+            vectors=zip(batch, embeds, [rows[id_][0] for id_ in batch]),
+            namespace=namespace,
         )
+        manifest.record(index_key, namespace,
+                        [(id_, rows[id_][1], rows[id_][0]["published_date"]) for id_ in batch])
 
+    #Ingesting documents into the vector store
+    batch_limit = 100
+    batches = (to_upsert[start:start + batch_limit] for start in range(0, len(to_upsert), batch_limit))
+    stats = run_pipeline(batches, embed, upsert, embed_workers=embed_workers, upsert_workers=upsert_workers)
+
+    index.flush()  # saves the local index; no-op for Pinecone
+    print(f"Ingested {len(to_upsert)} new or changed articles, skipped {len(rows) - len(to_upsert)}, "
+          f"deleted {len(to_delete)} ({stats['docs_per_sec']:.0f} docs/sec)")
     return index
 
-def retrieve(query: str, top_k: int = 5, namespace: str = "nyt-articles", index = None):
+def retrieve(query: str, top_k: int = 5, namespace: str = "nyt-articles", index = None,
+             facets: dict = None, start_date: str = None, end_date: str = None):
+    """Top-k articles for a question. facets ({kind: [values]}, e.g. {"per": ["Donald J Trump"]})
+    and the published date range are applied by the vector store before ranking:
+    any value within a kind, every kind given."""
     if index is None:
         raise ValueError("Index is not initialized. Please ingest documents first and pass the index as an argument.")
-    query_vector = client.embeddings.create(
-        input=query,
-        model="text-embedding-3-small",
-    )
-    query_vector = query_vector.data[0].embedding
+    from nyt_pipeline.embeddings import embed_texts  # embeddings through the content-hash cache
+    from nyt_pipeline.vector_store import metadata_filter  # facets and dates -> metadata filter
+    search_filter = metadata_filter(facets, start_date, end_date)
+    # Repeated questions are answered from the embedding cache
+    query_vector = embed_texts(query, client=get_client(), model="text-embedding-3-small")[0].tolist()
     retrieved_docs = []
     sources = []
 
@@ -172,6 +143,7 @@ def retrieve(query: str, top_k: int = 5, namespace: str = "nyt-articles", index
         top_k=top_k,
         namespace=namespace,
         include_metadata=True,
+        **({"filter": search_filter} if search_filter else {}),
     )
 
     for doc in docs['matches']:
@@ -191,7 +163,7 @@ def question_answering(prompt, sources, chat_model):
 
     sys_prompt = "You are a helpful assistant that always answers questions."
 
-    res = client.responses.create(
+    res = get_client().responses.create(
         model=chat_model,
         input=[
             {"role": "system", "content": sys_prompt},
@@ -211,7 +183,8 @@ def question_answering(prompt, sources, chat_model):
 
 def main():
     query_nyt_api(num_articles = 20)
-    # Ingest documents (.csv) into Pinecone. Run only once to avoid duplicates
+    # Ingest documents (.csv) into the vector store. Safe to re-run: only new or
+    # changed articles are upserted, and unchanged abstracts come from the embedding cache
     index = ingest_documents("nyt_articles.csv", index_name="articles")
     # Retrieve documents
     query = "Has President Trump decided how to proceed"
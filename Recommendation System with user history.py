@@ -3,6 +3,7 @@ import openai
 import numpy as np
 from scipy.spatial import distance
 import os
+from nyt_pipeline.embeddings import embed_texts  # embeddings through the content-hash cache
 
 # Load API key from environment
 # Make sure to set OPENAI_API_KEY in your .env file or environment
@@ -20,17 +21,8 @@ def combined_json(document):
 
 #----------------------Step 1.2: Embed the documents using the OpenAI API---------------------
 def embed_documents(texts):
-    """Embed a list of texts using OpenAI API"""
-    if isinstance(texts, str):
-        texts = [texts]  # Convert single string to list
-    
-    response = openai.embeddings.create(
-        input=texts,
-        model="text-embedding-3-small"
-    )
-    
-    response_dict = response.model_dump()
-    return [data["embedding"] for data in response_dict["data"]]
+    """Embed a list of texts using OpenAI API (cached texts are not sent again)"""
+    return embed_texts(texts, client=openai, model="text-embedding-3-small")
 
 #----------------------Step 2: Calculate similarity scores using cosine similarity----------------------
 def find_n_closest(query_vector, embeddings, n=3):
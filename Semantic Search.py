@@ -2,6 +2,7 @@
 import openai
 import numpy as np
 from scipy.spatial import distance
+from nyt_pipeline.embeddings import embed_texts  # embeddings through the content-hash cache
 #----------------------Step 1.1: Combined texts loaded from JSON Files---------------------
 json_files = []
 
@@ -12,14 +13,9 @@ def combined_json(json_files):
 
 documents = [combined_json(json_file) for json_file in json_files]
 #----------------------Step 1.2: Embed the documents using the OpenAI API---------------------
+# Texts already embedded on an earlier run come from the local cache (data/embeddings.sqlite)
 def embed_documents(documents):
-    return openai.embeddings.create(
-        input=documents,
-        model="text-embedding-3-small"
-    )
-
-    response_dict = response.model_dump()
-    return [data["embedding"] for data in response_dict["data"]]
+    return embed_texts(documents, client=openai, model="text-embedding-3-small")
 
 embeddings = embed_documents(documents)
 #----------------------Step 2: Calculate similarity scores between the query and documents using cosine similarity----------------------
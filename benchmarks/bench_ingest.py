@@ -0,0 +1,152 @@
+# bench_ingest.py
+# Ingestion Benchmark Suite for the NYT Pipeline
+# Run from the project root: python benchmarks/bench_ingest.py --scale 20000
+# Jimmy
+
+# Measures the ingestion path end to end against the local stand-in server
+# (benchmarks/nyt_standin.py) instead of the real, rate-limited API:
+#   1. request throughput (requests/s and MB/s over all nine lists)
+#   2. parse time per 1,000 articles (flat dicts and CompactArticle)
+#   3. memory the parsed batch keeps once the raw JSON is freed (tracemalloc)
+#   4. write time for the old CSV dump and for the article store
+# Use --json to save results, so runs before and after a change can be compared.
+
+# 0. Setup #################################
+
+## 0.1 Load Packages ############################
+
+import argparse    # for command line options
+import json        # for saving results
+import os          # for paths and environment settings
+import sys         # for sys.path
+import tempfile    # for throwaway output folders
+import time        # for timing
+import tracemalloc # for retained memory
+from concurrent.futures import ThreadPoolExecutor  # for concurrent requests
+from functools import partial  # for binding the vocabulary to the compact parser
+
+## 0.2 Project Imports ############################
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, PROJECT_ROOT)
+
+# The stand-in never rate limits unless asked to, so lift the client-side quota
+os.environ.setdefault("NYT_RATE_PER_MINUTE", "1000000")
+os.environ.setdefault("NYT_RATE_PER_DAY", "1000000")
+
+from benchmarks.nyt_standin import StandInServer  # local NYT stand-in
+from nyt_pipeline import ingest  # fetch_popular / parse_article_dict
+from nyt_pipeline.facets import FacetVocabulary  # interned articles
+from nyt_pipeline.store import ArticleStore  # date-partitioned store
+
+# 1. Constants #################################
+
+# Dummy key: the stand-in accepts anything
+API_KEY = "benchmark-key"
+
+LISTS = [(e, p) for e in ingest.VALID_ENDPOINTS for p in ingest.VALID_PERIODS]
+
+# 2. Benchmarks #################################
+
+def bench_throughput(rounds: int, workers: int) -> dict:
+    """Fetch all nine lists `rounds` times with `workers` threads."""
+    jobs = LISTS * rounds
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        results = list(pool.map(lambda job: ingest.fetch_popular(*job, api_key=API_KEY), jobs))
+    elapsed = time.perf_counter() - started
+    mb = sum(len(json.dumps(r)) for r in results[:len(LISTS)]) * rounds / 1e6
+    articles = sum(len(r) for r in results)
+    return {"requests": len(jobs), "seconds": elapsed, "requests_per_s": len(jobs) / elapsed,
+            "articles_per_s": articles / elapsed, "mb_per_s": mb / elapsed}
+
+
+def bench_parse(raw: list) -> dict:
+    """Parse time per 1,000 articles, and the memory each parsed form keeps
+    after the raw response is freed, for flat dicts and CompactArticle."""
+    out = {}
+    started = time.perf_counter()
+    [ingest.parse_article_dict(a) for a in raw]
+    out["parse_dict_ms_per_1k"] = (time.perf_counter() - started) * 1000 / len(raw) * 1000
+
+    vocab = FacetVocabulary()
+    started = time.perf_counter()
+    [ingest.parse_article_compact(a, vocab) for a in raw]
+    out["compact_ms_per_1k"] = (time.perf_counter() - started) * 1000 / len(raw) * 1000
+
+    # Retained memory: decode the response afresh (one str per facet occurrence,
+    # as response.json() gives), parse it, drop the raw articles, and count what is
+    # left. Measured separately so tracemalloc overhead does not skew the timings.
+    payload = json.dumps(raw)
+    for key, parse in [("dict_retained_mb", ingest.parse_article_dict),
+                       ("compact_retained_mb", partial(ingest.parse_article_compact, vocab=FacetVocabulary()))]:
+        tracemalloc.start()
+        fresh = json.loads(payload)
+        parsed = [parse(a) for a in fresh]
+        del fresh
+        out[key] = tracemalloc.get_traced_memory()[0] / 1e6
+        tracemalloc.stop()
+        del parsed
+    return out
+
+
+def bench_write(parsed: list) -> dict:
+    """Write time for the old timestamped CSV dump and for ArticleStore.upsert."""
+    import pandas as pd
+    out = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        started = time.perf_counter()
+        pd.DataFrame(parsed).to_csv(os.path.join(tmp, "nyt_articles.csv"), index=False, encoding="utf-8")
+        out["csv_write_s"] = time.perf_counter() - started
+
+        store = ArticleStore(os.path.join(tmp, "store"))
+        started = time.perf_counter()
+        store.upsert(parsed)
+        out["store_insert_s"] = time.perf_counter() - started
+        started = time.perf_counter()
+        store.upsert(parsed)  # same batch again: every row unchanged
+        out["store_reupsert_s"] = time.perf_counter() - started
+        out["store_format"] = store.fmt
+    return out
+
+# 3. Main #################################
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark NYT ingestion against a local stand-in.")
+    parser.add_argument("--scale", type=int, default=20000, help="Articles per list")
+    parser.add_argument("--rounds", type=int, default=3, help="Times each list is fetched")
+    parser.add_argument("--workers", type=int, default=4, help="Concurrent requests")
+    parser.add_argument("--latency-ms", type=float, default=0, help="Stand-in latency per request")
+    parser.add_argument("--rate-429", type=float, default=0.0, help="Fraction of requests throttled")
+    parser.add_argument("--json", help="Save results to this file")
+    args = parser.parse_args()
+
+    print(f"Starting stand-in with {args.scale} articles per list...")
+    with StandInServer(scale=args.scale, latency_ms=args.latency_ms, rate_429=args.rate_429) as server:
+        ingest.BASE_URL = server.base_url
+        results = {"scale": args.scale, "throughput": bench_throughput(args.rounds, args.workers)}
+        raw = ingest.fetch_popular("viewed", 1, api_key=API_KEY)
+        results["server"] = dict(server.counts)
+
+    results["parse"] = bench_parse(raw)
+    results["write"] = bench_write([ingest.parse_article_dict(a) for a in raw])
+
+    t, p, w = results["throughput"], results["parse"], results["write"]
+    print(f"Throughput : {t['requests_per_s']:.1f} req/s, {t['articles_per_s']:,.0f} articles/s, "
+          f"{t['mb_per_s']:.1f} MB/s ({t['requests']} requests)")
+    print(f"Parse      : {p['parse_dict_ms_per_1k']:.2f} ms/1k (dict), "
+          f"{p['compact_ms_per_1k']:.2f} ms/1k (CompactArticle)")
+    print(f"Retained   : {p['dict_retained_mb']:.1f} MB (dicts), "
+          f"{p['compact_retained_mb']:.1f} MB (CompactArticle) for {len(raw):,} articles")
+    print(f"Write      : CSV {w['csv_write_s']:.2f} s, store insert {w['store_insert_s']:.2f} s, "
+          f"re-upsert {w['store_reupsert_s']:.2f} s ({w['store_format']})")
+    print(f"Server     : {results['server']}")
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+        print(f"Saved results to {args.json}")
+
+
+if __name__ == "__main__":
+    main()
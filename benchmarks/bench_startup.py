@@ -0,0 +1,79 @@
+# bench_startup.py
+# Import-Time Benchmark for the NYT Pipeline
+# Run from the project root: python benchmarks/bench_startup.py
+# Jimmy
+
+# Workers and tests import our modules all the time, so importing them should
+# be cheap and should not touch the network. This script imports each module
+# in a fresh Python process several times, reports the median import time,
+# and lists which heavy libraries got loaded along the way (ideally none).
+
+# 0. Setup #################################
+
+## 0.1 Load Packages ############################
+
+import argparse    # for command line options
+import json        # for reading results back from the child process
+import os          # for paths
+import statistics  # for the median
+import subprocess  # for fresh interpreter per run
+import sys         # for the current Python executable
+
+# 1. Constants #################################
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Modules to time (run from the project root)
+DEFAULT_MODULES = ["nyt_pipeline", "nyt_pipeline.cli", "nyt_pipeline.ingest",
+                   "nyt_pipeline.store", "query_nyapi", "RAG"]
+
+# Libraries that should not be imported at startup
+HEAVY_MODULES = ["pandas", "numpy", "requests", "openai", "pinecone", "docx", "pyarrow"]
+
+# Code run in each child process: time one import, then report loaded heavy modules
+CHILD_CODE = """
+import json, sys, time
+start = time.perf_counter()
+import {module}
+elapsed = time.perf_counter() - start
+heavy = [m for m in {heavy!r} if m in sys.modules]
+print(json.dumps({{"seconds": elapsed, "heavy": heavy}}))
+"""
+
+# 2. Benchmark #################################
+
+def time_import(module: str, runs: int = 5) -> dict:
+    """Import module in `runs` fresh processes; return median/min seconds and heavy modules."""
+    code = CHILD_CODE.format(module=module, heavy=HEAVY_MODULES)
+    times, heavy = [], []
+    for _ in range(runs):
+        out = subprocess.run([sys.executable, "-c", code], cwd=PROJECT_ROOT,
+                             capture_output=True, text=True)
+        if out.returncode != 0:
+            return {"module": module, "error": out.stderr.strip().splitlines()[-1]}
+        result = json.loads(out.stdout.strip().splitlines()[-1])
+        times.append(result["seconds"])
+        heavy = result["heavy"]
+    return {"module": module, "median_ms": statistics.median(times) * 1000,
+            "min_ms": min(times) * 1000, "heavy": heavy}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure import time of pipeline modules.")
+    parser.add_argument("modules", nargs="*", default=DEFAULT_MODULES)
+    parser.add_argument("--runs", type=int, default=5, help="Fresh processes per module")
+    args = parser.parse_args()
+
+    print(f"{'module':<24} {'median ms':>10} {'min ms':>8}  heavy imports")
+    print("-" * 70)
+    for module in args.modules:
+        r = time_import(module, args.runs)
+        if "error" in r:
+            print(f"{module:<24} failed: {r['error']}")
+            continue
+        heavy = ", ".join(r["heavy"]) or "-"
+        print(f"{module:<24} {r['median_ms']:>10.1f} {r['min_ms']:>8.1f}  {heavy}")
+
+
+if __name__ == "__main__":
+    main()
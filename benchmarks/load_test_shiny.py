@@ -0,0 +1,272 @@
+# load_test_shiny.py
+# Load Test for the NYT Shiny App (Simulated Concurrent Sessions)
+# Run from the project root: python benchmarks/load_test_shiny.py --sessions 50
+# Jimmy
+
+# How many people can use the app at once? This script answers with data.
+# It starts the local NYT stand-in (benchmarks/nyt_standin.py), launches the
+# app against it (or targets one already running with --url), and opens N
+# websocket sessions that do what a user does: click Search, move the date
+# range, and expand an article in the JSON tab. It reports p50/p95/p99
+# latency per interaction, websocket message sizes, server memory per
+# session, and how many calls reached the (stand-in) NYT API.
+
+# 0. Setup #################################
+
+## 0.1 Load Packages ############################
+
+import argparse    # for command line options
+import asyncio     # for running many sessions at once
+import json        # for the Shiny websocket protocol
+import os          # for paths and environment settings
+import socket      # for finding a free port
+import statistics  # for the mean
+import subprocess  # for launching the app
+import sys         # for the Python executable and sys.path
+import tempfile    # for the throwaway shared cache
+import time        # for timing
+from typing import Dict, List, Optional  # for type hints
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, PROJECT_ROOT)
+
+from benchmarks.nyt_standin import StandInServer  # local NYT stand-in
+from nyt_pipeline.facets import FACET_KINDS  # sidebar facet filters
+
+# 1. Constants #################################
+
+APP_DIR = os.path.join(PROJECT_ROOT, "02_productivity", "shiny_app")
+
+# Outputs each simulated browser reports as visible
+VISIBLE_OUTPUTS = ["status_message", "results_table", "json_view", "json_page_label"]
+
+# Interactions timed per session, in order
+STEPS = ["search", "date_filter", "json_expand"]
+
+# 2. Helpers #################################
+
+def free_port() -> int:
+    """Ask the OS for an unused TCP port."""
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def percentile(values: List[float], pct: float) -> float:
+    """Nearest-rank percentile (0 for an empty list)."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, max(0, int(round(pct / 100 * len(ordered))) - 1))]
+
+
+def process_tree_rss(pid: int) -> Optional[int]:
+    """Resident memory in bytes of pid and its children (Linux /proc, or psutil).
+    Returns None when neither is available."""
+    try:
+        import psutil
+        proc = psutil.Process(pid)
+        return sum(p.memory_info().rss for p in [proc] + proc.children(recursive=True))
+    except ImportError:
+        pass
+    if not os.path.exists(f"/proc/{pid}"):
+        return None
+    pids, total = [pid], 0
+    while pids:
+        current = pids.pop()
+        try:
+            with open(f"/proc/{current}/status") as f:
+                total += next(int(line.split()[1]) * 1024 for line in f if line.startswith("VmRSS"))
+            with open(f"/proc/{current}/task/{current}/children") as f:
+                pids.extend(int(child) for child in f.read().split())
+        except (OSError, StopIteration):
+            continue
+    return total
+
+# 3. Simulated Session #################################
+
+class Session:
+    """One simulated browser talking to the app over Shiny's websocket protocol."""
+
+    def __init__(self, url: str):
+        self.url = url.rstrip("/").replace("http", "ws", 1) + "/websocket/"
+        self.latencies = {step: None for step in STEPS}
+        self.message_sizes = []
+        self.error = None
+        self._ws = None
+        self._search_clicks = 0
+
+    async def _send(self, method: str, data: dict):
+        await self._ws.send(json.dumps({"method": method, "data": data}))
+
+    async def _wait_for(self, output: str, contains: str = "", timeout: float = 30) -> float:
+        """Wait until a message updates `output` (with text `contains`); return seconds waited."""
+        started = time.perf_counter()
+        deadline = started + timeout
+        while True:
+            raw = await asyncio.wait_for(self._ws.recv(), max(0.01, deadline - time.perf_counter()))
+            self.message_sizes.append(len(raw))
+            values = json.loads(raw).get("values") or {}
+            if output in values and contains in json.dumps(values[output]):
+                return time.perf_counter() - started
+
+    async def run(self, think_s: float = 0.0):
+        """Search, then filter by date, then expand the first JSON panel."""
+        import websockets  # installed with shiny
+        try:
+            async with websockets.connect(self.url, max_size=None) as ws:
+                self._ws = ws
+                inputs = {
+                    "endpoint": "viewed", "period": "1", "num_articles": 20,
+                    "date_range:shiny.date": ["2000-01-01", "2100-01-01"],
+                    "search:shiny.action": 0, "json_prev:shiny.action": 0, "json_next:shiny.action": 0,
+                    "trend_kind": "per", "trend_days": "14",
+                    **{f"facet_{kind}": None for kind in FACET_KINDS},  # empty multi-selects
+                    **{f".clientdata_output_{name}_hidden": False for name in VISIBLE_OUTPUTS},
+                }
+                await self._send("init", inputs)
+                await self._wait_for("status_message")
+
+                self._search_clicks += 1
+                started = time.perf_counter()
+                await self._send("update", {"search:shiny.action": self._search_clicks})
+                await self._wait_for("status_message", "Showing")
+                self.latencies["search"] = time.perf_counter() - started
+                await asyncio.sleep(think_s)
+
+                started = time.perf_counter()
+                await self._send("update", {"date_range:shiny.date": ["2000-01-01", "2099-12-31"]})
+                await self._wait_for("results_table")
+                self.latencies["date_filter"] = time.perf_counter() - started
+                await asyncio.sleep(think_s)
+
+                started = time.perf_counter()
+                await self._send("update", {".clientdata_output_json_slot_0_hidden": False})
+                await self._wait_for("json_slot_0")
+                self.latencies["json_expand"] = time.perf_counter() - started
+        except Exception as e:
+            self.error = f"{type(e).__name__}: {e}"
+
+# 4. Load Test #################################
+
+async def run_sessions(url: str, sessions: int, ramp_s: float, think_s: float) -> List[Session]:
+    """Start `sessions` sessions spread over ramp_s seconds and wait for all of them."""
+    clients = [Session(url) for _ in range(sessions)]
+
+    async def start(i, client):
+        await asyncio.sleep(ramp_s * i / max(1, sessions))
+        await client.run(think_s)
+
+    await asyncio.gather(*(start(i, c) for i, c in enumerate(clients)))
+    return clients
+
+
+def launch_app(base_url: str, port: int, workers: int) -> subprocess.Popen:
+    """Start the app against the stand-in and wait until it accepts connections."""
+    env = dict(os.environ, NYT_BASE_URL=base_url, TEST_API_KEY="load-test-key", PORT=str(port),
+               NYT_RATE_PER_MINUTE="1000000", NYT_RATE_PER_DAY="1000000")
+    if workers > 1:
+        cmd = [sys.executable, "serve.py", "--workers", str(workers), "--port", str(port)]
+        # Throwaway cache so every run starts cold, and a throwaway article store so
+        # the stand-in's fixture articles never land in data/articles
+        # (both removed with the temp dir by the OS)
+        scratch = tempfile.mkdtemp(prefix="nyt_load_test_")
+        env.setdefault("NYT_SHARED_CACHE", os.path.join(scratch, "cache.sqlite"))
+        env.setdefault("NYT_STORE_DIR", os.path.join(scratch, "articles"))
+    else:
+        cmd = [sys.executable, "app.py"]
+    proc = subprocess.Popen(cmd, cwd=APP_DIR, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    deadline = time.time() + 30
+    while time.time() < deadline:
+        try:
+            socket.create_connection(("127.0.0.1", port), timeout=0.5).close()
+            return proc
+        except OSError:
+            time.sleep(0.2)
+    proc.kill()
+    raise RuntimeError("The app did not start within 30 seconds.")
+
+
+def summarize(clients: List[Session], upstream: Optional[int], rss_before: Optional[int],
+              rss_after: Optional[int], wall_s: float) -> Dict:
+    """Collect latency percentiles, message sizes, memory, and upstream calls."""
+    ok = [c for c in clients if c.error is None]
+    report = {"sessions": len(clients), "completed": len(ok), "wall_s": wall_s,
+              "errors": sorted({c.error for c in clients if c.error})[:5], "latency_ms": {}}
+    for step in STEPS:
+        values = [c.latencies[step] * 1000 for c in ok if c.latencies[step] is not None]
+        report["latency_ms"][step] = {"p50": percentile(values, 50), "p95": percentile(values, 95),
+                                      "p99": percentile(values, 99), "n": len(values)}
+    sizes = [size for c in clients for size in c.message_sizes]
+    report["messages"] = {"count": len(sizes), "mean_bytes": statistics.mean(sizes) if sizes else 0,
+                          "max_bytes": max(sizes, default=0),
+                          "bytes_per_session": sum(sizes) / len(clients) if clients else 0}
+    if rss_before is not None and rss_after is not None:
+        report["memory"] = {"rss_before_mb": rss_before / 1e6, "rss_after_mb": rss_after / 1e6,
+                            "per_session_kb": (rss_after - rss_before) / 1e3 / max(1, len(clients))}
+    report["upstream_calls"] = upstream
+    return report
+
+
+def print_report(report: Dict):
+    print(f"\nSessions: {report['completed']}/{report['sessions']} completed in {report['wall_s']:.1f} s")
+    print(f"{'interaction':<14} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9}")
+    for step, row in report["latency_ms"].items():
+        print(f"{step:<14} {row['p50']:>9.1f} {row['p95']:>9.1f} {row['p99']:>9.1f}")
+    m = report["messages"]
+    print(f"Websocket messages: {m['count']} total, mean {m['mean_bytes']:,.0f} B, "
+          f"max {m['max_bytes']:,} B, {m['bytes_per_session']:,.0f} B per session")
+    if "memory" in report:
+        mem = report["memory"]
+        print(f"Server memory: {mem['rss_before_mb']:.0f} MB -> {mem['rss_after_mb']:.0f} MB "
+              f"({mem['per_session_kb']:.0f} KB per session)")
+    if report["upstream_calls"] is not None:
+        print(f"Upstream NYT calls: {report['upstream_calls']}")
+    for error in report["errors"]:
+        print(f"Error: {error}")
+
+# 5. Main #################################
+
+def main():
+    parser = argparse.ArgumentParser(description="Simulate concurrent Shiny sessions against the NYT app.")
+    parser.add_argument("--sessions", type=int, default=20, help="Concurrent simulated users")
+    parser.add_argument("--ramp", type=float, default=2.0, help="Seconds over which sessions start")
+    parser.add_argument("--think-ms", type=float, default=200, help="Pause between a user's actions")
+    parser.add_argument("--workers", type=int, default=1, help="App worker processes (uses serve.py if > 1)")
+    parser.add_argument("--latency-ms", type=float, default=300, help="Stand-in latency per NYT request")
+    parser.add_argument("--scale", type=int, default=None, help="Articles per stand-in list")
+    parser.add_argument("--url", help="Test an app that is already running (skips stand-in and launch)")
+    parser.add_argument("--json", help="Save the report to this file")
+    args = parser.parse_args()
+
+    standin = proc = None
+    url = args.url
+    if url is None:
+        standin = StandInServer(scale=args.scale, latency_ms=args.latency_ms).start()
+        port = free_port()
+        proc = launch_app(standin.base_url, port, args.workers)
+        url = f"http://127.0.0.1:{port}"
+    try:
+        rss_before = process_tree_rss(proc.pid) if proc else None
+        started = time.perf_counter()
+        clients = asyncio.run(run_sessions(url, args.sessions, args.ramp, args.think_ms / 1000))
+        wall_s = time.perf_counter() - started
+        rss_after = process_tree_rss(proc.pid) if proc else None
+        upstream = standin.counts["requests"] if standin else None
+        report = summarize(clients, upstream, rss_before, rss_after, wall_s)
+    finally:
+        if proc is not None:
+            proc.terminate()
+            proc.wait(timeout=10)
+        if standin is not None:
+            standin.stop()
+
+    print_report(report)
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"Saved report to {args.json}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,218 @@
+# nyt_standin.py
+# Local Stand-in Server for the NYT Most Popular API
+# Run from the project root: python benchmarks/nyt_standin.py --scale 20000
+# Jimmy
+
+# Benchmarks against the real API are slow, rate limited (5 requests per
+# minute), and never return more than 20 articles. This server replays a
+# recorded Most Popular response from benchmarks/fixtures/ at the same URL
+# shape (/svc/mostpopular/v2/{endpoint}/{period}.json), can grow it into tens
+# of thousands of synthetic articles, and can inject latency, HTTP 429s, and
+# server errors. Point the pipeline at it with:
+#   NYT_BASE_URL=http://127.0.0.1:8765/svc/mostpopular/v2
+
+# 0. Setup #################################
+
+## 0.1 Load Packages ############################
+
+import argparse    # for command line options
+import copy        # for copying fixture articles
+import glob        # for finding fixture files
+import hashlib     # for ETags
+import json        # for reading fixtures and writing responses
+import os          # for paths
+import random      # for injected latency and failures
+import re          # for matching request paths
+import threading   # for running the server in the background
+import time        # for injected latency
+import zlib        # for a stable per-list seed
+from datetime import date, timedelta  # for synthetic published dates
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer  # stdlib HTTP server
+from typing import Dict, List, Optional  # for type hints
+
+# 1. Constants #################################
+
+FIXTURE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+
+# Request path served by the real API
+PATH_PATTERN = re.compile(r"^/svc/mostpopular/v2/(viewed|emailed|shared)/(1|7|30)\.json$")
+
+# 2. Fixtures #################################
+
+def load_fixtures(fixture_dir: str = FIXTURE_DIR) -> Dict[str, List[dict]]:
+    """Load recorded responses named mostpopular_{endpoint}_{period}.json.
+    Returns {'viewed/1': [raw articles], ...}."""
+    fixtures = {}
+    for path in sorted(glob.glob(os.path.join(fixture_dir, "mostpopular_*_*.json"))):
+        _, endpoint, period = os.path.basename(path)[:-5].split("_")
+        with open(path, encoding="utf-8") as f:
+            fixtures[f"{endpoint}/{period}"] = json.load(f)["results"]
+    return fixtures
+
+
+def synthesize(articles: List[dict], scale: int, seed: int = 0) -> List[dict]:
+    """Grow a recorded list to `scale` articles by cycling it with unique
+    URLs, ids, and titles, and spreading published dates over 60 days.
+    Facets are reshuffled between articles so facet vocabularies grow too."""
+    if scale <= len(articles):
+        return articles[:scale]
+    rng = random.Random(seed)
+    people = sorted({p for a in articles for p in a.get("per_facet") or []})
+    orgs = sorted({o for a in articles for o in a.get("org_facet") or []})
+    start = date.fromisoformat(articles[0].get("published_date", "2026-01-01")[:10])
+    out = []
+    for i in range(scale):
+        article = copy.deepcopy(articles[i % len(articles)])
+        if i >= len(articles):
+            article["url"] = f"{article['url'].rsplit('.html', 1)[0]}-{i}.html"
+            article["uri"] = f"nyt://article/standin-{i:08d}"
+            article["id"] = 200000000 + i
+            article["title"] = f"{article['title']} ({i})"
+            article["published_date"] = (start - timedelta(days=rng.randrange(60))).isoformat()
+            # Mix in extra people/organizations, plus a few unique ones per 100 articles
+            article["per_facet"] = rng.sample(people, min(len(people), rng.randint(0, 3))) + \
+                ([f"Person{i // 100}, Synthetic"] if i % 7 == 0 else [])
+            article["org_facet"] = rng.sample(orgs, min(len(orgs), rng.randint(0, 2)))
+        out.append(article)
+    return out
+
+# 3. Server #################################
+
+class StandInServer:
+    """NYT Most Popular stand-in, served from a background thread.
+
+    Parameters:
+        scale: Articles per list (default: the recorded size, usually 20)
+        latency_ms / jitter_ms: Delay added to every response
+        rate_429: Fraction of requests answered with HTTP 429 (with Retry-After)
+        error_rate: Fraction of requests answered with HTTP 500
+        retry_after: Retry-After seconds sent with each 429
+        host / port: Address to bind (port 0 picks a free port)
+    """
+
+    def __init__(self, scale: Optional[int] = None, latency_ms: float = 0, jitter_ms: float = 0,
+                 rate_429: float = 0.0, error_rate: float = 0.0, retry_after: int = 1,
+                 host: str = "127.0.0.1", port: int = 0, fixture_dir: str = FIXTURE_DIR, seed: int = 0):
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.rate_429 = rate_429
+        self.error_rate = error_rate
+        self.retry_after = retry_after
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self.counts = {"requests": 0, "ok": 0, "not_modified": 0, "throttled": 0, "errors": 0}
+
+        fixtures = load_fixtures(fixture_dir)
+        # Lists without their own recording reuse viewed/1 (or whichever fixture exists)
+        default = fixtures.get("viewed/1") or next(iter(fixtures.values()))
+        # Pre-serialize every list once so serving cost is just the socket write
+        self._bodies = {}
+        for endpoint in ("viewed", "emailed", "shared"):
+            for period in (1, 7, 30):
+                name = f"{endpoint}/{period}"
+                recorded = fixtures.get(name, default)
+                results = synthesize(recorded, scale or len(recorded), seed=zlib.crc32(name.encode()))
+                body = json.dumps({"status": "OK", "num_results": len(results),
+                                   "results": results}).encode("utf-8")
+                self._bodies[name] = (body, '"' + hashlib.md5(body).hexdigest() + '"')
+
+        self._httpd = ThreadingHTTPServer((host, port), self._handler_class())
+        self._httpd.daemon_threads = True
+        self._thread = None
+
+    @property
+    def base_url(self) -> str:
+        """Value for NYT_BASE_URL / nyt_pipeline.ingest.BASE_URL."""
+        host, port = self._httpd.server_address[:2]
+        return f"http://{host}:{port}/svc/mostpopular/v2"
+
+    def _roll(self) -> str:
+        """Pick the outcome for one request: 'ok', 'throttled', or 'error'."""
+        with self._lock:
+            self.counts["requests"] += 1
+            roll = self._rng.random()
+        if roll < self.rate_429:
+            return "throttled"
+        if roll < self.rate_429 + self.error_rate:
+            return "error"
+        return "ok"
+
+    def _count(self, key: str):
+        with self._lock:
+            self.counts[key] += 1
+
+    def _handler_class(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"  # keep-alive, like the real API
+
+            def log_message(self, *args):
+                pass  # keep benchmark output clean
+
+            def _reply(self, status: int, body: bytes = b"", headers: Optional[dict] = None):
+                self.send_response(status)
+                for key, value in (headers or {}).items():
+                    self.send_header(key, value)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def do_GET(self):
+                if server.latency_ms or server.jitter_ms:
+                    time.sleep((server.latency_ms + server._rng.uniform(0, server.jitter_ms)) / 1000)
+                match = PATH_PATTERN.match(self.path.split("?", 1)[0])
+                if not match:
+                    return self._reply(404, b'{"fault": "not found"}')
+                outcome = server._roll()
+                if outcome == "throttled":
+                    server._count("throttled")
+                    return self._reply(429, b'{"fault": "rate limit"}',
+                                       {"Retry-After": str(server.retry_after)})
+                if outcome == "error":
+                    server._count("errors")
+                    return self._reply(500, b'{"fault": "server error"}')
+                body, etag = server._bodies[f"{match.group(1)}/{match.group(2)}"]
+                if self.headers.get("If-None-Match") == etag:
+                    server._count("not_modified")
+                    return self._reply(304, headers={"ETag": etag})
+                server._count("ok")
+                self._reply(200, body, {"Content-Type": "application/json", "ETag": etag})
+
+        return Handler
+
+    def start(self) -> "StandInServer":
+        """Serve in a background daemon thread; returns self."""
+        self._thread = threading.Thread(target=self._httpd.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._httpd.shutdown()
+        self._httpd.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+# 4. Command Line #################################
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Serve recorded NYT Most Popular responses locally.")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--scale", type=int, default=None, help="Articles per list (default: recorded size)")
+    parser.add_argument("--latency-ms", type=float, default=0)
+    parser.add_argument("--jitter-ms", type=float, default=0)
+    parser.add_argument("--rate-429", type=float, default=0.0, help="Fraction of requests throttled")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fraction of requests failing with 500")
+    args = parser.parse_args()
+
+    server = StandInServer(scale=args.scale, latency_ms=args.latency_ms, jitter_ms=args.jitter_ms,
+                           rate_429=args.rate_429, error_rate=args.error_rate, port=args.port)
+    print(f"Serving on {server.base_url} (Ctrl+C to stop)")
+    try:
+        server._httpd.serve_forever()
+    except KeyboardInterrupt:
+        print("\nStats:", server.counts)
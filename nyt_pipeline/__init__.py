@@ -0,0 +1,65 @@
+# nyt_pipeline/__init__.py
+# NYT Article Pipeline Package
+# Shared by query_nyapi.py, RAG.py, and the Shiny app
+# Jimmy
+
+# This package holds the reusable pieces of the NYT ingestion pipeline,
+# so the scripts at the project root do not each keep their own copy.
+# Importing the package is cheap: the names below are loaded from their
+# submodules on first use (PEP 562), and heavy libraries such as pandas
+# and requests are only imported inside the functions that need them.
+
+# 1. Lazy Exports #################################
+
+import importlib  # for loading submodules on first attribute access
+
+# Public name -> submodule that defines it
+_EXPORTS = {
+    "load_env_file": "env",
+    "get_api_key": "env",
+    "PROJECT_ROOT": "env",
+    "normalize_nyt_person": "names",
+    "normalize_people": "names",
+    "person_id": "names",
+    "PersonAliases": "names",
+    "get_aliases": "names",
+    "NYTApiError": "ingest",
+    "fetch_popular": "ingest",
+    "parse_article_dict": "ingest",
+    "query_nyt_api": "ingest",
+    "ArticleStore": "store",
+    "ArticleExporter": "export",
+    "export_articles": "export",
+    "FacetVocabulary": "facets",
+    "CompactArticle": "facets",
+    "FacetIndex": "facet_index",
+    "FacetTrends": "trends",
+    "RateLimiter": "rate_limit",
+    "get_limiter": "rate_limit",
+    "VectorStore": "vector_store",
+    "PineconeStore": "vector_store",
+    "LocalVectorStore": "vector_store",
+    "open_vector_store": "vector_store",
+    "EmbeddingCache": "embeddings",
+    "embed_texts": "embeddings",
+    "get_embedding_cache": "embeddings",
+    "VectorManifest": "vector_manifest",
+    "vector_id": "vector_manifest",
+    "run_pipeline": "ingest_pipeline",
+}
+
+__all__ = sorted(_EXPORTS)
+
+
+def __getattr__(name):
+    """Import the submodule that defines `name` the first time it is used."""
+    if name not in _EXPORTS:
+        raise AttributeError(f"module 'nyt_pipeline' has no attribute '{name}'")
+    module = importlib.import_module(f"nyt_pipeline.{_EXPORTS[name]}")
+    value = getattr(module, name)
+    globals()[name] = value  # cache so later lookups skip this function
+    return value
+
+
+def __dir__():
+    return __all__
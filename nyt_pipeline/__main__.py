@@ -0,0 +1,9 @@
+# __main__.py
+# Lets the package run as: python -m nyt_pipeline <command>
+# Jimmy
+
+import sys  # for the exit code
+
+from nyt_pipeline.cli import main
+
+sys.exit(main())
@@ -0,0 +1,124 @@
+# cli.py
+# Command Line Interface for the NYT Pipeline
+# Run with: python -m nyt_pipeline <command>
+# Jimmy
+
+# Each command imports only what it needs, after the arguments are parsed,
+# so `python -m nyt_pipeline --help` starts without loading pandas or requests.
+
+# 0. Setup #################################
+
+## 0.1 Load Packages ############################
+
+import argparse  # for parsing command line arguments
+import glob      # for expanding CSV file patterns
+import sys       # for exit codes
+from typing import List, Optional  # for type hints
+
+# 1. Commands #################################
+
+def _cmd_fetch(args) -> int:
+    """Fetch one Most Popular list and upsert it into the article store."""
+    from nyt_pipeline.ingest import NYTApiError, query_nyt_api
+    from nyt_pipeline.store import ArticleStore
+    if args.export:
+        # Check the export target first, so a typo does not cost a request and a store write
+        from nyt_pipeline.export import resolve_format
+        try:
+            resolve_format(args.export, args.format, args.compression)
+        except (ValueError, ImportError) as e:
+            print(f"Error: {e}", file=sys.stderr)
+            return 1
+    try:
+        store = ArticleStore(args.store) if args.store else None
+        articles = query_nyt_api(num_articles=args.num, endpoint=args.endpoint, period=args.period,
+                                 save=not args.no_save, store=store, verbose=not args.quiet)
+    except (NYTApiError, ValueError, ImportError) as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 1
+    if args.export:
+        from nyt_pipeline.export import export_articles
+        try:
+            rows = export_articles(articles, args.export, fmt=args.format, compression=args.compression)
+        except (ValueError, ImportError) as e:
+            print(f"Error: {e}", file=sys.stderr)
+            return 1
+        print(f"Exported {rows} articles to {args.export}")
+    return 0
+
+
+def _cmd_export(args) -> int:
+    """Stream articles from the article store into a CSV, JSON Lines, or Parquet file."""
+    from nyt_pipeline.export import export_articles
+    from nyt_pipeline.store import ArticleStore
+    store = ArticleStore(args.store) if args.store else ArticleStore()
+    try:
+        rows = export_articles(store.iter_records(args.start, args.end), args.output,
+                               fmt=args.format, compression=args.compression,
+                               batch_size=args.batch_size)
+    except (ValueError, ImportError) as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 1
+    print(f"Exported {rows} articles to {args.output}")
+    return 0
+
+
+def _cmd_import_csv(args) -> int:
+    """Load old nyt_articles_<timestamp>.csv dumps into the article store."""
+    from nyt_pipeline.store import ArticleStore, import_csv
+    paths = [p for pattern in args.patterns for p in glob.glob(pattern)]
+    if not paths:
+        print("No CSV files matched.", file=sys.stderr)
+        return 1
+    store = ArticleStore(args.store) if args.store else None
+    print(import_csv(paths, store))
+    return 0
+
+# 2. Argument Parser #################################
+
+def _add_format_options(parser: argparse.ArgumentParser):
+    """Export format options shared by 'fetch --export' and 'export'."""
+    parser.add_argument("--format", choices=["csv", "jsonl", "parquet"],
+                        help="Export format (default: from the file extension)")
+    parser.add_argument("--compression", choices=["gzip", "zstd"],
+                        help="Compress the export (default: from a .gz/.zst extension)")
+
+
+def build_parser() -> argparse.ArgumentParser:
+    """Define the commands and their options."""
+    parser = argparse.ArgumentParser(prog="python -m nyt_pipeline",
+                                     description="NYT Most Popular ingestion tools.")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    fetch = commands.add_parser("fetch", help="Fetch a Most Popular list into the article store")
+    fetch.add_argument("--endpoint", default="viewed", choices=["viewed", "emailed", "shared"])
+    fetch.add_argument("--period", type=int, default=1, choices=[1, 7, 30])
+    fetch.add_argument("--num", type=int, default=20, help="Number of articles (1-20)")
+    fetch.add_argument("--store", help="Article store folder (default: data/articles)")
+    fetch.add_argument("--no-save", action="store_true", help="Print only; do not write the store")
+    fetch.add_argument("--quiet", action="store_true", help="Do not print each article")
+    fetch.add_argument("--export", help="Also write the articles to this file (.csv, .jsonl, .parquet, +.gz/.zst)")
+    _add_format_options(fetch)
+    fetch.set_defaults(func=_cmd_fetch)
+
+    export = commands.add_parser("export", help="Stream the article store into one file")
+    export.add_argument("output", help="Output file (.csv, .jsonl, .parquet, optionally +.gz/.zst)")
+    export.add_argument("--start", help="First published date (YYYY-MM-DD)")
+    export.add_argument("--end", help="Last published date (YYYY-MM-DD)")
+    export.add_argument("--store", help="Article store folder (default: data/articles)")
+    export.add_argument("--batch-size", type=int, default=10000, help="Rows per Parquet row group")
+    _add_format_options(export)
+    export.set_defaults(func=_cmd_export)
+
+    import_cmd = commands.add_parser("import-csv", help="Import old CSV dumps into the article store")
+    import_cmd.add_argument("patterns", nargs="+", help="CSV files or glob patterns")
+    import_cmd.add_argument("--store", help="Article store folder (default: data/articles)")
+    import_cmd.set_defaults(func=_cmd_import_csv)
+
+    return parser
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """Entry point: parse arguments and run the chosen command."""
+    args = build_parser().parse_args(argv)
+    return args.func(args)
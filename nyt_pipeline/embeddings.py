@@ -0,0 +1,175 @@
+# embeddings.py
+# Embeddings With a Persistent Content-Hash Cache
+# Used by RAG.py, Semantic Search.py, and Recommendation System with user history.py
+# Jimmy
+
+# Every run of ingest_documents() used to send every abstract to the OpenAI
+# embeddings API again, although most of a daily CSV is unchanged. This
+# module keeps each vector in a SQLite file keyed by (model, dimensions,
+# sha256 of the text), so a text is embedded once and later runs, queries,
+# and the semantic search scripts read it back. Only texts the cache has
+# not seen are sent to the API, and duplicates within a call are sent once.
+
+# 0. Setup #################################
+
+## 0.1 Load Packages ############################
+
+import hashlib    # for content hashes
+import os         # for paths and the cache setting
+import threading  # for creating the shared cache once
+import time       # for created_at stamps
+from typing import Dict, Optional, Sequence, Union  # for type hints
+
+import numpy as np  # for float32 vectors
+
+from nyt_pipeline.env import PROJECT_ROOT  # to anchor the default cache file
+from nyt_pipeline.sqlite_db import sqlite_connection  # open-commit-close connections
+
+# 1. Constants #################################
+
+# Default cache file (override with NYT_EMBEDDING_CACHE; set it to "" to turn caching off)
+DEFAULT_CACHE_PATH = os.path.join(PROJECT_ROOT, "data", "embeddings.sqlite")
+
+# Model used by RAG.py and the semantic search scripts
+DEFAULT_MODEL = "text-embedding-3-small"
+
+# Texts sent to the API per request
+API_BATCH_SIZE = 1000
+
+# Keys per SQL lookup (SQLite allows 32766 parameters per statement)
+LOOKUP_CHUNK = 500
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS embeddings (
+    model TEXT NOT NULL,
+    dimensions INTEGER NOT NULL,  -- 0 means the model's default size
+    text_hash TEXT NOT NULL,      -- sha256 hex of the UTF-8 text
+    vector BLOB NOT NULL,         -- float32 bytes
+    created_at REAL NOT NULL,     -- unix seconds
+    PRIMARY KEY (model, dimensions, text_hash)
+) WITHOUT ROWID;
+"""
+
+# 2. Embedding Cache #################################
+
+def text_hash(text: str) -> str:
+    """sha256 hex digest of a text (the cache key)."""
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+class EmbeddingCache:
+    """Embedding vectors stored by (model, dimensions, text hash) in one SQLite file.
+
+    Parameters:
+        path: SQLite file (created if missing)
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.stats = {"hits": 0, "misses": 0, "api_calls": 0}
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")  # readers never block the writer
+            conn.executescript(SCHEMA)
+
+    def _connect(self):
+        """Open a connection, commit on success, and always close it."""
+        return sqlite_connection(self.path, synchronous="NORMAL")
+
+    def get_many(self, model: str, dimensions: int, hashes: Sequence[str]) -> Dict[str, np.ndarray]:
+        """{hash: vector} for the hashes that are cached."""
+        found = {}
+        unique = list(dict.fromkeys(hashes))
+        with self._connect() as conn:
+            for start in range(0, len(unique), LOOKUP_CHUNK):
+                chunk = unique[start:start + LOOKUP_CHUNK]
+                rows = conn.execute(
+                    f"SELECT text_hash, vector FROM embeddings WHERE model = ? AND dimensions = ? "
+                    f"AND text_hash IN ({','.join('?' * len(chunk))})", (model, dimensions, *chunk))
+                for key, blob in rows:
+                    found[key] = np.frombuffer(blob, dtype=np.float32)
+        return found
+
+    def put_many(self, model: str, dimensions: int, hashes: Sequence[str], vectors: Sequence):
+        """Store one vector per hash (existing entries are replaced)."""
+        now = time.time()
+        rows = [(model, dimensions, key, np.asarray(vector, dtype=np.float32).tobytes(), now)
+                for key, vector in zip(hashes, vectors)]
+        with self._connect() as conn:
+            conn.executemany("INSERT OR REPLACE INTO embeddings (model, dimensions, text_hash, vector, "
+                             "created_at) VALUES (?, ?, ?, ?, ?)", rows)
+
+    def __len__(self) -> int:
+        with self._connect() as conn:
+            return conn.execute("SELECT COUNT(*) FROM embeddings").fetchone()[0]
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_embedding_cache() -> Optional[EmbeddingCache]:
+    """The process-wide cache at NYT_EMBEDDING_CACHE (default data/embeddings.sqlite),
+    or None when NYT_EMBEDDING_CACHE is set to an empty string."""
+    global _cache
+    path = os.environ.get("NYT_EMBEDDING_CACHE", DEFAULT_CACHE_PATH)
+    if not path:
+        return None
+    with _cache_lock:
+        if _cache is None or _cache.path != path:
+            _cache = EmbeddingCache(path)
+        return _cache
+
+# 3. Embedding Texts #################################
+
+def embed_texts(texts: Union[str, Sequence[str]], client, model: str = DEFAULT_MODEL,
+                dimensions: Optional[int] = None, cache: Optional[EmbeddingCache] = None,
+                limiter=None) -> np.ndarray:
+    """Embed texts, calling the API only for texts the cache does not have.
+
+    Parameters:
+        texts: One text or a list of texts
+        client: An OpenAI client, or the openai module (anything with embeddings.create)
+        model: Embedding model name
+        dimensions: Requested vector size (None for the model's default)
+        cache: EmbeddingCache to use (default: get_embedding_cache())
+        limiter: RateLimiter to acquire before each API request (cache hits are free)
+
+    Returns:
+        float32 array with one row per text, in input order
+    """
+    if isinstance(texts, str):
+        texts = [texts]
+    texts = list(texts)
+    if not texts:
+        return np.empty((0, dimensions or 0), dtype=np.float32)
+    if cache is None:
+        cache = get_embedding_cache()
+    dims_key = dimensions or 0
+    hashes = [text_hash(text) for text in texts]
+    found = cache.get_many(model, dims_key, hashes) if cache is not None else {}
+
+    # Each missing text is sent once, even if it appears several times
+    missing = {}
+    for key, text in zip(hashes, texts):
+        if key not in found:
+            missing.setdefault(key, text)
+    if cache is not None:
+        cache.stats["hits"] += len(texts) - sum(key not in found for key in hashes)
+        cache.stats["misses"] += len(missing)
+
+    keys = list(missing)
+    extra = {"dimensions": dimensions} if dimensions else {}
+    for start in range(0, len(keys), API_BATCH_SIZE):
+        batch = keys[start:start + API_BATCH_SIZE]
+        if limiter is not None:
+            limiter.acquire()
+        response = client.embeddings.create(input=[missing[key] for key in batch], model=model, **extra)
+        vectors = [np.asarray(item.embedding, dtype=np.float32) for item in response.data]
+        found.update(zip(batch, vectors))
+        if cache is not None:
+            cache.stats["api_calls"] += 1
+            cache.put_many(model, dims_key, batch, vectors)
+
+    return np.vstack([found[key] for key in hashes])
@@ -0,0 +1,49 @@
+# env.py
+# Environment and API Key Loading
+# Shared by query_nyapi.py, RAG.py, and the Shiny app
+# Jimmy
+
+# Every script used to carry its own copy of load_env_file().
+# This module keeps the one copy. Nothing runs at import time:
+# the .env file is only read when a function below is called.
+
+# 0. Setup #################################
+
+## 0.1 Load Packages ############################
+
+import os  # for paths and environment variables
+from typing import Optional  # for type hints
+
+# 1. Constants #################################
+
+# Project root is the folder that contains the nyt_pipeline package
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# The .env file lives at the project root
+DEFAULT_ENV_PATH = os.path.join(PROJECT_ROOT, ".env")
+
+# 2. Functions #################################
+
+def load_env_file(filepath: Optional[str] = None) -> bool:
+    """Load variables from a .env file into the environment.
+    Reads each line, skips comments and blanks, and sets key=value pairs.
+    If filepath is None, uses .env at the project root.
+    Returns True if the file was found."""
+    if filepath is None:
+        filepath = DEFAULT_ENV_PATH
+    if not os.path.exists(filepath):
+        return False
+    with open(filepath, "r") as f:
+        for line in f:
+            line = line.strip()  # remove leading/trailing spaces and the newline
+            if line and not line.startswith("#") and "=" in line:
+                key, value = line.split("=", 1)  # split only at the first = sign
+                os.environ[key.strip()] = value.strip()
+    return True
+
+
+def get_api_key(name: str = "TEST_API_KEY", env_path: Optional[str] = None) -> Optional[str]:
+    """Load .env and return the named key (default: the NYT key, TEST_API_KEY).
+    Returns None if the key is not set, so the caller can show a friendly message."""
+    load_env_file(env_path)
+    return os.getenv(name)
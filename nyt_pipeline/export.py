@@ -0,0 +1,199 @@
+# export.py
+# Streaming Export of Articles to CSV, JSON Lines, or Parquet
+# Replaces the DataFrame -> drop columns -> to_csv step in the old query scripts
+# Jimmy
+
+# The old scripts built a DataFrame of every article, dropped the list
+# columns into a second copy, and only then wrote a CSV. For big backfills
+# that holds the data in memory twice just to serialize it. This module
+# writes articles one at a time as they arrive: CSV and JSON Lines rows go
+# straight to the (optionally gzip/zstd compressed) file, and Parquet rows
+# are flushed as a row group every `batch_size` articles. Memory stays
+# bounded by one batch, however many rows are exported.
+
+# 0. Setup #################################
+
+## 0.1 Load Packages ############################
+
+import csv       # for CSV rows
+import gzip      # for .gz output
+import importlib.util  # for checking optional packages up front
+import io        # for text wrappers around compressed streams
+import json      # for JSON Lines rows
+import os        # for paths
+from typing import Iterable, Optional, Tuple  # for type hints
+
+from nyt_pipeline.store import COLUMNS, FACET_FIELDS, to_record  # shared record shape
+
+# 1. Constants #################################
+
+FORMATS = ["csv", "jsonl", "parquet"]
+COMPRESSIONS = ["gzip", "zstd"]
+
+# File extensions recognised by infer_format()
+_FORMAT_EXTENSIONS = {".csv": "csv", ".jsonl": "jsonl", ".ndjson": "jsonl", ".parquet": "parquet"}
+_COMPRESSION_EXTENSIONS = {".gz": "gzip", ".zst": "zstd"}
+
+# Rows per Parquet row group (also the most rows held in memory at once)
+DEFAULT_BATCH_SIZE = 10000
+
+# 2. Helpers #################################
+
+def infer_format(path: str) -> Tuple[str, Optional[str]]:
+    """Guess (format, compression) from a file name,
+    e.g. 'articles.csv.gz' -> ('csv', 'gzip'). Raises ValueError if unknown."""
+    root, ext = os.path.splitext(path.lower())
+    compression = _COMPRESSION_EXTENSIONS.get(ext)
+    if compression:
+        root, ext = os.path.splitext(root)
+    if ext not in _FORMAT_EXTENSIONS:
+        raise ValueError(f"Cannot tell the export format of '{path}'. "
+                         f"Use one of {list(_FORMAT_EXTENSIONS)} or pass fmt.")
+    return _FORMAT_EXTENSIONS[ext], compression
+
+
+def resolve_format(path: str, fmt: Optional[str] = None,
+                   compression: Optional[str] = None) -> Tuple[str, Optional[str]]:
+    """Check an export target before any work is done and return (format, compression).
+    Missing values come from the file name, as in infer_format().
+
+    Raises:
+        ValueError: If the format or compression is unknown
+        ImportError: If the format or compression needs a package that is not installed
+    """
+    if fmt is None:
+        fmt, inferred = infer_format(path)
+        compression = compression or inferred
+    if fmt not in FORMATS:
+        raise ValueError(f"Invalid format '{fmt}'. Choose from: {FORMATS}")
+    if compression is not None and compression not in COMPRESSIONS:
+        raise ValueError(f"Invalid compression '{compression}'. Choose from: {COMPRESSIONS}")
+    if fmt == "parquet" and importlib.util.find_spec("pyarrow") is None:
+        raise ImportError("Parquet export needs the 'pyarrow' package (pip install pyarrow).")
+    if fmt != "parquet" and compression == "zstd" and importlib.util.find_spec("zstandard") is None:
+        raise ImportError("zstd compression needs the 'zstandard' package (pip install zstandard).")
+    return fmt, compression
+
+
+def _open_text(path: str, compression: Optional[str]):
+    """Open path for writing text, compressed with gzip or zstd if asked."""
+    if compression is None:
+        return open(path, "w", encoding="utf-8", newline="")
+    if compression == "gzip":
+        return gzip.open(path, "wt", encoding="utf-8", newline="")
+    try:
+        import zstandard  # optional: pip install zstandard
+    except ImportError:
+        raise ImportError("zstd compression needs the 'zstandard' package (pip install zstandard).")
+    raw = open(path, "wb")
+    stream = zstandard.ZstdCompressor().stream_writer(raw, closefd=True)
+    return io.TextIOWrapper(stream, encoding="utf-8", newline="")
+
+
+def export_record(article: dict) -> dict:
+    """Turn a parsed article or store record into one export row (store columns,
+    facets as lists). first_seen/last_seen are blank unless the input has them."""
+    record = to_record(article)
+    record["first_seen"] = article.get("first_seen") or ""
+    record["last_seen"] = article.get("last_seen") or ""
+    return record
+
+# 3. Exporter #################################
+
+class ArticleExporter:
+    """Writes articles to one file as they arrive. Use as a context manager.
+
+    Parameters:
+        path: Output file
+        fmt: 'csv', 'jsonl', or 'parquet' (default: from the file extension)
+        compression: None, 'gzip', or 'zstd' (default: from a .gz/.zst extension).
+            For Parquet this sets the codec inside the file.
+        batch_size: Rows per Parquet row group
+    """
+
+    def __init__(self, path: str, fmt: Optional[str] = None, compression: Optional[str] = None,
+                 batch_size: int = DEFAULT_BATCH_SIZE):
+        fmt, compression = resolve_format(path, fmt, compression)
+        self.path = path
+        self.fmt = fmt
+        self.compression = compression
+        self.batch_size = batch_size
+        self.rows = 0
+        self._file = None
+        self._csv = None
+        self._parquet = None
+        self._batch = []
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+
+        if fmt == "parquet":
+            import pyarrow as pa  # deferred: only Parquet needs it
+            import pyarrow.parquet as pq
+            self._schema = pa.schema([(col, pa.list_(pa.string()) if col in FACET_FIELDS else pa.string())
+                                      for col in COLUMNS])
+            self._parquet = pq.ParquetWriter(path, self._schema, compression=compression or "snappy")
+        else:
+            self._file = _open_text(path, compression)
+            if fmt == "csv":
+                self._csv = csv.DictWriter(self._file, fieldnames=COLUMNS)
+                self._csv.writeheader()
+
+    def write(self, article: dict):
+        """Write one article (parsed dict, raw API article, or store record)."""
+        record = export_record(article)
+        if self.fmt == "csv":
+            for field in FACET_FIELDS:
+                record[field] = ", ".join(record[field])  # same shape as the old CSV dumps
+            self._csv.writerow(record)
+        elif self.fmt == "jsonl":
+            self._file.write(json.dumps(record, ensure_ascii=False) + "\n")
+        else:
+            self._batch.append(record)
+            if len(self._batch) >= self.batch_size:
+                self._flush()
+        self.rows += 1
+
+    def write_many(self, articles: Iterable[dict]) -> int:
+        """Write every article from an iterable (a generator keeps memory flat).
+        Returns the number written."""
+        before = self.rows
+        for article in articles:
+            self.write(article)
+        return self.rows - before
+
+    def _flush(self):
+        """Write the buffered Parquet rows as one row group."""
+        if not self._batch:
+            return
+        import pyarrow as pa
+        columns = {col: [r[col] for r in self._batch] for col in COLUMNS}
+        self._parquet.write_table(pa.table(columns, schema=self._schema))
+        self._batch = []
+
+    def close(self):
+        """Flush and close the output file."""
+        if self._parquet is not None:
+            self._flush()
+            self._parquet.close()
+            self._parquet = None
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+# 4. Convenience Wrapper #################################
+
+def export_articles(articles: Iterable[dict], path: str, fmt: Optional[str] = None,
+                    compression: Optional[str] = None, batch_size: int = DEFAULT_BATCH_SIZE) -> int:
+    """Stream articles into one file and return the number of rows written.
+
+    Example:
+        export_articles(store.iter_records("2026-01-01"), "january.parquet")
+    """
+    with ArticleExporter(path, fmt, compression, batch_size) as exporter:
+        return exporter.write_many(articles)
@@ -0,0 +1,203 @@
+# facets.py
+# Compact, Interned Facet Representation
+# Used by nyt_api.parse_article and the facet index / trend modules
+# Jimmy
+
+# A multi-month corpus repeats the same facet values thousands of times
+# ("Trump, Donald J.", "United States Politics and Government", ...).
+# This module stores each distinct value once in a FacetVocabulary and keeps
+# per-article facets as small integer arrays. Display strings are built only
+# when someone asks for them, and facet checks become integer compares.
+
+# 0. Setup #################################
+
+## 0.1 Load Packages ############################
+
+import json       # for facet lists saved as JSON text in CSV cells
+import threading  # for a thread-safe vocabulary
+from array import array  # for compact unsigned int arrays
+from collections.abc import Mapping  # so articles still behave like dicts
+from typing import Dict, Iterable, List, Optional  # for type hints
+
+# 1. Constants #################################
+
+# Facet kinds, in the order the NYT API lists them
+FACET_KINDS = ["des", "org", "per", "geo"]
+
+# Plain text fields copied from the parsed article
+TEXT_FIELDS = ["title", "published_date", "section", "url", "abstract"]
+
+# 2. Facet Vocabulary #################################
+
+class FacetVocabulary:
+    """Interns facet strings to integer ids (and back).
+    One vocabulary is shared by all facet kinds; a value that appears as both
+    a descriptor and an organization gets the same id."""
+
+    def __init__(self):
+        self._ids = {}     # value -> id
+        self._values = []  # id -> value
+        self._lock = threading.Lock()
+
+    def intern(self, value: str) -> int:
+        """Return the id for value, adding it on first sight."""
+        value_id = self._ids.get(value)
+        if value_id is not None:
+            return value_id
+        with self._lock:
+            value_id = self._ids.get(value)
+            if value_id is None:
+                value_id = len(self._values)
+                self._values.append(value)
+                self._ids[value] = value_id
+            return value_id
+
+    def intern_many(self, values: Iterable[str]) -> array:
+        """Intern a list of values and return their ids as an unsigned int array."""
+        values = list(values)
+        try:
+            # Fast path: after warm-up nearly every value is already known
+            return array("I", [self._ids[v] for v in values])
+        except KeyError:
+            return array("I", [self.intern(v) for v in values])
+
+    def id(self, value: str) -> Optional[int]:
+        """Return the id for value without adding it (None if unknown)."""
+        return self._ids.get(value)
+
+    def value(self, value_id: int) -> str:
+        """Return the string for an id."""
+        return self._values[value_id]
+
+    def values(self, ids: Iterable[int]) -> List[str]:
+        """Return the strings for a sequence of ids."""
+        lookup = self._values
+        return [lookup[i] for i in ids]
+
+    def __len__(self) -> int:
+        return len(self._values)
+
+    def __contains__(self, value: str) -> bool:
+        return value in self._ids
+
+# 3. Compact Article #################################
+
+class CompactArticle(Mapping):
+    """Memory-light article record with facets stored as interned id arrays.
+
+    Reads like the dict returned by the old parse_article():
+    article["per_facet"] gives the comma-joined string and
+    article["per_facet_list"] gives the list. Both are built on demand.
+    Use article.facet_ids("per") to get the raw integer ids.
+    """
+
+    __slots__ = ("title", "published_date", "section", "url", "abstract",
+                 "des_ids", "org_ids", "per_ids", "geo_ids", "vocab")
+
+    def __init__(self, vocab: FacetVocabulary, title: str, published_date: str,
+                 section: str, url: str, abstract: str,
+                 des: Iterable[str] = (), org: Iterable[str] = (),
+                 per: Iterable[str] = (), geo: Iterable[str] = ()):
+        self.vocab = vocab
+        self.title = title
+        self.published_date = published_date
+        self.section = section
+        self.url = url
+        self.abstract = abstract
+        self.des_ids = vocab.intern_many(des)
+        self.org_ids = vocab.intern_many(org)
+        self.per_ids = vocab.intern_many(per)
+        self.geo_ids = vocab.intern_many(geo)
+
+    ## 3.1 Facet Access ############################
+
+    def facet_ids(self, kind: str) -> array:
+        """Return the interned ids for one facet kind ('des', 'org', 'per', 'geo')."""
+        return getattr(self, f"{kind}_ids")
+
+    def facet_list(self, kind: str) -> List[str]:
+        """Return one facet kind as a list of strings."""
+        return self.vocab.values(self.facet_ids(kind))
+
+    def has_facet(self, kind: str, value: str) -> bool:
+        """True if the article carries value under kind (an integer compare)."""
+        value_id = self.vocab.id(value)
+        return value_id is not None and value_id in self.facet_ids(kind)
+
+    ## 3.2 Mapping Interface ############################
+
+    def _keys(self) -> List[str]:
+        return (TEXT_FIELDS
+                + [f"{kind}_facet" for kind in FACET_KINDS]
+                + [f"{kind}_facet_list" for kind in FACET_KINDS])
+
+    def __getitem__(self, key: str):
+        if key in TEXT_FIELDS:
+            return getattr(self, key)
+        if key.endswith("_facet_list"):
+            kind = key[:-len("_facet_list")]
+            if kind in FACET_KINDS:
+                return self.facet_list(kind)
+        if key.endswith("_facet"):
+            kind = key[:-len("_facet")]
+            if kind in FACET_KINDS:
+                return ", ".join(self.facet_list(kind))
+        raise KeyError(key)
+
+    def __iter__(self):
+        return iter(self._keys())
+
+    def __len__(self) -> int:
+        return len(TEXT_FIELDS) + 2 * len(FACET_KINDS)
+
+    def __repr__(self) -> str:
+        return f"CompactArticle(title={self.title!r}, url={self.url!r})"
+
+    def to_dict(self) -> Dict:
+        """Expand into a plain dict (same shape as the old parse_article output)."""
+        return {key: self[key] for key in self}
+
+# 4. Conversion Helpers #################################
+
+def compact_article(article: Mapping, vocab: FacetVocabulary) -> CompactArticle:
+    """Build a CompactArticle from a parsed article dict.
+    Facets are read from the '<kind>_facet_list' keys."""
+    return CompactArticle(
+        vocab,
+        title=article.get("title", "N/A"),
+        published_date=article.get("published_date", "N/A"),
+        section=article.get("section", "N/A"),
+        url=article.get("url", "N/A"),
+        abstract=article.get("abstract", "N/A"),
+        **{kind: article.get(f"{kind}_facet_list", []) or [] for kind in FACET_KINDS},
+    )
+
+
+def facet_values(article: Mapping, kind: str) -> List[str]:
+    """Read one facet kind as a list from a CompactArticle, a parsed dict
+    ('<kind>_facet_list'), or a store record (list under '<kind>_facet')."""
+    if isinstance(article, CompactArticle):
+        return article.facet_list(kind)
+    values = article.get(f"{kind}_facet_list")
+    if values is None:
+        values = article.get(f"{kind}_facet")
+    if values is None or isinstance(values, (str, float)):
+        return []
+    return list(values)
+
+
+def facet_cell_list(value) -> List[str]:
+    """Read a facet cell from a CSV as a list. Accepts a list, a JSON array
+    ('["Iran", "Israel"]', written by RAG.query_nyt_api), or an older
+    comma-joined string (lossy for values that contain commas). Empty or NaN -> []."""
+    if isinstance(value, (list, tuple)):
+        return [str(v) for v in value]
+    if not isinstance(value, str) or not value.strip():
+        return []
+    text = value.strip()
+    if text.startswith("["):
+        try:
+            return [str(v) for v in json.loads(text)]
+        except ValueError:
+            pass
+    return [part.strip() for part in text.split(",") if part.strip()]
@@ -0,0 +1,216 @@
+# ingest.py
+# Query the NYT Most Popular API and Ingest Articles
+# Replaces the query_nyt_api() copies in query_nyapi.py, RAG.py, and Data_Report.py
+# Jimmy
+
+# This module fetches a Most Popular list, parses each article into a flat
+# dictionary (strings for tables, lists for JSON and the store), and upserts
+# the batch into the article store. requests and pandas are only imported
+# when a function that needs them is called, so importing this module is cheap.
+
+# 0. Setup #################################
+
+## 0.1 Load Packages ############################
+
+import os  # for the NYT_BASE_URL override
+from typing import Dict, List, Optional  # for type hints
+
+from nyt_pipeline.env import get_api_key  # .env loading
+from nyt_pipeline.facets import CompactArticle, FacetVocabulary  # interned facets
+from nyt_pipeline.names import get_aliases, normalize_people  # canonical person names
+from nyt_pipeline.rate_limit import send_with_retry  # shared per-key rate limiter
+
+# 1. Constants #################################
+
+# NYT Most Popular API base URL.
+# Set NYT_BASE_URL to point at a local stand-in server (see benchmarks/nyt_standin.py).
+BASE_URL = os.getenv("NYT_BASE_URL", "https://api.nytimes.com/svc/mostpopular/v2")
+
+# Valid endpoint types and period options
+VALID_ENDPOINTS = {"viewed": "Most Viewed", "emailed": "Most Emailed", "shared": "Most Shared"}
+VALID_PERIODS = [1, 7, 30]
+
+# Facet fields returned by the API
+FACET_FIELDS = ["des_facet", "org_facet", "per_facet", "geo_facet"]
+
+# 2. Custom Exception #################################
+
+class NYTApiError(Exception):
+    """Custom exception for NYT API errors.
+    Provides friendly error messages for common issues
+    like invalid keys, network failures, and rate limits."""
+    pass
+
+# 3. Fetching #################################
+
+def request_popular(endpoint: str = "viewed", period: int = 1, api_key: Optional[str] = None,
+                    timeout: float = 15, max_wait: Optional[float] = None,
+                    headers: Optional[Dict[str, str]] = None, get=None) -> "requests.Response":
+    """Send one Most Popular request under the key's rate limiter and return the
+    response whatever its status (a 304 Not Modified is left to the caller).
+
+    Parameters:
+        endpoint: One of 'viewed', 'emailed', 'shared'
+        period: Time period in days (1, 7, or 30)
+        api_key: NYT API key (if None, loads TEST_API_KEY from .env)
+        timeout: Request timeout in seconds
+        max_wait: Longest wait for a rate-limit token (default NYT_RATE_MAX_WAIT, 30 s)
+        headers: Extra request headers (e.g. If-None-Match)
+        get: Callable like requests.get that performs one HTTP attempt
+            (default requests.get; the Shiny app passes its pooled session)
+
+    Raises:
+        NYTApiError: On invalid input, missing key, or a network error
+    """
+    import requests  # deferred: only needed when we actually call the API
+
+    if endpoint not in VALID_ENDPOINTS:
+        raise NYTApiError(f"Invalid endpoint '{endpoint}'. Choose from: {list(VALID_ENDPOINTS.keys())}")
+    if period not in VALID_PERIODS:
+        raise NYTApiError(f"Invalid period '{period}'. Choose from: {VALID_PERIODS}")
+    if not api_key:
+        api_key = get_api_key()
+    if not api_key:
+        raise NYTApiError("TEST_API_KEY not found in .env file. Please set it up first.")
+
+    url = f"{BASE_URL}/{endpoint}/{period}.json"
+    params = {"api-key": api_key}
+    get = get or requests.get
+    try:
+        # Waits for the shared rate limiter and retries HTTP 429 after Retry-After
+        return send_with_retry(lambda: get(url, params=params, headers=headers or {}, timeout=timeout),
+                               api_key, max_wait=max_wait)
+    except TimeoutError:
+        raise NYTApiError("Rate limit: no request slot came free in time (the NYT allows "
+                          "5 requests per minute per key). Please try again shortly.")
+    except requests.ConnectionError:
+        raise NYTApiError("Network error: Could not connect to the NYT API. Check your internet connection.")
+    except requests.Timeout:
+        raise NYTApiError("Request timed out. The NYT API is not responding. Please try again.")
+    except requests.RequestException as e:
+        raise NYTApiError(f"Request failed: {e}")
+
+
+def read_results(response) -> List[Dict]:
+    """Check a Most Popular response and return its raw 'results' list.
+
+    Raises:
+        NYTApiError: On an HTTP error status or a malformed body
+    """
+    if response.status_code == 401:
+        raise NYTApiError("Invalid API key. Please check your TEST_API_KEY in the .env file.")
+    if response.status_code == 403:
+        raise NYTApiError("Access forbidden. Your API key may not have access to this endpoint.")
+    if response.status_code == 429:
+        raise NYTApiError("Rate limit exceeded after several retries. Please wait a moment and try again.")
+    if response.status_code != 200:
+        raise NYTApiError(f"API returned an error (HTTP {response.status_code}). Please try again later.")
+    try:
+        data = response.json()
+    except ValueError:
+        raise NYTApiError("Could not parse the API response. The data format may have changed.")
+    if not isinstance(data, dict) or "results" not in data:
+        raise NYTApiError("Unexpected API response format: no 'results' field found.")
+    return data["results"]
+
+
+def fetch_popular(endpoint: str = "viewed", period: int = 1,
+                  api_key: Optional[str] = None, timeout: float = 15,
+                  max_wait: Optional[float] = None) -> List[Dict]:
+    """Fetch one Most Popular list and return the raw 'results' list.
+    Takes the same arguments as request_popular().
+
+    Raises:
+        NYTApiError: On invalid input, missing key, or any HTTP/network error
+    """
+    return read_results(request_popular(endpoint, period, api_key, timeout=timeout, max_wait=max_wait))
+
+# 4. Parsing #################################
+
+def parse_article_dict(article: dict) -> dict:
+    """Parse one raw API article into a flat dictionary.
+    Facets are kept twice: comma-joined strings for tables ('per_facet')
+    and lists for JSON and the store ('per_facet_list').
+    Person names are normalized to 'First Last', and spelling variants of one
+    person are merged into a single canonical name (see nyt_pipeline.names)."""
+    facets = {field: list(article.get(field) or []) for field in FACET_FIELDS}
+    facets["per_facet"] = normalize_people(facets["per_facet"], get_aliases())
+
+    parsed = {
+        "uri": article.get("uri", ""),
+        "title": article.get("title", "N/A"),
+        "published_date": article.get("published_date", "N/A"),
+        "section": article.get("section", "N/A"),
+        "url": article.get("url", "N/A"),
+        "abstract": article.get("abstract", "N/A"),
+    }
+    for field, values in facets.items():
+        parsed[field] = ", ".join(values)        # string version for tables/CSV
+    for field, values in facets.items():
+        parsed[f"{field}_list"] = values         # list version for JSON/store
+    return parsed
+
+
+def parse_article_compact(article: dict, vocab: FacetVocabulary) -> CompactArticle:
+    """Parse one raw API article into a CompactArticle: the same fields as
+    parse_article_dict(), with facets interned into vocab as id arrays
+    (about half the memory of the flat dict for a large batch)."""
+    return CompactArticle(
+        vocab,
+        title=article.get("title", "N/A"),
+        published_date=article.get("published_date", "N/A"),
+        section=article.get("section", "N/A"),
+        url=article.get("url", "N/A"),
+        abstract=article.get("abstract", "N/A"),
+        des=article.get("des_facet") or [],
+        org=article.get("org_facet") or [],
+        per=normalize_people(article.get("per_facet") or [], get_aliases()),
+        geo=article.get("geo_facet") or [],
+    )
+
+
+def print_article(i: int, article: dict):
+    """Print one parsed article to the console."""
+    print(f"{i+1}. {article['title']} ({article['published_date']}) | {article['section']}")
+    print(f"   Descriptors: {article['des_facet']}")
+    print(f"   People: {article['per_facet']}")
+    print(f"   Organizations: {article['org_facet']}")
+    print(f"   Locations: {article['geo_facet']}")
+    print(f"   Abstract: {article['abstract'][:100]}...")  # Truncate for display
+    print(f"   URL: {article['url']}")
+    print("-" * 120)
+
+# 5. Ingestion #################################
+
+def query_nyt_api(num_articles: int = 20, endpoint: str = "viewed", period: int = 1,
+                  api_key: Optional[str] = None, save: bool = True,
+                  store=None, verbose: bool = True) -> List[Dict]:
+    """Fetch a Most Popular list, parse it, and upsert it into the article store.
+
+    Parameters:
+        num_articles: Number of articles to keep (1-20)
+        endpoint / period: Which list to fetch
+        api_key: NYT API key (if None, loads from .env)
+        save: Upsert into the article store (default True)
+        store: ArticleStore to use (default: ArticleStore() at data/articles)
+        verbose: Print each article and a summary
+
+    Returns:
+        List of parsed article dictionaries
+    """
+    results = fetch_popular(endpoint, period, api_key)
+    articles = [parse_article_dict(article) for article in results[:num_articles]]
+
+    if verbose:
+        for i, article in enumerate(articles):
+            print_article(i, article)
+
+    if save:
+        if store is None:
+            from nyt_pipeline.store import ArticleStore  # deferred: pulls in pandas
+            store = ArticleStore()
+        counts = store.upsert(articles)
+        if verbose:
+            print(f"\n✅ Stored {len(articles)} articles in {store.root} "
+                  f"({counts['inserted']} new, {counts['updated']} updated, {counts['unchanged']} unchanged)")
+    return articles
@@ -0,0 +1,127 @@
+# ingest_pipeline.py
+# Pipelined Embedding and Upsert With Bounded Queues
+# Used by RAG.py (ingest_documents)
+# Jimmy
+
+# ingest_documents() used to embed a batch, wait, upsert it, wait, and only
+# then start on the next batch, so the embedding and upsert round trips
+# never overlapped. This module runs the two stages on separate worker
+# threads joined by bounded queues: several embedding requests are in
+# flight at once (under a rate limiter), upserts run while the next
+# batches are being embedded, and a full queue makes the stage before it
+# wait instead of piling up batches in memory.
+
+# 0. Setup #################################
+
+## 0.1 Load Packages ############################
+
+import queue      # for the bounded queues between stages
+import threading  # for the worker threads
+import time       # for throughput timing
+from typing import Any, Callable, Dict, Iterable, Optional, Sized  # for type hints
+
+# 1. Constants #################################
+
+# Concurrent embedding requests and upsert calls
+DEFAULT_EMBED_WORKERS = 4
+DEFAULT_UPSERT_WORKERS = 2
+
+# Marks the end of a queue for one worker
+_DONE = object()
+
+# 2. Pipeline #################################
+
+def run_pipeline(batches: Iterable[Sized], embed: Callable[[Any], Any],
+                 upsert: Callable[[Any, Any], None], embed_workers: int = DEFAULT_EMBED_WORKERS,
+                 upsert_workers: int = DEFAULT_UPSERT_WORKERS,
+                 queue_size: Optional[int] = None) -> Dict[str, float]:
+    """Embed and upsert batches with both stages running concurrently.
+
+    Parameters:
+        batches: Batches to ingest; len(batch) is the number of documents in it
+        embed: embed(batch) -> vectors (called from embedding worker threads)
+        upsert: upsert(batch, vectors) (called from upsert worker threads)
+        embed_workers: Embedding calls in flight at once
+        upsert_workers: Upsert calls in flight at once
+        queue_size: Batches waiting in front of each stage (default: 2 per worker)
+
+    Returns:
+        {"docs", "batches", "seconds", "docs_per_sec", "embed_seconds", "upsert_seconds"}
+        (embed/upsert seconds are summed over workers)
+
+    Raises:
+        The first exception raised by embed or upsert, after all workers stopped
+    """
+    embed_queue = queue.Queue(maxsize=queue_size or 2 * embed_workers)
+    upsert_queue = queue.Queue(maxsize=queue_size or 2 * upsert_workers)
+    failed = threading.Event()
+    errors = []
+    lock = threading.Lock()
+    stats = {"docs": 0, "batches": 0, "embed_seconds": 0.0, "upsert_seconds": 0.0}
+
+    def fail(error: BaseException):
+        with lock:
+            errors.append(error)
+        failed.set()
+
+    def embed_worker():
+        while True:
+            batch = embed_queue.get()
+            if batch is _DONE:
+                return
+            if failed.is_set():
+                continue  # keep draining so the producer never blocks
+            started = time.perf_counter()
+            try:
+                vectors = embed(batch)
+            except BaseException as e:
+                fail(e)
+                continue
+            with lock:
+                stats["embed_seconds"] += time.perf_counter() - started
+            upsert_queue.put((batch, vectors))
+
+    def upsert_worker():
+        while True:
+            item = upsert_queue.get()
+            if item is _DONE:
+                return
+            if failed.is_set():
+                continue
+            batch, vectors = item
+            started = time.perf_counter()
+            try:
+                upsert(batch, vectors)
+            except BaseException as e:
+                fail(e)
+                continue
+            with lock:
+                stats["upsert_seconds"] += time.perf_counter() - started
+                stats["docs"] += len(batch)
+                stats["batches"] += 1
+
+    started = time.perf_counter()
+    embedders = [threading.Thread(target=embed_worker, daemon=True) for _ in range(embed_workers)]
+    upserters = [threading.Thread(target=upsert_worker, daemon=True) for _ in range(upsert_workers)]
+    for thread in embedders + upserters:
+        thread.start()
+    try:
+        for batch in batches:
+            if failed.is_set():
+                break
+            embed_queue.put(batch)  # blocks while the embedders are behind
+    finally:
+        for _ in embedders:
+            embed_queue.put(_DONE)
+        for thread in embedders:
+            thread.join()
+        for _ in upserters:
+            upsert_queue.put(_DONE)
+        for thread in upserters:
+            thread.join()
+    if errors:
+        raise errors[0]
+
+    stats["seconds"] = time.perf_counter() - started
+    stats["docs_per_sec"] = stats["docs"] / stats["seconds"] if stats["seconds"] > 0 else 0.0
+    return stats
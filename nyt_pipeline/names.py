@@ -0,0 +1,205 @@
+# names.py
+# NYT Person Name Normalization and Alias Resolution
+# Shared by query_nyapi.py, RAG.py, and the Shiny app
+# Jimmy
+
+# NYT person facets are written 'Last, First Middle'.
+# For display and search we want 'First Middle Last'.
+# The same few hundred names come back on every poll, so normalization is
+# memoized in a bounded LRU cache and usually costs one dict lookup.
+# The same person can also be spelled several ways ('Trump, Donald J',
+# 'Trump, Donald J.', 'Donald Trump'). PersonAliases maps every variant to
+# one canonical person id and display name, so facet counts and indexes
+# downstream do not split one person into several.
+
+# 0. Setup #################################
+
+## 0.1 Load Packages ############################
+
+import json       # for alias files
+import os         # for the alias file setting
+import re         # for building person ids
+import threading  # for a thread-safe alias table
+from functools import lru_cache  # for memoized normalization
+from typing import Dict, Iterable, List, Mapping, Optional, Tuple  # for type hints
+
+# 1. Constants #################################
+
+# Distinct names kept in each LRU cache (override with NYT_NAME_CACHE_SIZE)
+NAME_CACHE_SIZE = int(os.getenv("NYT_NAME_CACHE_SIZE", "8192"))
+
+# Example alias file; copy it and point NYT_PERSON_ALIASES at your copy.
+# Variants that only differ in case, periods, or spacing match automatically
+# and do not need an entry.
+EXAMPLE_ALIASES_FILE = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                                    "data", "person_aliases.example.json")
+
+# Life dates the NYT adds to some names, e.g. 'Epstein, Jeffrey E (1953- )'
+_LIFE_DATES = re.compile(r"\(\s*\d{4}\s*-\s*(\d{4})?\s*\)")
+
+# Name suffixes that belong after the last name
+_SUFFIXES = {"jr", "sr", "ii", "iii", "iv"}
+
+# 2. Normalization #################################
+
+@lru_cache(maxsize=NAME_CACHE_SIZE)
+def _normalize(name: str) -> str:
+    """Cached core of normalize_nyt_person() for string input."""
+    name = name.strip()  # remove redundant spaces
+
+    # If there's no comma, assume it's already in display order
+    if "," not in name:
+        return " ".join(name.split())  # split words and join them with a space
+
+    # Split only on the first comma
+    last, rest = name.split(",", 1)
+    last = last.strip()
+    rest = rest.strip()
+
+    # Suffixes that sit with the last name already work:
+    # "King Jr., Martin Luther" -> "Martin Luther" + "King Jr."
+    display = f"{rest} {last}".strip()
+
+    # Normalize whitespace
+    return " ".join(display.split())
+
+
+def normalize_nyt_person(name: str) -> str:
+    """Convert NYT person facet from 'Last, First Middle' to 'First Middle Last'.
+    Keeps suffixes reasonably well (e.g., 'King Jr., Martin Luther' -> 'Martin Luther King Jr.').
+    Results are memoized, so repeated names cost one cache lookup."""
+    if not name or not isinstance(name, str):
+        return name
+    return _normalize(name)
+
+
+@lru_cache(maxsize=NAME_CACHE_SIZE)
+def canonical_form(name: str) -> str:
+    """Display name with the NYT's extras tidied up: life dates are dropped and
+    a trailing suffix moves after the last name. Periods are kept, like
+    normalize_nyt_person(); person_id() ignores them when matching.
+    'Kennedy, Robert F. Jr.' -> 'Robert F. Kennedy Jr.'; 'Farage, Nigel (1964- )' -> 'Nigel Farage'."""
+    name = _LIFE_DATES.sub(" ", name)
+    if "," not in name:
+        return _normalize(name)
+    last, rest = (part.split() for part in name.split(",", 1))
+    if rest and rest[-1].lower().rstrip(".") in _SUFFIXES:
+        last = last + [rest.pop()]
+    return " ".join(rest + last)
+
+
+@lru_cache(maxsize=NAME_CACHE_SIZE)
+def person_id(name: str) -> str:
+    """Stable id for a person name: canonical form, lowercase, no periods or
+    other punctuation, words joined by '-'. This is the matching key, so
+    'Trump, Donald J.' and 'Donald J Trump' -> 'donald-j-trump'."""
+    return "-".join(re.findall(r"\w+", canonical_form(name).lower().replace("'", "")))
+
+
+def normalize_people(names: Iterable[str], aliases: Optional["PersonAliases"] = None) -> List[str]:
+    """Normalize a batch of person facets to canonical display names, keeping
+    order and dropping duplicates (two spellings of one person in the same
+    article count once). With aliases, known variants map to their canonical name."""
+    out = {}
+    for name in names:
+        if not name or not isinstance(name, str):
+            continue
+        display = aliases.canonical(name) if aliases is not None else canonical_form(name)
+        out.setdefault(person_id(display), display)
+    return list(out.values())
+
+
+def cache_info() -> Dict[str, Tuple]:
+    """LRU statistics (hits, misses, maxsize, currsize) for the name caches."""
+    return {"normalize": tuple(_normalize.cache_info()),
+            "canonical_form": tuple(canonical_form.cache_info()),
+            "person_id": tuple(person_id.cache_info())}
+
+# 3. Alias Table #################################
+
+class PersonAliases:
+    """Maps person name variants to one canonical person.
+
+    Parameters:
+        aliases: {variant: canonical display name}; variants may be in
+            'Last, First' or display order
+    """
+
+    def __init__(self, aliases: Optional[Mapping[str, str]] = None):
+        self._lock = threading.Lock()
+        self._aliases = {}    # person_id of a variant -> display name it was added with
+        self._spellings = {}  # person_id of a canonical name -> its display spelling
+        self._resolved = {}   # name -> canonical display name (cleared by add)
+        for variant, canonical in (aliases or {}).items():
+            self.add(variant, canonical)
+
+    def add(self, variant: str, canonical: str):
+        """Record that `variant` is the same person as `canonical`.
+        Chains are resolved at lookup time, so after A -> B and B -> C
+        (added in either order) A maps to C."""
+        display = canonical_form(canonical)
+        with self._lock:
+            self._aliases[person_id(variant)] = display
+            self._spellings.setdefault(person_id(display), display)
+            self._resolved.clear()
+
+    def resolve(self, name: str) -> Tuple[str, str]:
+        """Return (person_id, display name) of the canonical person for name.
+        Unknown names are their own canonical person."""
+        display = self.canonical(name)
+        return person_id(display), display
+
+    def canonical(self, name: str) -> str:
+        """Canonical display name for any variant (one dict lookup once cached).
+        A name without an alias displays as its canonical_form(), or as the
+        spelling given in the table when only periods or case differ."""
+        display = self._resolved.get(name)
+        if display is None:
+            display = self._follow(name)
+            self._resolved[name] = display
+        return display
+
+    def _follow(self, name: str) -> str:
+        """Walk the alias chain from name to its last target (stops on cycles)."""
+        display = canonical_form(name)
+        key, seen = person_id(display), set()
+        while key in self._aliases and key not in seen:
+            seen.add(key)
+            display = self._aliases[key]
+            key = person_id(display)
+        return self._spellings.get(key, display)
+
+    def person_id(self, name: str) -> str:
+        """Canonical person id for any variant."""
+        return person_id(self.canonical(name))
+
+    def variants(self) -> Dict[str, str]:
+        """Copy of the table: {variant person_id: canonical display name}."""
+        with self._lock:
+            table = dict(self._aliases)
+        return {key: self._follow(target) for key, target in table.items()}
+
+    @classmethod
+    def from_file(cls, path: str) -> "PersonAliases":
+        """Load a JSON file of {variant: canonical} (see EXAMPLE_ALIASES_FILE)."""
+        with open(path, encoding="utf-8") as f:
+            return cls(json.load(f))
+
+    def __len__(self) -> int:
+        return len(self._aliases)
+
+# 4. Shared Alias Table #################################
+
+_default_aliases = None
+_default_lock = threading.Lock()
+
+
+def get_aliases() -> PersonAliases:
+    """Process-wide alias table from the JSON file named by NYT_PERSON_ALIASES
+    (empty if unset). Built on first use."""
+    global _default_aliases
+    with _default_lock:
+        if _default_aliases is None:
+            path = os.getenv("NYT_PERSON_ALIASES")
+            _default_aliases = PersonAliases.from_file(path) if path else PersonAliases()
+        return _default_aliases
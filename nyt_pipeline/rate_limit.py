@@ -0,0 +1,222 @@
+# rate_limit.py
+# Token-Bucket Rate Limiter for NYT API Calls
+# Used by nyt_api.fetch_articles and query_nyapi.py
+# Jimmy
+
+# The NYT APIs allow about 5 requests per minute and 500 per day per key.
+# Going over returns HTTP 429, and retrying right away only makes it worse.
+# This module gives each API key a token bucket per quota: callers wait in
+# line for a token instead of failing, and a 429 pauses the whole key for
+# the Retry-After time (or a jittered exponential backoff if none is given).
+# Queue depth and wait times are tracked so polling cadence can be tuned.
+
+# 0. Setup #################################
+
+## 0.1 Load Packages ############################
+
+import os         # for quota settings from the environment
+import random     # for backoff jitter
+import threading  # for locks shared by all callers
+import time       # for monotonic clocks and sleeping
+from email.utils import parsedate_to_datetime  # for HTTP-date Retry-After values
+from datetime import datetime, timezone  # for HTTP-date Retry-After values
+from typing import Callable, Dict, List, Optional, Tuple  # for type hints
+
+# 1. Constants #################################
+
+# NYT published quotas (override with NYT_RATE_PER_MINUTE / NYT_RATE_PER_DAY)
+DEFAULT_PER_MINUTE = 5
+DEFAULT_PER_DAY = 500
+
+# Longest a request waits in line for a token before giving up, in seconds
+# (override with NYT_RATE_MAX_WAIT). At 5 per minute a batch of more than
+# about 7 requests cannot finish inside it; batch callers size their wait
+# with RateLimiter.time_for() instead (see fetch_all_snapshots in nyt_api.py).
+DEFAULT_MAX_WAIT = 30.0
+
+# Backoff settings for 429 replies without a usable Retry-After header
+BACKOFF_BASE = 2.0   # seconds for the first retry
+BACKOFF_CAP = 60.0   # never wait longer than this between retries
+
+# 2. Backoff Helpers #################################
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """Convert a Retry-After header to seconds.
+    Accepts delta-seconds ('30') or an HTTP date; returns None if missing or invalid."""
+    if not value:
+        return None
+    value = value.strip()
+    if value.isdigit():
+        return float(value)
+    try:
+        when = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if when.tzinfo is None:
+        when = when.replace(tzinfo=timezone.utc)
+    return max(0.0, (when - datetime.now(timezone.utc)).total_seconds())
+
+
+def backoff_delay(attempt: int, retry_after: Optional[float] = None,
+                  base: float = BACKOFF_BASE, cap: float = BACKOFF_CAP) -> float:
+    """Seconds to wait before retry number `attempt` (starting at 0).
+    Honours retry_after when the server sent one (plus a little jitter so
+    waiting callers do not all fire at once); otherwise uses "full jitter"
+    exponential backoff: a random wait between 0 and min(cap, base * 2^attempt)."""
+    if retry_after is not None:
+        return retry_after + random.uniform(0, base)
+    return random.uniform(0, min(cap, base * (2 ** attempt)))
+
+# 3. Token Bucket #################################
+
+class TokenBucket:
+    """Classic token bucket: holds up to `capacity` tokens, refilled at
+    `capacity / period` tokens per second. One request spends one token."""
+
+    def __init__(self, capacity: float, period: float):
+        self.capacity = capacity
+        self.rate = capacity / period
+        self.tokens = capacity
+        self.updated = time.monotonic()
+
+    def _refill(self, now: float):
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def wait_time(self, now: float, count: float = 1) -> float:
+        """Seconds until `count` tokens are available (0 if available now)."""
+        self._refill(now)
+        return 0.0 if self.tokens >= count else (count - self.tokens) / self.rate
+
+    def take(self):
+        self.tokens -= 1
+
+# 4. Rate Limiter #################################
+
+class RateLimiter:
+    """Rate limiter for one API key, combining several token buckets.
+
+    Parameters:
+        limits: List of (requests, seconds) quotas, e.g. [(5, 60), (500, 86400)]
+    """
+
+    def __init__(self, limits: List[Tuple[float, float]]):
+        self._buckets = [TokenBucket(n, seconds) for n, seconds in limits]
+        self._cond = threading.Condition()
+        self._paused_until = 0.0  # set by a 429 reply
+        self._metrics = {"acquired": 0, "waited": 0, "total_wait_s": 0.0,
+                         "max_wait_s": 0.0, "queue_depth": 0, "max_queue_depth": 0,
+                         "throttled": 0}
+
+    def acquire(self, timeout: Optional[float] = None) -> float:
+        """Block until a request may be sent, then spend a token in every bucket.
+        Returns the seconds waited. Raises TimeoutError if timeout runs out first."""
+        started = time.monotonic()
+        deadline = None if timeout is None else started + timeout
+        with self._cond:
+            self._metrics["queue_depth"] += 1
+            self._metrics["max_queue_depth"] = max(self._metrics["max_queue_depth"],
+                                                   self._metrics["queue_depth"])
+            try:
+                while True:
+                    now = time.monotonic()
+                    wait = max([self._paused_until - now] + [b.wait_time(now) for b in self._buckets])
+                    if wait <= 0:
+                        break
+                    if deadline is not None:
+                        if now >= deadline:
+                            raise TimeoutError("Timed out waiting for an NYT API rate-limit slot.")
+                        wait = min(wait, deadline - now)
+                    self._cond.wait(wait)
+                for bucket in self._buckets:
+                    bucket.take()
+            finally:
+                self._metrics["queue_depth"] -= 1
+
+            waited = time.monotonic() - started
+            self._metrics["acquired"] += 1
+            if waited > 0.001:
+                self._metrics["waited"] += 1
+            self._metrics["total_wait_s"] += waited
+            self._metrics["max_wait_s"] = max(self._metrics["max_wait_s"], waited)
+        return waited
+
+    def time_for(self, count: int) -> float:
+        """Seconds until `count` more requests could all have been sent, given
+        the tokens left now (e.g. 9 requests at 5 per minute from a full bucket: 48 s)."""
+        with self._cond:
+            now = time.monotonic()
+            return max([0.0, self._paused_until - now] + [b.wait_time(now, count) for b in self._buckets])
+
+    def pause(self, seconds: float):
+        """Hold every caller for this key for `seconds` (after an HTTP 429)."""
+        with self._cond:
+            self._metrics["throttled"] += 1
+            self._paused_until = max(self._paused_until, time.monotonic() + seconds)
+            self._cond.notify_all()
+
+    def metrics(self) -> Dict[str, float]:
+        """Counters plus the mean wait: acquired, waited, total/max/mean wait seconds,
+        current and max queue depth, and how many 429 pauses happened."""
+        with self._cond:
+            metrics = dict(self._metrics)
+        metrics["mean_wait_s"] = metrics["total_wait_s"] / metrics["acquired"] if metrics["acquired"] else 0.0
+        return metrics
+
+# 5. Shared Registry #################################
+
+# One limiter per API key for the whole process
+_limiters = {}
+_registry_lock = threading.Lock()
+
+
+def default_limits() -> List[Tuple[float, float]]:
+    """Quotas from NYT_RATE_PER_MINUTE / NYT_RATE_PER_DAY (defaults: 5 per minute, 500 per day)."""
+    per_minute = float(os.getenv("NYT_RATE_PER_MINUTE", DEFAULT_PER_MINUTE))
+    per_day = float(os.getenv("NYT_RATE_PER_DAY", DEFAULT_PER_DAY))
+    return [(per_minute, 60.0), (per_day, 86400.0)]
+
+
+def default_max_wait() -> float:
+    """Longest wait for one token, from NYT_RATE_MAX_WAIT (default 30 s)."""
+    return float(os.getenv("NYT_RATE_MAX_WAIT", DEFAULT_MAX_WAIT))
+
+
+def get_limiter(api_key: str, limits: Optional[List[Tuple[float, float]]] = None) -> RateLimiter:
+    """Return the shared limiter for api_key, creating it on first use.
+    limits only applies when the limiter is first created."""
+    with _registry_lock:
+        limiter = _limiters.get(api_key)
+        if limiter is None:
+            limiter = RateLimiter(limits or default_limits())
+            _limiters[api_key] = limiter
+        return limiter
+
+
+def all_metrics() -> Dict[str, Dict[str, float]]:
+    """Metrics for every key, labelled by the last 4 characters so keys are not leaked."""
+    with _registry_lock:
+        items = list(_limiters.items())
+    return {f"...{key[-4:]}": limiter.metrics() for key, limiter in items}
+
+# 6. Retry Wrapper #################################
+
+def send_with_retry(send: Callable[[], "requests.Response"], api_key: str,
+                    max_retries: int = 3, max_wait: Optional[float] = None):
+    """Call send() (which performs one HTTP request) under the key's rate limiter.
+    On HTTP 429 the key is paused for Retry-After (or a jittered backoff)
+    and the request is retried, up to max_retries times.
+    Each attempt waits at most max_wait seconds for a token (default
+    NYT_RATE_MAX_WAIT, 30 s); TimeoutError is raised when that runs out.
+    Returns the last response, which is still a 429 if every retry was throttled."""
+    if max_wait is None:
+        max_wait = default_max_wait()
+    limiter = get_limiter(api_key)
+    for attempt in range(max_retries + 1):
+        limiter.acquire(timeout=max_wait)
+        response = send()
+        if response.status_code != 429 or attempt == max_retries:
+            return response
+        retry_after = parse_retry_after(response.headers.get("Retry-After"))
+        limiter.pause(backoff_delay(attempt, retry_after))
+    return response
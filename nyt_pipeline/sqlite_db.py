@@ -0,0 +1,39 @@
+# sqlite_db.py
+# Shared SQLite Connection Helpers
+# Used by embeddings.py, vector_manifest.py, and the Shiny app's rank_poller.py and shared_cache.py
+# Jimmy
+
+# Several modules keep small SQLite files (the embedding cache, the vector
+# manifest, the rank event log, the cross-worker cache). They all open a
+# connection per operation, so threads and processes never share one, and
+# commit or roll back when the block ends. This module holds that pattern once.
+
+# 0. Setup #################################
+
+## 0.1 Load Packages ############################
+
+import sqlite3  # for the database files
+from contextlib import contextmanager  # for open-commit-close connections
+from typing import Iterator, Optional  # for type hints
+
+# 1. Connections #################################
+
+@contextmanager
+def sqlite_connection(path: str, timeout: float = 10,
+                      synchronous: Optional[str] = None) -> Iterator[sqlite3.Connection]:
+    """Open a connection to path, commit on success (roll back on error), and always close it.
+
+    Parameters:
+        path: SQLite file
+        timeout: Seconds to wait for another writer's lock
+        synchronous: PRAGMA synchronous value, e.g. 'NORMAL' (safe with WAL, much faster commits)
+    """
+    conn = sqlite3.connect(path, timeout=timeout)
+    if synchronous:
+        conn.execute(f"PRAGMA synchronous={synchronous}")
+    try:
+        with conn:
+            yield conn
+    finally:
+        conn.close()
+
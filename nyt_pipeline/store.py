@@ -0,0 +1,398 @@
+# store.py
+# Append-Only, Date-Partitioned Article Store
+# Replaces the timestamped nyt_articles_<timestamp>.csv dumps
+# Jimmy
+
+# This module keeps every article we have ever ingested in one folder,
+# split into one file per published_date. New batches are upserted by URL,
+# so polling the API again only rewrites the few days that changed.
+# Facets are stored as real lists, and files are Parquet when pyarrow is
+# installed (fast columnar reads), falling back to JSON Lines otherwise.
+# pandas is only imported by the functions that read or write Parquet/DataFrames.
+
+# 0. Setup #################################
+
+## 0.1 Load Packages ############################
+
+import os        # for paths and atomic file replacement
+import glob      # for finding partition files
+import json      # for the JSON Lines fallback format
+import math      # for spotting NaN cells from CSV files
+from contextlib import contextmanager  # for the cross-process write lock
+from datetime import datetime, timezone  # for first_seen / last_seen stamps
+from typing import TYPE_CHECKING, Dict, Iterable, Iterator, List, Optional  # for type hints
+
+from nyt_pipeline.env import PROJECT_ROOT  # to anchor the default store folder
+
+if TYPE_CHECKING:
+    import pandas as pd  # type hints only; imported lazily at runtime
+
+# 1. Constants #################################
+
+# Default location of the store, in the data folder at the project root
+DEFAULT_STORE_DIR = os.path.join(PROJECT_ROOT, "data", "articles")
+
+# Facet fields kept as native lists
+FACET_FIELDS = ["des_facet", "org_facet", "per_facet", "geo_facet"]
+
+# Column order for every partition file
+COLUMNS = ["url", "uri", "title", "published_date", "section", "abstract",
+           *FACET_FIELDS, "first_seen", "last_seen"]
+
+# Partition name used when an article has no usable published_date
+UNKNOWN_DATE = "unknown"
+
+# File in the store root mapping each URL to the partition that holds it, so an
+# article whose published_date changes is moved instead of stored twice
+URL_INDEX_FILE = "url_index.json"
+
+# File in the store root recording the format chosen when the store was created
+STORE_INFO_FILE = "store.json"
+
+# Supported partition formats
+FORMATS = ["parquet", "jsonl"]
+
+# 2. Helpers #################################
+
+def _parquet_available() -> bool:
+    """Return True if pyarrow is installed, so Parquet files can be written."""
+    try:
+        import pyarrow  # noqa: F401
+        return True
+    except ImportError:
+        return False
+
+
+def _facet_list(article: dict, field: str) -> List[str]:
+    """Return a facet as a list, whichever shape the article dict uses.
+    Prefers the '<field>_list' key from parse_article(), then a list under
+    '<field>' (raw API shape), then splits a comma-joined string (old CSVs).
+    Splitting is lossy for names that contain commas, so it is a last resort."""
+    value = article.get(f"{field}_list")
+    if value is None:
+        value = article.get(field)
+    if value is None or (isinstance(value, float) and math.isnan(value)):
+        return []
+    if isinstance(value, str):
+        return [part.strip() for part in value.split(",") if part.strip()]
+    return [str(v) for v in value]
+
+
+def to_record(article: dict) -> dict:
+    """Convert a parsed article (or raw API article, or CSV row) to a store record."""
+    published = article.get("published_date") or UNKNOWN_DATE
+    if not isinstance(published, str) or published == "N/A":
+        published = UNKNOWN_DATE
+    record = {
+        "url": article.get("url"),
+        "uri": article.get("uri") or "",
+        "title": article.get("title") or "",
+        "published_date": published[:10],  # keep YYYY-MM-DD only
+        "section": article.get("section") or "",
+        "abstract": article.get("abstract") or "",
+    }
+    for field in FACET_FIELDS:
+        record[field] = _facet_list(article, field)
+    return record
+
+@contextmanager
+def _file_lock(path: str):
+    """Hold an exclusive OS lock on path, so several processes (e.g. app
+    workers) can upsert into one store without losing each other's rows."""
+    with open(path, "a+b") as handle:
+        if os.name == "nt":
+            import msvcrt
+            handle.seek(0)
+            msvcrt.locking(handle.fileno(), msvcrt.LK_LOCK, 1)
+            try:
+                yield
+            finally:
+                handle.seek(0)
+                msvcrt.locking(handle.fileno(), msvcrt.LK_UNLCK, 1)
+        else:
+            import fcntl
+            fcntl.flock(handle, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(handle, fcntl.LOCK_UN)
+
+# 3. Article Store #################################
+
+class ArticleStore:
+    """Article store partitioned by published_date and keyed by NYT URL.
+
+    The format is fixed when the store is created (recorded in store.json),
+    so one folder never holds Parquet and JSON Lines copies of the same URL.
+
+    Parameters:
+        root: Folder holding the partition files
+        fmt: 'parquet' or 'jsonl' (default: the store's recorded format; for a
+            new store, parquet if pyarrow is installed)
+
+    Raises:
+        ValueError: If fmt is invalid or differs from the store's format
+        ImportError: If the store is Parquet and pyarrow is not installed
+    """
+
+    def __init__(self, root: str = DEFAULT_STORE_DIR, fmt: Optional[str] = None):
+        if fmt is not None and fmt not in FORMATS:
+            raise ValueError(f"Invalid format '{fmt}'. Choose from: {FORMATS}")
+        self.root = root
+        os.makedirs(root, exist_ok=True)
+        with _file_lock(os.path.join(root, ".lock")):
+            existing = self._recorded_format()
+            if existing is None:
+                existing = fmt or ("parquet" if _parquet_available() else "jsonl")
+                info_path = os.path.join(root, STORE_INFO_FILE)
+                with open(info_path + ".tmp", "w", encoding="utf-8") as f:
+                    json.dump({"format": existing}, f)
+                os.replace(info_path + ".tmp", info_path)
+        if fmt is not None and fmt != existing:
+            raise ValueError(f"The store at {root} holds {existing} files; "
+                             f"open it with fmt='{existing}' (or leave fmt unset).")
+        if existing == "parquet" and not _parquet_available():
+            raise ImportError(f"The store at {root} holds Parquet files. Install pyarrow to use it.")
+        self.fmt = existing
+
+    def _recorded_format(self) -> Optional[str]:
+        """Format from store.json, or from the partition files of a store written
+        before store.json existed (None for a new, empty store)."""
+        info_path = os.path.join(self.root, STORE_INFO_FILE)
+        if os.path.exists(info_path):
+            with open(info_path, "r", encoding="utf-8") as f:
+                return json.load(f)["format"]
+        found = [fmt for fmt in FORMATS
+                 if glob.glob(os.path.join(self.root, "published_date=*", f"part.{fmt}"))]
+        if len(found) > 1:
+            raise ValueError(f"The store at {self.root} holds both Parquet and JSON Lines files. "
+                             f"Export one format and remove the other before using it.")
+        return found[0] if found else None
+
+    ## 3.1 Partition Files ############################
+
+    def _partition_path(self, published_date: str) -> str:
+        """Path of the file holding one day of articles (Hive-style folder name)."""
+        return os.path.join(self.root, f"published_date={published_date}", f"part.{self.fmt}")
+
+    def partitions(self) -> List[str]:
+        """Return the sorted list of published dates that have a partition file."""
+        pattern = os.path.join(self.root, "published_date=*", f"part.{self.fmt}")
+        dates = [os.path.basename(os.path.dirname(p)).split("=", 1)[1] for p in glob.glob(pattern)]
+        return sorted(dates)
+
+    def _read_partition(self, published_date: str) -> List[dict]:
+        """Load one partition as a list of record dicts (empty if missing)."""
+        path = self._partition_path(published_date)
+        if not os.path.exists(path):
+            return []
+        if self.fmt == "parquet":
+            import pandas as pd
+            df = pd.read_parquet(path)
+            records = df.to_dict("records")
+            # Parquet hands lists back as arrays; turn them into plain lists
+            for record in records:
+                for field in FACET_FIELDS:
+                    record[field] = list(record[field]) if record[field] is not None else []
+            return records
+        with open(path, "r", encoding="utf-8") as f:
+            return [json.loads(line) for line in f if line.strip()]
+
+    def _write_partition(self, published_date: str, records: List[dict]):
+        """Write one partition atomically (temp file, then rename)."""
+        path = self._partition_path(published_date)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = path + ".tmp"
+        records = sorted(records, key=lambda r: r["url"])
+        if self.fmt == "parquet":
+            import pandas as pd
+            pd.DataFrame(records, columns=COLUMNS).to_parquet(tmp_path, index=False)
+        else:
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                for record in records:
+                    f.write(json.dumps(record, ensure_ascii=False) + "\n")
+        os.replace(tmp_path, path)
+
+    def _remove_partition(self, published_date: str):
+        """Delete a partition that no longer holds any article."""
+        path = self._partition_path(published_date)
+        if os.path.exists(path):
+            os.remove(path)
+        try:
+            os.rmdir(os.path.dirname(path))
+        except OSError:
+            pass  # folder not empty or already gone
+
+    ## 3.2 URL Index ############################
+
+    def _load_url_index(self) -> Dict[str, str]:
+        """{url: published_date partition} (caller holds the store lock).
+        Built from the partitions the first time, e.g. for stores written
+        before the index existed."""
+        path = os.path.join(self.root, URL_INDEX_FILE)
+        if not os.path.exists(path):
+            return self._rebuild_url_index()
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+
+    def _write_url_index(self, index: Dict[str, str]):
+        path = os.path.join(self.root, URL_INDEX_FILE)
+        with open(path + ".tmp", "w", encoding="utf-8") as f:
+            json.dump(index, f, ensure_ascii=False)
+        os.replace(path + ".tmp", path)
+
+    def _rebuild_url_index(self) -> Dict[str, str]:
+        """Scan every partition for the URL index. A URL found under several
+        dates (left behind by older versions) keeps only its most recently
+        seen copy; the other copies are deleted."""
+        newest = {}  # url -> (last_seen, published_date)
+        for published_date in self.partitions():
+            for record in self._read_partition(published_date):
+                key = (record.get("last_seen") or "", published_date)
+                if record["url"] not in newest or key > newest[record["url"]]:
+                    newest[record["url"]] = key
+        index = {url: published_date for url, (_, published_date) in newest.items()}
+        for published_date in self.partitions():
+            records = self._read_partition(published_date)
+            keep = [r for r in records if index[r["url"]] == published_date]
+            if len(keep) < len(records):
+                if keep:
+                    self._write_partition(published_date, keep)
+                else:
+                    self._remove_partition(published_date)
+        self._write_url_index(index)
+        return index
+
+    ## 3.3 Writing ############################
+
+    def upsert(self, articles: Iterable[dict]) -> Dict[str, int]:
+        """Insert new articles and update existing ones, matched by URL.
+        Only the partitions for dates present in this batch are rewritten, plus
+        the old partition of any article whose published_date changed.
+        Safe to call from several processes at once (a lock file serializes writers).
+        Returns counts of 'inserted', 'updated', and 'unchanged' articles."""
+        now = datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")
+
+        # Group the incoming batch by partition (later duplicates of a URL win)
+        by_url = {}
+        for article in articles:
+            record = to_record(article)
+            if not record["url"] or record["url"] == "N/A":
+                continue
+            by_url[record["url"]] = record
+        batch = {}
+        for url, record in by_url.items():
+            batch.setdefault(record["published_date"], {})[url] = record
+
+        counts = {"inserted": 0, "updated": 0, "unchanged": 0}
+        with _file_lock(os.path.join(self.root, ".lock")):
+            self._merge(batch, counts, now)
+        return counts
+
+    def _merge(self, batch: Dict[str, Dict[str, dict]], counts: Dict[str, int], now: str):
+        """Read-modify-write each partition in batch (caller holds the store lock).
+        An article whose published_date changed is moved out of its old partition."""
+        index = self._load_url_index()
+        moved = {}  # old partition -> urls leaving it
+        for published_date, incoming in batch.items():
+            for url in incoming:
+                old_date = index.get(url)
+                if old_date is not None and old_date != published_date:
+                    moved.setdefault(old_date, set()).add(url)
+        carried = {}  # url -> record taken out of its old partition (keeps first_seen)
+        for old_date, urls in moved.items():
+            keep = []
+            for record in self._read_partition(old_date):
+                if record["url"] in urls:
+                    carried[record["url"]] = record
+                else:
+                    keep.append(record)
+            if keep:
+                self._write_partition(old_date, keep)
+            else:
+                self._remove_partition(old_date)
+
+        for published_date, incoming in batch.items():
+            existing = {r["url"]: r for r in self._read_partition(published_date)}
+            for url, record in incoming.items():
+                index[url] = published_date
+                old = existing.get(url) or carried.get(url)
+                if old is None:
+                    record["first_seen"] = now
+                    record["last_seen"] = now
+                    existing[url] = record
+                    counts["inserted"] += 1
+                    continue
+                # Keep first_seen; refresh content and last_seen
+                changed = any(old.get(col) != record[col] for col in record)
+                record["first_seen"] = old.get("first_seen", now)
+                record["last_seen"] = now
+                existing[url] = record
+                counts["updated" if changed else "unchanged"] += 1
+            self._write_partition(published_date, list(existing.values()))
+        self._write_url_index(index)
+
+    ## 3.4 Reading ############################
+
+    def read(self, start_date: Optional[str] = None, end_date: Optional[str] = None,
+             columns: Optional[List[str]] = None) -> "pd.DataFrame":
+        """Read articles published between start_date and end_date (inclusive, 'YYYY-MM-DD').
+        Only the matching partition files are opened. With Parquet, passing
+        columns reads just those columns from disk."""
+        import pandas as pd
+        dates = [d for d in self.partitions()
+                 if d != UNKNOWN_DATE
+                 and (start_date is None or d >= start_date)
+                 and (end_date is None or d <= end_date)]
+        if start_date is None and end_date is None and UNKNOWN_DATE in self.partitions():
+            dates.append(UNKNOWN_DATE)
+        if not dates:
+            return pd.DataFrame(columns=columns or COLUMNS)
+
+        paths = [self._partition_path(d) for d in dates]
+        if self.fmt == "parquet":
+            frames = [pd.read_parquet(p, columns=columns) for p in paths]
+        else:
+            frames = [pd.read_json(p, lines=True, dtype=False) for p in paths]
+            if columns:
+                frames = [f[columns] for f in frames]
+        return pd.concat(frames, ignore_index=True)
+
+    def iter_records(self, start_date: Optional[str] = None,
+                     end_date: Optional[str] = None) -> Iterator[dict]:
+        """Yield stored records one partition at a time (oldest date first),
+        so exports of the whole history never hold more than one day in memory."""
+        for published_date in self.partitions():
+            if published_date != UNKNOWN_DATE:
+                if start_date is not None and published_date < start_date:
+                    continue
+                if end_date is not None and published_date > end_date:
+                    continue
+            elif start_date is not None or end_date is not None:
+                continue
+            yield from self._read_partition(published_date)
+
+    def __len__(self) -> int:
+        """Total number of stored articles."""
+        return sum(len(self._read_partition(d)) for d in self.partitions())
+
+# 4. Migration From CSV Dumps #################################
+
+def import_csv(paths: Iterable[str], store: Optional[ArticleStore] = None) -> Dict[str, int]:
+    """Load old nyt_articles_<timestamp>.csv files into the store.
+    Files are read oldest first so the newest copy of each article wins.
+    Person names are mapped to their canonical spelling (see nyt_pipeline.names)."""
+    import pandas as pd
+    if store is None:
+        store = ArticleStore()
+    totals = {"inserted": 0, "updated": 0, "unchanged": 0}
+    from nyt_pipeline.names import get_aliases, normalize_people
+    aliases = get_aliases()
+    for path in sorted(paths):
+        rows = pd.read_csv(path).to_dict("records")
+        # Old dumps predate alias resolution: merge person spelling variants on the way in
+        for row in rows:
+            row["per_facet_list"] = normalize_people(_facet_list(row, "per_facet"), aliases)
+        for key, value in store.upsert(rows).items():
+            totals[key] += value
+    return totals
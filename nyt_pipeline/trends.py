@@ -0,0 +1,222 @@
+# trends.py
+# Incremental Facet Trends and Co-occurrence
+# Backs the trend dashboard described in query_nyapi.py
+# Jimmy
+
+# The dashboard needs "who is trending this week" and "which people show up
+# with which organizations". Recomputing that from every stored article on
+# each refresh gets slower as history grows. This module keeps per-day counts
+# for each facet value, two rolling window totals (this window and the one
+# before it), and a sparse co-occurrence table. Each new batch only touches
+# the counts it changes, so queries never rescan history.
+
+# 0. Setup #################################
+
+## 0.1 Load Packages ############################
+
+import threading  # for a thread-safe engine
+from collections import Counter, defaultdict  # for sparse counts
+from datetime import date, timedelta  # for day arithmetic
+from typing import Dict, Iterable, List, Mapping, Optional, Tuple  # for type hints
+
+from nyt_pipeline.facets import FACET_KINDS, facet_values  # 'des', 'org', 'per', 'geo'
+
+# A facet term is a (kind, value) pair, e.g. ("per", "Donald J. Trump")
+Term = Tuple[str, str]
+
+# Default facet kind pairs tracked in the co-occurrence table
+DEFAULT_COOCCURRENCE_PAIRS = [("per", "org"), ("per", "per"), ("per", "geo"), ("org", "geo")]
+
+# 1. Helpers #################################
+
+def _parse_day(value) -> Optional[date]:
+    """Turn 'YYYY-MM-DD' (or a longer timestamp) into a date; None if invalid."""
+    if isinstance(value, date):
+        return value
+    try:
+        return date.fromisoformat(str(value)[:10])
+    except ValueError:
+        return None
+
+
+def _add_counts(target: Counter, counts: Mapping, sign: int = 1):
+    """Add (or subtract, with sign=-1) counts into target, dropping zeros."""
+    for term, n in counts.items():
+        new_value = target.get(term, 0) + sign * n
+        if new_value:
+            target[term] = new_value
+        else:
+            target.pop(term, None)
+
+# 2. Trend Engine #################################
+
+class FacetTrends:
+    """Rolling facet counts by published day plus a sparse co-occurrence table.
+
+    Parameters:
+        window_days: Length of the comparison window (default 7: last 7 days vs. the 7 before)
+        cooccurrence_pairs: Facet kind pairs to count together, e.g. [("per", "org")]
+    """
+
+    def __init__(self, window_days: int = 7,
+                 cooccurrence_pairs: Iterable[Tuple[str, str]] = DEFAULT_COOCCURRENCE_PAIRS):
+        self.window_days = window_days
+        self.cooccurrence_pairs = list(cooccurrence_pairs)
+        self._lock = threading.Lock()
+        self._seen_urls = set()            # each article is counted once
+        self._daily = defaultdict(Counter) # day -> Counter of terms
+        self._as_of = None                 # latest published day seen
+        self._current = Counter()          # totals for (as_of - window, as_of]
+        self._previous = Counter()         # totals for the window before that
+        self._cooccurrence = defaultdict(Counter)  # term -> Counter of co-occurring terms
+
+    ## 2.1 Window Bookkeeping ############################
+
+    def _window_of(self, day: date) -> Optional[Counter]:
+        """Return the rolling total that day belongs to, or None if it is older."""
+        age = (self._as_of - day).days
+        if 0 <= age < self.window_days:
+            return self._current
+        if self.window_days <= age < 2 * self.window_days:
+            return self._previous
+        return None
+
+    def _advance_to(self, new_day: date):
+        """Slide both windows forward so they end on new_day.
+        Each step moves one day from current to previous and drops one day
+        from previous, so the cost depends on the window, not on history."""
+        if self._as_of is None:
+            self._as_of = new_day
+            return
+        steps = (new_day - self._as_of).days
+        if steps <= 0:
+            return
+        if steps >= 2 * self.window_days:
+            # Jumped past both windows: rebuild them from at most 2 x window days
+            self._as_of = new_day
+            self._current.clear()
+            self._previous.clear()
+            for offset in range(2 * self.window_days):
+                day = new_day - timedelta(days=offset)
+                if day in self._daily:
+                    _add_counts(self._window_of(day), self._daily[day])
+            return
+        for _ in range(steps):
+            self._as_of += timedelta(days=1)
+            leaving_current = self._as_of - timedelta(days=self.window_days)
+            leaving_previous = self._as_of - timedelta(days=2 * self.window_days)
+            if leaving_current in self._daily:
+                _add_counts(self._current, self._daily[leaving_current], -1)
+                _add_counts(self._previous, self._daily[leaving_current])
+            if leaving_previous in self._daily:
+                _add_counts(self._previous, self._daily[leaving_previous], -1)
+            if self._as_of in self._daily:
+                _add_counts(self._current, self._daily[self._as_of])
+
+    ## 2.2 Ingestion ############################
+
+    def add_batch(self, articles: Iterable[Mapping]) -> int:
+        """Count a batch of new articles. Articles already seen (by URL) are skipped,
+        so re-polling the same list does not inflate counts.
+        Returns the number of newly counted articles."""
+        added = 0
+        with self._lock:
+            fresh = []
+            for article in articles:
+                url = article.get("url")
+                day = _parse_day(article.get("published_date"))
+                if not url or day is None or url in self._seen_urls:
+                    continue
+                self._seen_urls.add(url)
+                fresh.append((day, article))
+            if not fresh:
+                return 0
+
+            # Move the windows first, so each new article lands in the right one
+            latest = max(day for day, _ in fresh)
+            if self._as_of is None or latest > self._as_of:
+                self._advance_to(latest)
+
+            for day, article in fresh:
+                terms_by_kind = {kind: set(facet_values(article, kind)) for kind in FACET_KINDS}
+                counts = Counter((kind, value) for kind, values in terms_by_kind.items() for value in values)
+                _add_counts(self._daily[day], counts)
+                window = self._window_of(day)
+                if window is not None:
+                    _add_counts(window, counts)
+                self._add_cooccurrence(terms_by_kind)
+                added += 1
+        return added
+
+    def _add_cooccurrence(self, terms_by_kind: Dict[str, set]):
+        """Count each tracked kind pair once per article (both directions)."""
+        for kind_a, kind_b in self.cooccurrence_pairs:
+            for value_a in terms_by_kind.get(kind_a, ()):
+                for value_b in terms_by_kind.get(kind_b, ()):
+                    if kind_a == kind_b and value_a == value_b:
+                        continue
+                    term_a, term_b = (kind_a, value_a), (kind_b, value_b)
+                    self._cooccurrence[term_a][term_b] += 1
+                    if kind_a != kind_b:
+                        self._cooccurrence[term_b][term_a] += 1
+
+    ## 2.3 Trend Queries ############################
+
+    def rising(self, kind: Optional[str] = None, top: int = 10) -> List[Dict]:
+        """Top facet values by growth: count in the latest window minus the window before.
+        Reads only the two rolling totals, never the per-day history."""
+        with self._lock:
+            terms = set(self._current) | set(self._previous)
+            rows = [
+                {"kind": k, "value": v,
+                 "current": self._current.get((k, v), 0),
+                 "previous": self._previous.get((k, v), 0)}
+                for k, v in terms if kind is None or k == kind
+            ]
+        for row in rows:
+            row["change"] = row["current"] - row["previous"]
+        rows.sort(key=lambda r: (-r["change"], -r["current"], r["value"]))
+        return rows[:top]
+
+    def top(self, kind: Optional[str] = None, top: int = 10) -> List[Tuple[str, str, int]]:
+        """Most frequent (kind, value, count) in the latest window."""
+        with self._lock:
+            items = [(k, v, n) for (k, v), n in self._current.items() if kind is None or k == kind]
+        items.sort(key=lambda item: (-item[2], item[1]))
+        return items[:top]
+
+    def series(self, kind: str, value: str, start: Optional[str] = None,
+               end: Optional[str] = None) -> List[Tuple[str, int]]:
+        """Daily counts for one facet value as [(YYYY-MM-DD, count), ...], zero-filled.
+        Defaults to the two tracked windows ending on the latest day."""
+        with self._lock:
+            if self._as_of is None:
+                return []
+            end_day = _parse_day(end) if end else self._as_of
+            start_day = _parse_day(start) if start else end_day - timedelta(days=2 * self.window_days - 1)
+            term = (kind, value)
+            out = []
+            day = start_day
+            while day <= end_day:
+                out.append((day.isoformat(), self._daily[day].get(term, 0) if day in self._daily else 0))
+                day += timedelta(days=1)
+        return out
+
+    def cooccurring(self, kind: str, value: str, with_kind: Optional[str] = None,
+                    top: int = 10) -> List[Tuple[str, str, int]]:
+        """Facet values that appear in the same articles as (kind, value),
+        as (kind, value, article_count), optionally limited to with_kind."""
+        with self._lock:
+            row = self._cooccurrence.get((kind, value), Counter())
+            items = [(k, v, n) for (k, v), n in row.items() if with_kind is None or k == with_kind]
+        items.sort(key=lambda item: (-item[2], item[1]))
+        return items[:top]
+
+    @property
+    def as_of(self) -> Optional[str]:
+        """Latest published day seen, as 'YYYY-MM-DD' (None before the first batch)."""
+        return self._as_of.isoformat() if self._as_of else None
+
+    def __len__(self) -> int:
+        """Number of articles counted so far."""
+        return len(self._seen_urls)
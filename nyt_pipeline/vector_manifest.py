@@ -0,0 +1,138 @@
+# vector_manifest.py
+# Deterministic Vector Ids and a Manifest of What Each Index Holds
+# Used by RAG.py (ingest_documents)
+# Jimmy
+
+# ingest_documents() used to give every row a fresh uuid4, so each run
+# added another copy of every article to the index. Ids are now derived
+# from the article URL, so re-ingesting an article overwrites its vector.
+# The manifest is a small SQLite file that remembers, per index and
+# namespace, which ids were upserted and a hash of what was sent. An
+# incremental run compares the CSV with it and only embeds and upserts new
+# or changed articles, and it can delete the vectors of articles that left
+# the corpus or are older than a retention window.
+
+# 0. Setup #################################
+
+## 0.1 Load Packages ############################
+
+import hashlib    # for content hashes
+import json       # for hashing metadata in a stable order
+import os         # for paths and the manifest setting
+import time       # for updated_at stamps
+from typing import Dict, Iterable, List, Optional, Tuple  # for type hints
+from uuid import NAMESPACE_URL, uuid5  # for ids derived from URLs
+
+from nyt_pipeline.env import PROJECT_ROOT  # to anchor the default manifest file
+from nyt_pipeline.sqlite_db import sqlite_connection  # open-commit-close connections
+
+# 1. Constants #################################
+
+# Default manifest file (override with NYT_VECTOR_MANIFEST)
+DEFAULT_MANIFEST_PATH = os.path.join(PROJECT_ROOT, "data", "vector_manifest.sqlite")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS vectors (
+    index_key TEXT NOT NULL,       -- which index, e.g. 'pinecone:articles'
+    namespace TEXT NOT NULL,
+    id TEXT NOT NULL,
+    content_hash TEXT NOT NULL,    -- sha256 of the embedded text and metadata
+    published_date TEXT NOT NULL,  -- YYYY-MM-DD, or '' if unknown
+    updated_at REAL NOT NULL,      -- unix seconds
+    PRIMARY KEY (index_key, namespace, id)
+) WITHOUT ROWID;
+"""
+
+# 2. Ids and Hashes #################################
+
+def vector_id(url: str, fallback: str = "") -> str:
+    """Stable vector id for an article: a UUID5 of its URL. Rows without a
+    URL use `fallback` (e.g. title + abstract) instead."""
+    return str(uuid5(NAMESPACE_URL, url or fallback))
+
+
+def content_hash(text: str, metadata: dict) -> str:
+    """sha256 of the embedded text plus its metadata. A change to either
+    means the vector must be upserted again."""
+    payload = json.dumps([text, metadata], sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+# 3. Manifest #################################
+
+class VectorManifest:
+    """Ids, content hashes, and dates of the vectors upserted into each index.
+
+    Parameters:
+        path: SQLite file (created if missing)
+    """
+
+    def __init__(self, path: str = DEFAULT_MANIFEST_PATH):
+        self.path = path
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        with self._connect() as conn:
+            conn.executescript(SCHEMA)
+
+    def _connect(self):
+        """Open a connection, commit on success, and always close it."""
+        return sqlite_connection(self.path)
+
+    def entries(self, index_key: str, namespace: str) -> Dict[str, Tuple[str, str]]:
+        """{id: (content_hash, published_date)} for one index and namespace."""
+        with self._connect() as conn:
+            rows = conn.execute("SELECT id, content_hash, published_date FROM vectors "
+                                "WHERE index_key = ? AND namespace = ?", (index_key, namespace))
+            return {id_: (digest, published) for id_, digest, published in rows}
+
+    def record(self, index_key: str, namespace: str, rows: Iterable[Tuple[str, str, str]]):
+        """Remember (id, content_hash, published_date) rows after they were upserted."""
+        now = time.time()
+        with self._connect() as conn:
+            conn.executemany("INSERT OR REPLACE INTO vectors (index_key, namespace, id, content_hash, "
+                             "published_date, updated_at) VALUES (?, ?, ?, ?, ?, ?)",
+                             [(index_key, namespace, id_, digest, published or "", now)
+                              for id_, digest, published in rows])
+
+    def forget(self, index_key: str, namespace: str, ids: Optional[Iterable[str]] = None):
+        """Drop ids after their vectors were deleted (all ids of the namespace if None)."""
+        with self._connect() as conn:
+            if ids is None:
+                conn.execute("DELETE FROM vectors WHERE index_key = ? AND namespace = ?",
+                             (index_key, namespace))
+            else:
+                conn.executemany("DELETE FROM vectors WHERE index_key = ? AND namespace = ? AND id = ?",
+                                 [(index_key, namespace, id_) for id_ in ids])
+
+
+def get_manifest() -> VectorManifest:
+    """The manifest at NYT_VECTOR_MANIFEST (default data/vector_manifest.sqlite)."""
+    return VectorManifest(os.environ.get("NYT_VECTOR_MANIFEST") or DEFAULT_MANIFEST_PATH)
+
+# 4. Planning a Sync #################################
+
+def plan_sync(known: Dict[str, Tuple[str, str]], current: Dict[str, Tuple[str, str]],
+              incremental: bool = True, prune_missing: bool = False,
+              cutoff: Optional[str] = None) -> Tuple[List[str], List[str]]:
+    """Decide which ids to upsert and which to delete.
+
+    Parameters:
+        known: {id: (content_hash, published_date)} from the manifest
+        current: The same for the rows being ingested now
+        incremental: Skip rows whose hash matches the manifest
+        prune_missing: The rows are the whole corpus, so known ids missing
+            from them are deleted
+        cutoff: Retention start (YYYY-MM-DD). Articles published before it are
+            deleted and not ingested; articles without a date are kept
+
+    Returns:
+        (ids to upsert, ids to delete)
+    """
+    def expired(published: str) -> bool:
+        return cutoff is not None and bool(published) and published[:10] < cutoff
+
+    upsert = [id_ for id_, (digest, published) in current.items()
+              if not expired(published) and not (incremental and known.get(id_, ("",))[0] == digest)]
+    delete = [id_ for id_, (_, published) in known.items()
+              if expired(current.get(id_, ("", published))[1])
+              or (prune_missing and id_ not in current)]
+    return upsert, delete
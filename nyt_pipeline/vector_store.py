@@ -0,0 +1,541 @@
+# vector_store.py
+# Pluggable Vector Stores for RAG: Pinecone or a Local NumPy Index
+# Used by RAG.py (ingest_documents and retrieve)
+# Jimmy
+
+# RAG.retrieve used to send every question to Pinecone, even though our
+# NYT corpus is a few thousand vectors and fits easily in RAM. Both stores
+# below speak the same small subset of the Pinecone Index API (upsert,
+# query, delete, describe_index_stats), so RAG.py works with either one.
+# LocalVectorStore keeps each namespace in one contiguous float32 matrix,
+# answers exact top-k with a single matrix-vector product and argpartition,
+# and can switch to an approximate IVF search for large corpora. It saves
+# to plain .npy/.json files, so it works offline. Queries can carry a
+# Pinecone-style metadata filter (facets, date range); the local store
+# answers it with a FacetIndex bitmap before scoring, so only matching
+# vectors are compared. pinecone is only imported by open_vector_store()
+# when that backend is chosen.
+
+# 0. Setup #################################
+
+## 0.1 Load Packages ############################
+
+import json       # for ids and metadata next to the matrix
+import os         # for paths, atomic file replacement, and backend settings
+import threading  # for a thread-safe store
+from typing import Iterable, List, Optional, Sequence, Tuple  # for type hints
+
+import numpy as np  # for the vector matrix and top-k
+
+from nyt_pipeline.env import PROJECT_ROOT  # to anchor the default vector folder
+from nyt_pipeline.facet_index import FacetIndex, bitmap_mask  # bitmap prefilter for facet filters
+from nyt_pipeline.facets import FACET_KINDS  # 'des', 'org', 'per', 'geo'
+
+# 1. Constants #################################
+
+# Default folder for local indexes: data/vectors/<index name>/
+DEFAULT_VECTOR_DIR = os.path.join(PROJECT_ROOT, "data", "vectors")
+
+# text-embedding-3-small vectors
+DEFAULT_DIMENSION = 1536
+
+# Rows allocated for a new namespace; the matrix doubles when full
+INITIAL_CAPACITY = 1024
+
+# Below this many vectors exact search is faster than IVF, so IVF is skipped
+IVF_MIN_VECTORS = 20000
+
+# List-valued facet metadata fields, answered from the FacetIndex
+FACET_METADATA = {f"{kind}_facet": kind for kind in FACET_KINDS}
+
+# Filter operators the local store understands (the Pinecone ones we use)
+COMPARISONS = {"$gt": np.greater, "$gte": np.greater_equal, "$lt": np.less, "$lte": np.less_equal}
+
+# k-means settings for the IVF coarse centroids
+IVF_TRAIN_PER_LIST = 64  # training sample size per centroid
+IVF_ITERATIONS = 10
+
+# 2. Interface #################################
+
+class VectorStore:
+    """What RAG.py needs from a vector store. Method names and arguments
+    follow the Pinecone Index API, so a Pinecone index fits as-is.
+
+    query() returns {"matches": [{"id", "score", "metadata"}, ...]}, best first.
+    `name` tells indexes apart in the ingestion manifest (None if unknown).
+    """
+
+    name = None
+
+    def upsert(self, vectors: Iterable[Tuple[str, Sequence[float], dict]], namespace: str = ""):
+        raise NotImplementedError
+
+    def query(self, vector: Sequence[float], top_k: int = 5, namespace: str = "",
+              include_metadata: bool = False, filter: Optional[dict] = None) -> dict:
+        raise NotImplementedError
+
+    def delete(self, ids: Optional[Iterable[str]] = None, delete_all: bool = False,
+               namespace: str = ""):
+        raise NotImplementedError
+
+    def describe_index_stats(self) -> dict:
+        raise NotImplementedError
+
+    def flush(self):
+        """Persist pending writes (no-op for remote stores)."""
+
+
+class PineconeStore(VectorStore):
+    """The existing Pinecone index behind the VectorStore interface.
+
+    Parameters:
+        index: A pinecone Index (pc.Index(name))
+        name: Label for the ingestion manifest, e.g. 'pinecone:articles'
+    """
+
+    def __init__(self, index, name: Optional[str] = None):
+        self.index = index
+        self.name = name
+
+    def upsert(self, vectors, namespace=""):
+        return self.index.upsert(vectors=vectors, namespace=namespace)
+
+    def query(self, vector, top_k=5, namespace="", include_metadata=False, filter=None):
+        extra = {"filter": filter} if filter else {}
+        return self.index.query(vector=vector, top_k=top_k, namespace=namespace,
+                                include_metadata=include_metadata, **extra)
+
+    def delete(self, ids=None, delete_all=False, namespace=""):
+        if delete_all:
+            return self.index.delete(delete_all=True, namespace=namespace)
+        return self.index.delete(ids=list(ids or []), namespace=namespace)
+
+    def describe_index_stats(self):
+        return self.index.describe_index_stats()
+
+# 3. Local Store #################################
+
+def _normalize(matrix: np.ndarray) -> np.ndarray:
+    """Scale rows to unit length, so a dot product is the cosine similarity."""
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return matrix / norms
+
+
+def published_day(value) -> int:
+    """A date ('YYYY-MM-DD...' or date) as the integer YYYYMMDD, the form
+    stored in 'published_day' metadata (Pinecone range filters need numbers).
+
+    Raises:
+        ValueError: If value does not start with a valid date
+    """
+    text = str(value)[:10]
+    if len(text) != 10 or text[4] != "-" or text[7] != "-" or not text.replace("-", "").isdigit():
+        raise ValueError(f"Not a YYYY-MM-DD date: {value!r}")
+    return int(text.replace("-", ""))
+
+
+def metadata_filter(facets: Optional[dict] = None, start_date=None, end_date=None) -> Optional[dict]:
+    """Pinecone-style metadata filter: any of the values within one facet kind
+    (OR), every kind given (AND), and published between start_date and end_date
+    (inclusive). Returns None when there is nothing to filter on.
+
+    Parameters:
+        facets: {kind: [values]}, kind as 'per' or 'per_facet'
+        start_date, end_date: 'YYYY-MM-DD' strings or dates (either may be None)
+
+    Raises:
+        ValueError: For an unknown facet kind or a malformed date
+    """
+    clauses = []
+    for kind, values in (facets or {}).items():
+        field = kind if kind in FACET_METADATA else f"{kind}_facet"
+        if field not in FACET_METADATA:
+            raise ValueError(f"Unknown facet kind '{kind}' (use one of {', '.join(FACET_KINDS)}).")
+        values = [values] if isinstance(values, str) else [str(v) for v in values if v]
+        if values:
+            clauses.append({field: {"$in": values}})
+    days = {}
+    if start_date:
+        days["$gte"] = published_day(start_date)
+    if end_date:
+        days["$lte"] = published_day(end_date)
+    if days:
+        clauses.append({"published_day": days})
+    if not clauses:
+        return None
+    return clauses[0] if len(clauses) == 1 else {"$and": clauses}
+
+
+def _top_k(scores: np.ndarray, k: int) -> np.ndarray:
+    """Positions of the k highest scores, best first. argpartition is O(n),
+    so only the k winners get sorted."""
+    if k <= 0 or len(scores) == 0:
+        return np.empty(0, dtype=np.int64)
+    if k < len(scores):
+        top = np.argpartition(-scores, k - 1)[:k]
+    else:
+        top = np.arange(len(scores))
+    return top[np.argsort(-scores[top], kind="stable")]
+
+
+class _Namespace:
+    """Vectors, ids, and metadata of one namespace. Rows 0..size-1 of
+    `vectors` are live; deleting a row moves the last row into its place,
+    so the live rows stay contiguous."""
+
+    def __init__(self, dimension: int, capacity: int = INITIAL_CAPACITY):
+        self.vectors = np.zeros((capacity, dimension), dtype=np.float32)
+        self.ids = []        # row -> id
+        self.metadata = []   # row -> metadata dict
+        self.row_of = {}     # id -> row
+        # Facet prefilter: FacetIndex keyed by vector id, plus each row's doc id in it
+        self.facets = FacetIndex()
+        self.row_doc = np.zeros(capacity, dtype=np.int64)
+        self.doc_count = 0
+        self.columns = {}    # metadata field -> array over rows, for filters (cleared on writes)
+        # IVF state: coarse centroids, each row's list (-1 before training),
+        # and rows sorted by list with per-list offsets (rebuilt when stale)
+        self.centroids = None
+        self.assign = np.full(capacity, -1, dtype=np.int32)
+        self.trained_size = 0
+        self.lists = None
+
+    @property
+    def size(self) -> int:
+        return len(self.ids)
+
+    def _grow(self, needed: int):
+        capacity = len(self.vectors)
+        if needed <= capacity:
+            return
+        while capacity < needed:
+            capacity *= 2
+        vectors = np.zeros((capacity, self.vectors.shape[1]), dtype=np.float32)
+        vectors[:self.size] = self.vectors[:self.size]
+        assign = np.full(capacity, -1, dtype=np.int32)
+        assign[:self.size] = self.assign[:self.size]
+        row_doc = np.zeros(capacity, dtype=np.int64)
+        row_doc[:self.size] = self.row_doc[:self.size]
+        self.vectors, self.assign, self.row_doc = vectors, assign, row_doc
+
+    def upsert(self, ids: List[str], matrix: np.ndarray, metadata: List[dict]):
+        rows = np.empty(len(ids), dtype=np.int64)
+        new = [i for i, id_ in enumerate(ids) if id_ not in self.row_of]
+        self._grow(self.size + len(new))
+        for i, id_ in enumerate(ids):
+            row = self.row_of.get(id_)
+            if row is None:
+                row = self.row_of[id_] = self.size
+                self.ids.append(id_)
+                self.metadata.append(metadata[i])
+            else:
+                self.metadata[row] = metadata[i]
+            rows[i] = row
+        docs = self.facets.add_many([{**md, "url": id_} for id_, md in zip(ids, metadata)])
+        self.row_doc[rows] = docs
+        if docs:
+            self.doc_count = max(self.doc_count, max(docs) + 1)
+        self.vectors[rows] = matrix
+        self.columns = {}
+        if self.centroids is not None:
+            self.assign[rows] = np.argmax(matrix @ self.centroids.T, axis=1)
+            self.lists = None
+
+    def delete(self, ids: Iterable[str]):
+        for id_ in ids:
+            row = self.row_of.pop(id_, None)
+            if row is None:
+                continue
+            self.facets.remove(id_)
+            last = self.size - 1
+            if row != last:
+                moved = self.ids[last]
+                self.vectors[row] = self.vectors[last]
+                self.assign[row] = self.assign[last]
+                self.row_doc[row] = self.row_doc[last]
+                self.ids[row], self.metadata[row] = moved, self.metadata[last]
+                self.row_of[moved] = row
+            self.ids.pop()
+            self.metadata.pop()
+        self.lists = None
+        self.columns = {}
+
+    ## 3.1 Metadata Filters ############################
+
+    def filter_rows(self, flt: dict) -> np.ndarray:
+        """Rows (ascending) whose metadata matches a Pinecone-style filter."""
+        return np.flatnonzero(self._mask(flt))
+
+    def _mask(self, flt: dict) -> np.ndarray:
+        mask = np.ones(self.size, dtype=bool)
+        for key, cond in flt.items():
+            if key == "$and":
+                for sub in cond:
+                    mask &= self._mask(sub)
+            elif key == "$or":
+                any_mask = np.zeros(self.size, dtype=bool)
+                for sub in cond:
+                    any_mask |= self._mask(sub)
+                mask &= any_mask
+            else:
+                mask &= self._field_mask(key, cond if isinstance(cond, dict) else {"$eq": cond})
+        return mask
+
+    def _field_mask(self, field: str, cond: dict) -> np.ndarray:
+        mask = np.ones(self.size, dtype=bool)
+        for op, value in cond.items():
+            if op in COMPARISONS:
+                column = self._column(field)
+                if column.dtype == object:
+                    raise ValueError(f"{op} needs a numeric metadata field, and '{field}' is not.")
+                mask &= COMPARISONS[op](column, value)  # NaN (missing) never matches
+                continue
+            if op not in ("$eq", "$ne", "$in", "$nin"):
+                raise ValueError(f"Unsupported filter operator '{op}'.")
+            values = list(value) if op in ("$in", "$nin") else [value]
+            if field in FACET_METADATA:
+                # One bitmap OR per value instead of a scan over every row
+                bitmap = 0
+                for v in values:
+                    bitmap |= self.facets.bitmap(FACET_METADATA[field], v)
+                matched = self._rows_in(bitmap)
+            else:
+                wanted = set(values)
+                matched = np.fromiter((bool(wanted.intersection(v)) if isinstance(v, list) else v in wanted
+                                       for v in self._column(field)), dtype=bool, count=self.size)
+            mask &= ~matched if op in ("$ne", "$nin") else matched
+        return mask
+
+    def _rows_in(self, bitmap: int) -> np.ndarray:
+        """Boolean mask over rows for a FacetIndex bitmap of doc ids."""
+        return bitmap_mask(bitmap, self.doc_count)[self.row_doc[:self.size]]
+
+    def _column(self, field: str) -> np.ndarray:
+        """One metadata field over all rows: float64 (NaN when missing) if every
+        value is a number, else an object array. Cached until the next write."""
+        column = self.columns.get(field)
+        if column is None:
+            values = [md.get(field) for md in self.metadata]
+            if all(v is None or (isinstance(v, (int, float)) and not isinstance(v, bool)) for v in values):
+                column = np.array([np.nan if v is None else v for v in values], dtype=np.float64)
+            else:
+                column = np.empty(len(values), dtype=object)
+                column[:] = values
+            self.columns[field] = column
+        return column
+
+    ## 3.2 IVF ############################
+
+    def train(self, nlist: int, seed: int = 0):
+        """Pick nlist coarse centroids with spherical k-means on a sample,
+        then file every row under its nearest centroid."""
+        n = self.size
+        live = self.vectors[:n]
+        rng = np.random.default_rng(seed)
+        sample = live[rng.choice(n, min(n, nlist * IVF_TRAIN_PER_LIST), replace=False)]
+        centroids = sample[rng.choice(len(sample), nlist, replace=False)].copy()
+        for _ in range(IVF_ITERATIONS):
+            nearest = np.argmax(sample @ centroids.T, axis=1)
+            sums = np.zeros_like(centroids)
+            np.add.at(sums, nearest, sample)
+            empty = np.bincount(nearest, minlength=nlist) == 0
+            sums[empty] = centroids[empty]  # keep a centroid that lost all its points
+            centroids = _normalize(sums).astype(np.float32)
+        self.centroids = centroids
+        for start in range(0, n, 65536):  # assign in chunks to bound memory
+            block = live[start:start + 65536]
+            self.assign[start:start + len(block)] = np.argmax(block @ centroids.T, axis=1)
+        self.trained_size = n
+        self.lists = None
+
+    def candidates(self, query: np.ndarray, nprobe: int) -> np.ndarray:
+        """Rows filed under the nprobe centroids closest to the query."""
+        if self.lists is None:
+            order = np.argsort(self.assign[:self.size], kind="stable")
+            offsets = np.concatenate(([0], np.cumsum(np.bincount(self.assign[:self.size],
+                                                                 minlength=len(self.centroids)))))
+            self.lists = (order, offsets)
+        order, offsets = self.lists
+        probe = _top_k(self.centroids @ query, nprobe)
+        return np.concatenate([order[offsets[c]:offsets[c + 1]] for c in probe])
+
+
+class LocalVectorStore(VectorStore):
+    """In-process vector index with cosine scores, like a Pinecone index
+    created with the default metric. Vectors are stored unit-length, so a
+    query is one float32 matrix-vector product.
+
+    Parameters:
+        dimension: Vector length
+        path: Folder to save to and load from (None keeps it in memory only)
+        approximate: Use IVF search once a namespace has IVF_MIN_VECTORS vectors
+        nprobe: IVF lists scanned per query (more is slower but finds more)
+    """
+
+    def __init__(self, dimension: int = DEFAULT_DIMENSION, path: Optional[str] = None,
+                 approximate: bool = False, nprobe: int = 8):
+        self.dimension = dimension
+        self.path = path
+        self.approximate = approximate
+        self.nprobe = nprobe
+        self.name = f"local:{os.path.abspath(path)}" if path else None
+        self._namespaces = {}
+        self._lock = threading.RLock()
+
+    def _namespace(self, name: str) -> _Namespace:
+        ns = self._namespaces.get(name)
+        if ns is None:
+            ns = self._namespaces[name] = _Namespace(self.dimension)
+        return ns
+
+    def _as_matrix(self, vectors: Iterable[Sequence[float]]) -> np.ndarray:
+        matrix = np.asarray(list(vectors), dtype=np.float32).reshape(-1, self.dimension)
+        return _normalize(matrix)
+
+    ## 3.3 Pinecone-Style API ############################
+
+    def upsert(self, vectors, namespace=""):
+        """Add or replace (id, values, metadata) tuples; returns {"upserted_count": n}."""
+        rows = list(vectors)
+        if not rows:
+            return {"upserted_count": 0}
+        ids = [str(row[0]) for row in rows]
+        metadata = [dict(row[2]) if len(row) > 2 and row[2] else {} for row in rows]
+        matrix = self._as_matrix(row[1] for row in rows)
+        with self._lock:
+            self._namespace(namespace).upsert(ids, matrix, metadata)
+        return {"upserted_count": len(rows)}
+
+    def query(self, vector, top_k=5, namespace="", include_metadata=False, filter=None):
+        """The top_k most similar vectors, best first. With a filter, only
+        vectors whose metadata matches are scored (exactly, even in IVF mode)."""
+        q = self._as_matrix([vector])[0]
+        with self._lock:
+            ns = self._namespaces.get(namespace)
+            if ns is None or ns.size == 0:
+                return {"matches": [], "namespace": namespace}
+            if filter:
+                rows = ns.filter_rows(filter)
+                scores = ns.vectors[rows] @ q
+                top = _top_k(scores, top_k)
+                best, best_scores = rows[top], scores[top]
+            elif self.approximate and ns.size >= IVF_MIN_VECTORS:
+                if ns.centroids is None or ns.size > 2 * ns.trained_size:
+                    ns.train(nlist=int(np.sqrt(ns.size)))  # retrain once the namespace doubles
+                rows = ns.candidates(q, self.nprobe)
+                scores = ns.vectors[rows] @ q
+                top = _top_k(scores, top_k)
+                best, best_scores = rows[top], scores[top]
+            else:
+                scores = ns.vectors[:ns.size] @ q
+                best = _top_k(scores, top_k)
+                best_scores = scores[best]
+            matches = []
+            for row, score in zip(best.tolist(), best_scores.tolist()):
+                match = {"id": ns.ids[row], "score": score}
+                if include_metadata:
+                    match["metadata"] = ns.metadata[row]
+                matches.append(match)
+        return {"matches": matches, "namespace": namespace}
+
+    def delete(self, ids=None, delete_all=False, namespace=""):
+        with self._lock:
+            if delete_all:
+                self._namespaces.pop(namespace, None)
+            elif namespace in self._namespaces:
+                self._namespaces[namespace].delete(str(id_) for id_ in ids or [])
+        return {}
+
+    def describe_index_stats(self):
+        with self._lock:
+            counts = {name: {"vector_count": ns.size} for name, ns in self._namespaces.items()}
+        return {"dimension": self.dimension, "namespaces": counts,
+                "total_vector_count": sum(c["vector_count"] for c in counts.values())}
+
+    ## 3.4 Saving and Loading ############################
+
+    def flush(self):
+        """Save to self.path, if one was given."""
+        if self.path is not None:
+            self.save(self.path)
+
+    def save(self, path: str):
+        """Write each namespace as <name>.npy (the live rows) plus <name>.json
+        (ids and metadata). Files are replaced atomically."""
+        os.makedirs(path, exist_ok=True)
+        with self._lock:
+            for name, ns in self._namespaces.items():
+                base = os.path.join(path, _file_name(name))
+                with open(base + ".npy.tmp", "wb") as f:
+                    np.save(f, ns.vectors[:ns.size])
+                with open(base + ".json.tmp", "w", encoding="utf-8") as f:
+                    json.dump({"namespace": name, "ids": ns.ids, "metadata": ns.metadata}, f)
+                os.replace(base + ".npy.tmp", base + ".npy")
+                os.replace(base + ".json.tmp", base + ".json")
+            with open(os.path.join(path, "index.json"), "w", encoding="utf-8") as f:
+                json.dump({"dimension": self.dimension, "namespaces": sorted(self._namespaces)}, f)
+
+    @classmethod
+    def load(cls, path: str, **kwargs) -> "LocalVectorStore":
+        """Open a store saved with save(); an empty store if path has none yet."""
+        info_path = os.path.join(path, "index.json")
+        if not os.path.exists(info_path):
+            return cls(path=path, **kwargs)
+        with open(info_path, encoding="utf-8") as f:
+            info = json.load(f)
+        kwargs.setdefault("dimension", info["dimension"])
+        store = cls(path=path, **kwargs)
+        for name in info["namespaces"]:
+            base = os.path.join(path, _file_name(name))
+            with open(base + ".json", encoding="utf-8") as f:
+                saved = json.load(f)
+            matrix = np.load(base + ".npy")
+            ns = store._namespaces[name] = _Namespace(store.dimension, max(INITIAL_CAPACITY, len(matrix)))
+            ns.upsert(saved["ids"], matrix, saved["metadata"])
+        return store
+
+
+def _file_name(namespace: str) -> str:
+    """File-safe name for a namespace ('' is the default namespace)."""
+    return "".join(c if c.isalnum() or c in "-_" else "_" for c in namespace) or "_default"
+
+# 4. Choosing a Backend #################################
+
+def open_vector_store(index_name: Optional[str] = None, backend: Optional[str] = None,
+                      dimension: int = DEFAULT_DIMENSION) -> VectorStore:
+    """Open the vector store RAG.py reads and writes.
+
+    Parameters:
+        index_name: Pinecone index name, or the local folder name under data/vectors
+        backend: 'pinecone' or 'local' (default: NYT_VECTOR_BACKEND, else 'pinecone')
+        dimension: Vector length, used when a new index is created
+
+    Returns:
+        A PineconeStore or LocalVectorStore
+
+    Raises:
+        ValueError: If the backend name is unknown
+    """
+    backend = (backend or os.getenv("NYT_VECTOR_BACKEND") or "pinecone").lower()
+    if backend == "local":
+        path = os.path.join(os.getenv("NYT_VECTOR_DIR") or DEFAULT_VECTOR_DIR, index_name or "default")
+        approximate = os.getenv("NYT_VECTOR_APPROXIMATE", "").lower() in ("1", "true", "yes")
+        return LocalVectorStore.load(path, dimension=dimension, approximate=approximate)
+    if backend != "pinecone":
+        raise ValueError(f"Unknown vector backend '{backend}' (use 'pinecone' or 'local').")
+
+    from pinecone import Pinecone, ServerlessSpec
+    pc = Pinecone(api_key=os.getenv("PINECONE_API_KEY"))
+    existing = [idx.name for idx in pc.list_indexes()]
+    # Create index if it doesn't exist, or skip if it already exists
+    if index_name not in existing:
+        pc.create_index(
+            name=index_name,
+            dimension=dimension,
+            spec=ServerlessSpec(
+                cloud="aws",
+                region="us-east-1",
+            ),
+        )
+    return PineconeStore(pc.Index(index_name), name=f"pinecone:{index_name}")
@@ -0,0 +1,18 @@
+# conftest.py
+# Shared pytest setup
+# Used by every test module in tests/
+# Jimmy
+
+# The tests import nyt_pipeline from the project root and the Shiny app's
+# modules (article_cache, shared_cache, ...) from their own folder, the same
+# way app.py and the scripts do when they run.
+
+import os   # for paths
+import sys  # for making both folders importable
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SHINY_APP = os.path.join(PROJECT_ROOT, "02_productivity", "shiny_app")
+
+for path in (PROJECT_ROOT, SHINY_APP):
+    if path not in sys.path:
+        sys.path.insert(0, path)
@@ -0,0 +1,167 @@
+# test_caches.py
+# Tests for the in-process ArticleCache and the cross-process SharedCache
+# Run with: python -m pytest tests
+# Jimmy
+
+import threading  # for concurrent callers
+import time       # for waiting out TTLs
+
+import pytest
+
+from article_cache import ArticleCache
+from shared_cache import SharedCache
+
+# 1. ArticleCache #################################
+
+def test_concurrent_misses_share_one_load():
+    cache = ArticleCache(ttl=60)
+    calls = []
+    release = threading.Event()
+
+    def loader():
+        calls.append(1)
+        release.wait(5)
+        return ["article"]
+
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(cache.get("viewed/1", loader)))
+               for _ in range(8)]
+    for t in threads:
+        t.start()
+    time.sleep(0.1)  # let every thread queue behind the leader
+    release.set()
+    for t in threads:
+        t.join(5)
+
+    assert len(calls) == 1
+    assert results == [["article"]] * 8
+    assert cache.stats()["upstream_calls"] == 1
+
+
+def test_failed_load_raises_for_every_waiting_caller():
+    cache = ArticleCache(ttl=60)
+    release = threading.Event()
+
+    def loader():
+        release.wait(5)
+        raise RuntimeError("upstream down")
+
+    errors = []
+
+    def call():
+        try:
+            cache.get("k", loader)
+        except RuntimeError as e:
+            errors.append(str(e))
+
+    threads = [threading.Thread(target=call) for _ in range(4)]
+    for t in threads:
+        t.start()
+    time.sleep(0.1)
+    release.set()
+    for t in threads:
+        t.join(5)
+    assert errors == ["upstream down"] * 4
+    assert cache.peek("k") is None
+
+
+def test_stale_entry_is_served_while_one_refresh_runs():
+    cache = ArticleCache(ttl=0.5, stale_ttl=60)
+    cache.get("k", lambda: "old")
+    time.sleep(0.6)
+
+    refreshed = threading.Event()
+    calls = []
+
+    def slow_loader():
+        calls.append(1)
+        time.sleep(0.1)
+        refreshed.set()
+        return "new"
+
+    # Both calls see the stale value at once; only one refresh starts
+    assert cache.get("k", slow_loader) == "old"
+    assert cache.get("k", slow_loader) == "old"
+    assert refreshed.wait(5)
+    time.sleep(0.02)  # the refresh stores its value right after the loader returns
+    assert cache.get("k", slow_loader) == "new"
+    assert len(calls) == 1
+    assert cache.stats()["stale_hits"] == 2
+
+
+def test_failed_refresh_keeps_the_stale_value():
+    cache = ArticleCache(ttl=0.05, stale_ttl=60)
+    cache.get("k", lambda: "old")
+    time.sleep(0.1)
+
+    def broken():
+        raise RuntimeError("upstream down")
+
+    assert cache.get("k", broken) == "old"
+    time.sleep(0.1)
+    assert cache.peek("k") == "old"
+    assert cache.stats()["refresh_errors"] == 1
+
+
+def test_entry_past_the_stale_window_is_reloaded():
+    cache = ArticleCache(ttl=0.02, stale_ttl=0.02)
+    cache.get("k", lambda: "old")
+    time.sleep(0.1)
+    assert cache.get("k", lambda: "new") == "new"
+
+# 2. SharedCache #################################
+
+@pytest.fixture
+def shared(tmp_path):
+    return SharedCache(str(tmp_path / "cache.sqlite"), lease_seconds=5)
+
+
+def test_only_the_lease_holder_calls_upstream(shared, tmp_path):
+    # A second SharedCache on the same file stands in for another worker process
+    other = SharedCache(str(tmp_path / "cache.sqlite"), lease_seconds=5)
+    calls = []
+    release = threading.Event()
+
+    def loader():
+        calls.append(1)
+        release.wait(5)
+        return {"articles": [1, 2]}
+
+    results = []
+    threads = [threading.Thread(target=lambda c=c: results.append(c.load("viewed/1", loader, max_age=60)))
+               for c in (shared, other, shared, other)]
+    for t in threads:
+        t.start()
+    time.sleep(0.3)
+    release.set()
+    for t in threads:
+        t.join(10)
+
+    assert len(calls) == 1
+    assert results == [{"articles": [1, 2]}] * 4
+
+
+def test_lease_is_released_when_the_loader_fails(shared):
+    def broken():
+        raise RuntimeError("upstream down")
+
+    with pytest.raises(RuntimeError):
+        shared.load("k", broken, max_age=60)
+    # The next caller may lead right away instead of waiting out the lease
+    assert shared._try_lease("k")
+
+
+def test_expired_lease_can_be_taken_over(tmp_path):
+    path = str(tmp_path / "cache.sqlite")
+    stuck = SharedCache(path, lease_seconds=0.1)
+    assert stuck._try_lease("k")  # a worker that died while holding the lease
+    other = SharedCache(path, lease_seconds=0.1)
+    assert not other._try_lease("k")
+    time.sleep(0.2)
+    assert other.load("k", lambda: "fresh", max_age=60) == "fresh"
+
+
+def test_max_age_hides_old_values(shared):
+    shared.put("k", [1])
+    assert shared.get("k", max_age=60) == [1]
+    assert shared.get("k", max_age=0) is None
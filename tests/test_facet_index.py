@@ -0,0 +1,114 @@
+# test_facet_index.py
+# Tests for the FacetIndex bitmap queries, counts, and autocomplete
+# Run with: python -m pytest tests
+# Jimmy
+
+from collections import Counter  # for brute-force counts
+
+import pytest
+
+from nyt_pipeline.facet_index import FacetIndex, bitmap_count, bitmap_from_ids, bitmap_ids, bitmap_mask
+
+ARTICLES = [
+    {"url": "a", "per_facet": ["Donald J. Trump"], "geo_facet": ["Iran"], "des_facet": ["Elections"]},
+    {"url": "b", "per_facet": ["Donald J. Trump"], "geo_facet": ["Israel"]},
+    {"url": "c", "per_facet": ["Kamala D. Harris"], "geo_facet": ["Iran"], "des_facet": ["Elections"]},
+    {"url": "d", "org_facet": ["Democratic Party"], "geo_facet": ["Israel"]},
+]
+
+TRUMP = ("per", "Donald J. Trump")
+IRAN = ("geo", "Iran")
+ISRAEL = ("geo", "Israel")
+ELECTIONS = ("des", "Elections")
+
+
+@pytest.fixture
+def index():
+    index = FacetIndex()
+    index.add_many(ARTICLES)
+    return index
+
+# 1. Boolean Queries #################################
+
+def test_and(index):
+    assert index.filter_urls(all_of=[TRUMP, IRAN]) == ["a"]
+
+
+def test_or(index):
+    assert index.filter_urls(any_of=[IRAN, ISRAEL]) == ["a", "b", "c", "d"]
+    assert index.filter_urls(any_of=[("per", "Nobody")]) == []
+
+
+def test_not(index):
+    assert index.filter_urls(none_of=[TRUMP]) == ["c", "d"]
+
+
+def test_and_or_not_together(index):
+    assert index.filter_urls(all_of=[ELECTIONS], any_of=[IRAN, ISRAEL], none_of=[TRUMP]) == ["c"]
+
+
+def test_unknown_term_in_and_matches_nothing(index):
+    assert index.match(all_of=[("per", "Nobody")]) == 0
+
+# 2. Updates #################################
+
+def test_readding_a_url_replaces_its_facets(index):
+    index.add({"url": "a", "per_facet": ["Kamala D. Harris"]})
+    assert index.filter_urls(all_of=[TRUMP]) == ["b"]
+    assert index.count("per", "Kamala D. Harris") == 2
+    assert len(index) == 4
+
+
+def test_removed_article_drops_out_of_queries_and_counts(index):
+    assert index.remove("a")
+    assert not index.remove("a")
+    assert index.filter_urls(any_of=[IRAN]) == ["c"]
+    assert index.filter_urls(none_of=[TRUMP]) == ["c", "d"]
+    assert index.count("per", "Donald J. Trump") == 1
+    assert "a" not in index
+
+
+def test_url_listed_twice_in_a_batch_keeps_the_last_entry():
+    index = FacetIndex()
+    ids = index.add_many([{"url": "a", "geo_facet": ["Iran"]}, {"url": "a", "geo_facet": ["Israel"]}])
+    assert ids[0] == ids[1]
+    assert index.count("geo", "Iran") == 0
+    assert index.filter_urls(all_of=[ISRAEL]) == ["a"]
+
+
+def test_counts_match_the_bitmaps(index):
+    index.remove("b")
+    index.add({"url": "e", "geo_facet": ["Iran"]})
+    for term in [TRUMP, IRAN, ISRAEL, ELECTIONS]:
+        assert index.count(*term) == bitmap_count(index.match(all_of=[term]))
+    within = index.match(any_of=[ELECTIONS])
+    assert index.count("geo", "Iran", within=within) == 2
+
+# 3. Autocomplete #################################
+
+def test_complete_matches_brute_force():
+    articles = [{"url": f"u{i}", "per_facet": [f"Person {i % 13}"], "org_facet": [f"Personnel {i % 3}"]}
+                for i in range(200)]
+    index = FacetIndex()
+    index.add_many(articles)
+    index.remove("u0")
+
+    expected = Counter((kind, value) for a in articles[1:]
+                       for kind, field in [("per", "per_facet"), ("org", "org_facet")]
+                       for value in a[field])
+    ranked = sorted(((k, v, n) for (k, v), n in expected.items()), key=lambda m: (-m[2], m[1]))
+    assert index.complete("PERSON", limit=5) == ranked[:5]
+    assert index.complete("person 1", kind="per", limit=50) == \
+        [m for m in ranked if m[0] == "per" and m[1].startswith("Person 1")]
+    assert index.complete("zzz") == []
+
+# 4. Bitmap Helpers #################################
+
+def test_bitmap_helpers_round_trip():
+    ids = [0, 3, 64, 65, 200]
+    bitmap = bitmap_from_ids(ids)
+    assert bitmap_ids(bitmap) == ids
+    assert bitmap_count(bitmap) == len(ids)
+    assert bitmap_from_ids([7]) == 1 << 7
+    mask = bitmap_mask(bitmap, 210)
+    assert mask.tolist() == [i in ids for i in range(210)]
@@ -0,0 +1,121 @@
+# test_ingest_pipeline.py
+# Tests for run_pipeline: results, overlap, back-pressure, errors, and shutdown
+# Run with: python -m pytest tests
+# Jimmy
+
+import threading  # for counting live worker threads
+import time       # for slow stages
+
+import pytest
+
+from nyt_pipeline.ingest_pipeline import run_pipeline
+
+
+def batches(n, size=3):
+    return [list(range(i * size, (i + 1) * size)) for i in range(n)]
+
+
+def worker_threads():
+    return [t for t in threading.enumerate() if t is not threading.main_thread() and t.daemon]
+
+# 1. Normal Runs #################################
+
+def test_every_batch_is_upserted_with_its_own_vectors():
+    upserted = {}
+    lock = threading.Lock()
+
+    def upsert(batch, vectors):
+        with lock:
+            upserted[batch[0]] = (batch, vectors)
+
+    stats = run_pipeline(batches(20), embed=lambda b: [x * 10 for x in b], upsert=upsert)
+    assert stats["docs"] == 60 and stats["batches"] == 20
+    assert all(vectors == [x * 10 for x in batch] for batch, vectors in upserted.values())
+    assert len(upserted) == 20
+
+
+def test_embedding_and_upserts_overlap():
+    def slow(*args):
+        time.sleep(0.05)
+        return args[0]
+
+    started = time.perf_counter()
+    run_pipeline(batches(8), embed=slow, upsert=slow, embed_workers=1, upsert_workers=1)
+    # One after the other this takes 8 x (0.05 + 0.05) = 0.8 s
+    assert time.perf_counter() - started < 0.7
+
+
+def test_bounded_queues_hold_back_the_producer():
+    produced, embedded = [], []
+    lead = []
+    release = threading.Event()
+
+    def source():
+        for batch in batches(50):
+            produced.append(batch)
+            lead.append(len(produced) - len(embedded))
+            yield batch
+
+    def embed(batch):
+        release.wait(5)
+        embedded.append(batch)
+        return batch
+
+    timer = threading.Timer(0.2, release.set)
+    timer.start()
+    run_pipeline(source(), embed=embed, upsert=lambda b, v: None,
+                 embed_workers=2, upsert_workers=1, queue_size=3)
+    timer.join()
+    # Queue (3) + batches held by the two embedders + the one being put
+    assert max(lead) <= 3 + 2 + 1
+
+# 2. Errors and Shutdown #################################
+
+def test_embed_error_stops_the_run_and_is_raised():
+    consumed = []
+
+    def source():
+        for batch in batches(100):
+            consumed.append(batch)
+            yield batch
+
+    def embed(batch):
+        if batch[0] == 9:
+            raise RuntimeError("embedding failed")
+        return batch
+
+    before = len(worker_threads())
+    with pytest.raises(RuntimeError, match="embedding failed"):
+        run_pipeline(source(), embed=embed, upsert=lambda b, v: None, embed_workers=2, queue_size=2)
+    assert len(consumed) < 100          # the producer stopped early
+    assert len(worker_threads()) == before  # every worker was joined
+
+
+def test_upsert_error_is_raised_after_workers_stop():
+    upserts = []
+
+    def upsert(batch, vectors):
+        if batch[0] == 0:
+            raise ValueError("index rejected the batch")
+        upserts.append(batch)
+
+    before = len(worker_threads())
+    with pytest.raises(ValueError, match="index rejected"):
+        run_pipeline(batches(30), embed=lambda b: b, upsert=upsert, upsert_workers=1)
+    assert len(worker_threads()) == before
+
+
+def test_producer_error_still_shuts_the_workers_down():
+    def source():
+        yield [1]
+        raise KeyboardInterrupt
+
+    before = len(worker_threads())
+    with pytest.raises(KeyboardInterrupt):
+        run_pipeline(source(), embed=lambda b: b, upsert=lambda b, v: None)
+    assert len(worker_threads()) == before
+
+
+def test_empty_input():
+    stats = run_pipeline([], embed=lambda b: b, upsert=lambda b, v: None)
+    assert stats["docs"] == 0 and stats["docs_per_sec"] == 0.0
@@ -0,0 +1,82 @@
+# test_names.py
+# Tests for person-name normalization and PersonAliases
+# Run with: python -m pytest tests
+# Jimmy
+
+import json  # for writing alias files
+
+from nyt_pipeline import names
+from nyt_pipeline.names import (EXAMPLE_ALIASES_FILE, PersonAliases, canonical_form,
+                                normalize_nyt_person, normalize_people, person_id)
+
+# 1. Normalization #################################
+
+def test_normalize_keeps_the_nyt_spelling():
+    assert normalize_nyt_person("Trump, Donald J.") == "Donald J. Trump"
+    assert normalize_nyt_person("King Jr., Martin Luther") == "Martin Luther King Jr."
+    assert normalize_nyt_person("Barack   Obama") == "Barack Obama"
+
+
+def test_canonical_form_drops_life_dates_and_moves_suffixes():
+    assert canonical_form("Kennedy, Robert F. Jr.") == "Robert F. Kennedy Jr."
+    assert canonical_form("Farage, Nigel (1964- )") == "Nigel Farage"
+    assert canonical_form("Trump, Donald J.") == normalize_nyt_person("Trump, Donald J.")
+
+
+def test_person_id_ignores_periods_case_and_punctuation():
+    assert person_id("Trump, Donald J.") == person_id("donald j trump") == "donald-j-trump"
+    assert person_id("O'Rourke, Beto") == "beto-orourke"
+
+
+def test_normalize_people_drops_spellings_of_the_same_person():
+    assert normalize_people(["Trump, Donald J.", "Trump, Donald J", None, "Harris, Kamala D"]) == \
+        ["Donald J. Trump", "Kamala D Harris"]
+
+# 2. Aliases #################################
+
+def test_chains_resolve_in_either_order():
+    forward = PersonAliases({"A": "B", "B": "C"})
+    backward = PersonAliases()
+    backward.add("B", "C")
+    backward.add("A", "B")
+    for table in (forward, backward):
+        assert table.canonical("A") == "C"
+        assert table.resolve("a") == ("c", "C")
+
+
+def test_adding_an_alias_updates_cached_lookups():
+    table = PersonAliases({"A": "B"})
+    assert table.canonical("A") == "B"
+    table.add("B", "C")
+    assert table.canonical("A") == "C"
+    assert table.variants() == {"a": "C", "b": "C"}
+
+
+def test_cycles_stop():
+    table = PersonAliases({"A": "B", "B": "A"})
+    assert table.canonical("A") in ("A", "B")
+
+
+def test_period_variants_of_a_canonical_name_use_its_spelling():
+    table = PersonAliases({"Donald Trump": "Donald J. Trump"})
+    assert table.canonical("Trump, Donald J") == "Donald J. Trump"
+    assert table.canonical("Donald Trump") == "Donald J. Trump"
+    assert table.canonical("Obama, Barack") == "Barack Obama"
+
+
+def test_example_file_loads(tmp_path):
+    table = PersonAliases.from_file(EXAMPLE_ALIASES_FILE)
+    assert table.canonical("Donald Trump") == "Donald J Trump"
+    assert table.person_id("Trump, Donald J.") == "donald-j-trump"
+
+
+def test_get_aliases_reads_the_env_file(tmp_path, monkeypatch):
+    path = tmp_path / "aliases.json"
+    path.write_text(json.dumps({"Jimmy": "James Smith"}), encoding="utf-8")
+    monkeypatch.setenv("NYT_PERSON_ALIASES", str(path))
+    monkeypatch.setattr(names, "_default_aliases", None)
+    assert names.get_aliases().canonical("Jimmy") == "James Smith"
+
+    monkeypatch.delenv("NYT_PERSON_ALIASES")
+    monkeypatch.setattr(names, "_default_aliases", None)
+    assert len(names.get_aliases()) == 0
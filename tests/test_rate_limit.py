@@ -0,0 +1,116 @@
+# test_rate_limit.py
+# Tests for the token-bucket RateLimiter and 429 handling
+# Run with: python -m pytest tests
+# Jimmy
+
+import time                                     # for measuring waits
+from datetime import datetime, timedelta, timezone  # for HTTP-date headers
+from email.utils import format_datetime        # for building an HTTP date
+
+import pytest
+
+from nyt_pipeline import rate_limit
+from nyt_pipeline.rate_limit import (RateLimiter, TokenBucket, backoff_delay, get_limiter,
+                                     parse_retry_after, send_with_retry)
+
+
+class FakeResponse:
+    """Just the parts of requests.Response that send_with_retry reads."""
+
+    def __init__(self, status_code, retry_after=None):
+        self.status_code = status_code
+        self.headers = {"Retry-After": retry_after} if retry_after is not None else {}
+
+# 1. Tokens #################################
+
+def test_burst_up_to_capacity_then_wait_for_refill():
+    limiter = RateLimiter([(5, 0.5)])  # 5 tokens, one back every 0.1 s
+    waits = [limiter.acquire() for _ in range(5)]
+    assert max(waits) < 0.05
+    started = time.monotonic()
+    limiter.acquire()
+    assert 0.05 < time.monotonic() - started < 0.5
+    assert limiter.metrics()["acquired"] == 6
+
+
+def test_strictest_bucket_wins():
+    limiter = RateLimiter([(100, 1), (2, 60)])
+    limiter.acquire()
+    limiter.acquire()
+    with pytest.raises(TimeoutError):
+        limiter.acquire(timeout=0.05)
+
+
+def test_time_for_counts_the_tokens_left():
+    limiter = RateLimiter([(5, 60)])
+    assert limiter.time_for(5) == 0
+    assert limiter.time_for(9) == pytest.approx(48, abs=0.5)  # 4 more at one per 12 s
+    for _ in range(5):
+        limiter.acquire()
+    assert limiter.time_for(1) == pytest.approx(12, abs=0.5)
+
+
+def test_token_bucket_never_exceeds_capacity():
+    bucket = TokenBucket(2, 1)
+    bucket.updated -= 100  # long idle
+    assert bucket.wait_time(time.monotonic()) == 0
+    assert bucket.tokens == 2
+
+# 2. Retry-After #################################
+
+def test_parse_retry_after_seconds_and_dates():
+    assert parse_retry_after("30") == 30.0
+    assert parse_retry_after(None) is None
+    assert parse_retry_after("soon") is None
+    later = datetime.now(timezone.utc) + timedelta(seconds=60)
+    assert 55 < parse_retry_after(format_datetime(later, usegmt=True)) <= 60
+    earlier = datetime.now(timezone.utc) - timedelta(seconds=60)
+    assert parse_retry_after(format_datetime(earlier, usegmt=True)) == 0.0
+
+
+def test_backoff_honours_retry_after_and_caps_otherwise():
+    assert 10 <= backoff_delay(0, retry_after=10, base=2) <= 12
+    assert all(0 <= backoff_delay(attempt, base=2, cap=5) <= 5 for attempt in range(10))
+
+
+def test_pause_holds_every_caller():
+    limiter = RateLimiter([(100, 1)])
+    limiter.pause(0.2)
+    started = time.monotonic()
+    limiter.acquire()
+    assert time.monotonic() - started >= 0.15
+    assert limiter.metrics()["throttled"] == 1
+
+
+def test_429_pauses_the_key_for_retry_after_then_retries(monkeypatch):
+    delays = []
+    monkeypatch.setattr(rate_limit, "backoff_delay",
+                        lambda attempt, retry_after=None: delays.append(retry_after) or 0.01)
+    replies = iter([FakeResponse(429, "7"), FakeResponse(429), FakeResponse(200)])
+    get_limiter("test-429", [(100, 1)])
+
+    response = send_with_retry(lambda: next(replies), "test-429")
+
+    assert response.status_code == 200
+    assert delays == [7.0, None]  # header honoured, then plain backoff
+    assert get_limiter("test-429").metrics()["throttled"] == 2
+
+
+def test_gives_up_after_max_retries(monkeypatch):
+    monkeypatch.setattr(rate_limit, "backoff_delay", lambda attempt, retry_after=None: 0.0)
+    get_limiter("test-give-up", [(100, 1)])
+    calls = []
+
+    def send():
+        calls.append(1)
+        return FakeResponse(429)
+
+    assert send_with_retry(send, "test-give-up", max_retries=2).status_code == 429
+    assert len(calls) == 3
+
+
+def test_send_times_out_waiting_for_a_token():
+    limiter = get_limiter("test-timeout", [(1, 60)])
+    limiter.acquire()
+    with pytest.raises(TimeoutError):
+        send_with_retry(lambda: FakeResponse(200), "test-timeout", max_wait=0.05)
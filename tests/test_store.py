@@ -0,0 +1,93 @@
+# test_store.py
+# Tests for the date-partitioned ArticleStore
+# Run with: python -m pytest tests
+# Jimmy
+
+import json  # for reading store files
+import os    # for paths
+
+import pytest
+
+from nyt_pipeline.store import ArticleStore, STORE_INFO_FILE, URL_INDEX_FILE
+
+
+def article(url, published_date, title="Title"):
+    return {"url": url, "published_date": published_date, "title": title,
+            "per_facet": ["Trump, Donald J"]}
+
+
+@pytest.fixture
+def store(tmp_path):
+    return ArticleStore(str(tmp_path / "articles"), fmt="jsonl")
+
+# 1. Upserts #################################
+
+def test_upsert_counts_inserts_updates_and_unchanged(store):
+    assert store.upsert([article("u1", "2026-02-06"), article("u2", "2026-02-06")]) == \
+        {"inserted": 2, "updated": 0, "unchanged": 0}
+    assert store.upsert([article("u1", "2026-02-06"), article("u2", "2026-02-06", title="New")]) == \
+        {"inserted": 0, "updated": 1, "unchanged": 1}
+    assert len(store) == 2
+
+
+def test_changed_date_moves_the_row_and_keeps_first_seen(store):
+    store.upsert([article("u1", "2026-02-06"), article("u2", "2026-02-06")])
+    first_seen = next(store.iter_records())["first_seen"]
+
+    counts = store.upsert([article("u1", "2026-02-07", title="Corrected")])
+
+    assert counts == {"inserted": 0, "updated": 1, "unchanged": 0}
+    assert store.partitions() == ["2026-02-06", "2026-02-07"]
+    rows = {r["url"]: r for r in store.iter_records()}
+    assert len(rows) == 2 and len(store) == 2  # moved, not copied
+    assert rows["u1"]["published_date"] == "2026-02-07"
+    assert rows["u1"]["first_seen"] == first_seen
+    with open(os.path.join(store.root, URL_INDEX_FILE), encoding="utf-8") as f:
+        assert json.load(f) == {"u1": "2026-02-07", "u2": "2026-02-06"}
+
+
+def test_emptied_partition_is_removed(store):
+    store.upsert([article("u1", "2026-02-06")])
+    store.upsert([article("u1", "2026-02-07")])
+    assert store.partitions() == ["2026-02-07"]
+    assert not os.path.exists(os.path.join(store.root, "published_date=2026-02-06"))
+
+
+def test_duplicate_copies_from_old_stores_collapse_to_the_newest(store):
+    # Two copies of one URL under different dates, as older versions left them
+    for published_date, last_seen in [("2026-02-06", "2026-02-06T10:00:00Z"),
+                                      ("2026-02-07", "2026-02-07T10:00:00Z")]:
+        record = dict(article("u1", published_date), first_seen=last_seen, last_seen=last_seen)
+        store._write_partition(published_date, [record])
+
+    assert store.upsert([article("u2", "2026-02-06")])["inserted"] == 1
+    rows = {r["url"]: r["published_date"] for r in store.iter_records()}
+    assert rows == {"u1": "2026-02-07", "u2": "2026-02-06"}
+
+# 2. Format #################################
+
+def test_format_is_recorded_and_enforced(tmp_path):
+    root = str(tmp_path / "articles")
+    ArticleStore(root, fmt="jsonl").upsert([article("u1", "2026-02-06")])
+    with open(os.path.join(root, STORE_INFO_FILE), encoding="utf-8") as f:
+        assert json.load(f) == {"format": "jsonl"}
+    assert ArticleStore(root).fmt == "jsonl"
+    with pytest.raises(ValueError):
+        ArticleStore(root, fmt="parquet")
+
+
+def test_format_is_detected_from_files_without_store_json(tmp_path):
+    root = str(tmp_path / "articles")
+    ArticleStore(root, fmt="jsonl").upsert([article("u1", "2026-02-06")])
+    os.remove(os.path.join(root, STORE_INFO_FILE))
+    assert ArticleStore(root).fmt == "jsonl"
+
+
+def test_parquet_round_trip(tmp_path):
+    pytest.importorskip("pyarrow")
+    store = ArticleStore(str(tmp_path / "articles"), fmt="parquet")
+    store.upsert([article("u1", "2026-02-06")])
+    store.upsert([article("u1", "2026-02-07")])
+    rows = list(store.iter_records())
+    assert [(r["url"], r["published_date"]) for r in rows] == [("u1", "2026-02-07")]
+    assert rows[0]["per_facet"] == ["Trump, Donald J"]
@@ -0,0 +1,111 @@
+# test_trends.py
+# Tests for FacetTrends rolling windows and co-occurrence counts
+# Run with: python -m pytest tests
+# Jimmy
+
+import random                           # for a randomized roll-over check
+from collections import Counter         # for brute-force window totals
+from datetime import date, timedelta    # for building published dates
+
+from nyt_pipeline.trends import FacetTrends
+
+START = date(2026, 1, 1)
+
+
+def article(url, day_offset, people):
+    return {"url": url, "published_date": (START + timedelta(days=day_offset)).isoformat(),
+            "per_facet": people}
+
+
+def expected_windows(articles, window_days):
+    """Brute-force totals for the two windows ending on the latest day."""
+    latest = max(a["published_date"] for a in articles)
+    as_of = date.fromisoformat(latest)
+    current, previous = Counter(), Counter()
+    for a in articles:
+        age = (as_of - date.fromisoformat(a["published_date"])).days
+        target = current if age < window_days else previous if age < 2 * window_days else None
+        if target is not None:
+            target.update(("per", p) for p in set(a["per_facet"]))
+    return current, previous
+
+# 1. Windows #################################
+
+def test_rising_compares_the_last_window_with_the_one_before():
+    trends = FacetTrends(window_days=2)
+    trends.add_batch([article("a", 0, ["Trump"]), article("b", 1, ["Trump"]),
+                      article("c", 2, ["Harris"]), article("d", 3, ["Harris"]),
+                      article("e", 3, ["Trump"])])
+    assert trends.as_of == "2026-01-04"
+    rows = {r["value"]: r for r in trends.rising()}
+    assert (rows["Harris"]["current"], rows["Harris"]["previous"], rows["Harris"]["change"]) == (2, 0, 2)
+    assert (rows["Trump"]["current"], rows["Trump"]["previous"], rows["Trump"]["change"]) == (1, 2, -1)
+
+
+def test_windows_roll_over_one_day_at_a_time():
+    trends = FacetTrends(window_days=2)
+    trends.add_batch([article("a", 0, ["Trump"])])
+    assert trends.top() == [("per", "Trump", 1)]
+    trends.add_batch([article("b", 2, ["Harris"])])   # day 0 moves to the previous window
+    assert trends.top() == [("per", "Harris", 1)]
+    assert {r["value"]: r["previous"] for r in trends.rising()} == {"Harris": 0, "Trump": 1}
+    trends.add_batch([article("c", 4, ["Vance"])])    # day 0 leaves both windows
+    assert {r["value"] for r in trends.rising()} == {"Harris", "Vance"}
+
+
+def test_jump_past_both_windows_rebuilds_them():
+    trends = FacetTrends(window_days=2)
+    trends.add_batch([article("a", 0, ["Trump"]), article("b", 1, ["Harris"])])
+    trends.add_batch([article("c", 30, ["Vance"])])
+    assert trends.top() == [("per", "Vance", 1)]
+    assert [r["value"] for r in trends.rising()] == ["Vance"]
+
+
+def test_late_article_lands_in_its_own_window():
+    trends = FacetTrends(window_days=2)
+    trends.add_batch([article("a", 5, ["Trump"])])
+    trends.add_batch([article("b", 3, ["Harris"]), article("c", 0, ["Vance"])])
+    rows = {r["value"]: (r["current"], r["previous"]) for r in trends.rising()}
+    assert rows == {"Trump": (1, 0), "Harris": (0, 1)}  # day 0 is older than both windows
+    assert trends.as_of == "2026-01-06"
+
+
+def test_random_batches_match_brute_force():
+    rng = random.Random(7)
+    trends = FacetTrends(window_days=3)
+    seen = []
+    for batch in range(30):
+        articles = [article(f"u{batch}-{i}", rng.randint(0, batch + 2),
+                            rng.sample(["A", "B", "C", "D", "E"], rng.randint(0, 3)))
+                    for i in range(rng.randint(1, 5))]
+        trends.add_batch(articles)
+        seen.extend(articles)
+        current, previous = expected_windows(seen, 3)
+        assert Counter({k: n for k, n in trends._current.items() if n}) == current
+        assert Counter({k: n for k, n in trends._previous.items() if n}) == previous
+
+# 2. Ingestion and Queries #################################
+
+def test_repeated_urls_are_counted_once():
+    trends = FacetTrends()
+    assert trends.add_batch([article("a", 0, ["Trump"])]) == 1
+    assert trends.add_batch([article("a", 0, ["Trump"]), {"url": "x"}]) == 0
+    assert len(trends) == 1
+    assert trends.top() == [("per", "Trump", 1)]
+
+
+def test_series_is_zero_filled():
+    trends = FacetTrends(window_days=2)
+    trends.add_batch([article("a", 0, ["Trump"]), article("b", 2, ["Trump"])])
+    assert trends.series("per", "Trump") == [("2025-12-31", 0), ("2026-01-01", 1),
+                                             ("2026-01-02", 0), ("2026-01-03", 1)]
+
+
+def test_cooccurrence_counts_both_directions():
+    trends = FacetTrends(cooccurrence_pairs=[("per", "org")])
+    trends.add_batch([{"url": "a", "published_date": "2026-01-01",
+                       "per_facet": ["Trump"], "org_facet": ["Senate", "House"]},
+                      {"url": "b", "published_date": "2026-01-01",
+                       "per_facet": ["Trump"], "org_facet": ["Senate"]}])
+    assert trends.cooccurring("per", "Trump") == [("org", "Senate", 2), ("org", "House", 1)]
+    assert trends.cooccurring("org", "House") == [("per", "Trump", 1)]
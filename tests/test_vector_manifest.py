@@ -0,0 +1,66 @@
+# test_vector_manifest.py
+# Tests for the vector manifest and plan_sync
+# Run with: python -m pytest tests
+# Jimmy
+
+from nyt_pipeline.vector_manifest import VectorManifest, content_hash, plan_sync, vector_id
+
+KNOWN = {"same": ("h1", "2026-02-01"), "edited": ("h2", "2026-02-01"),
+         "gone": ("h3", "2026-02-01"), "old": ("h4", "2025-01-01")}
+
+# 1. plan_sync #################################
+
+def test_incremental_upserts_only_new_and_changed_rows():
+    current = {"same": ("h1", "2026-02-01"), "edited": ("h2b", "2026-02-01"), "new": ("h5", "2026-02-02")}
+    upsert, delete = plan_sync(KNOWN, current)
+    assert sorted(upsert) == ["edited", "new"]
+    assert delete == []
+
+
+def test_full_sync_upserts_everything():
+    current = {"same": ("h1", "2026-02-01")}
+    assert plan_sync(KNOWN, current, incremental=False) == (["same"], [])
+
+
+def test_prune_missing_deletes_ids_not_in_the_corpus():
+    current = {"same": ("h1", "2026-02-01"), "edited": ("h2", "2026-02-01")}
+    _, delete = plan_sync(KNOWN, current, prune_missing=True)
+    assert sorted(delete) == ["gone", "old"]
+
+
+def test_cutoff_skips_and_deletes_expired_articles():
+    current = {"old": ("h4", "2025-01-01"), "fresh": ("h6", "2026-02-03"),
+               "undated": ("h7", ""), "older_new": ("h8", "2024-06-01")}
+    upsert, delete = plan_sync(KNOWN, current, cutoff="2026-01-01")
+    assert sorted(upsert) == ["fresh", "undated"]
+    assert delete == ["old"]
+
+
+def test_current_date_wins_over_the_manifest_date():
+    # The article was re-dated into the retention window, so it is kept
+    current = {"old": ("h4b", "2026-02-05")}
+    upsert, delete = plan_sync(KNOWN, current, cutoff="2026-01-01")
+    assert upsert == ["old"]
+    assert delete == []
+
+# 2. Manifest #################################
+
+def test_manifest_records_and_forgets_per_namespace(tmp_path):
+    manifest = VectorManifest(str(tmp_path / "manifest.sqlite"))
+    manifest.record("index", "ns", [("a", "h1", "2026-02-01"), ("b", "h2", None)])
+    manifest.record("index", "other", [("a", "h9", "2026-02-01")])
+    assert manifest.entries("index", "ns") == {"a": ("h1", "2026-02-01"), "b": ("h2", "")}
+
+    manifest.record("index", "ns", [("a", "h1b", "2026-02-02")])
+    manifest.forget("index", "ns", ["b"])
+    assert manifest.entries("index", "ns") == {"a": ("h1b", "2026-02-02")}
+    manifest.forget("index", "ns")
+    assert manifest.entries("index", "ns") == {}
+    assert manifest.entries("index", "other") == {"a": ("h9", "2026-02-01")}
+
+
+def test_ids_and_hashes_are_stable():
+    assert vector_id("https://nyti.ms/1") == vector_id("https://nyti.ms/1")
+    assert vector_id("", fallback="title") == vector_id("title")
+    assert content_hash("text", {"b": 1, "a": 2}) == content_hash("text", {"a": 2, "b": 1})
+    assert content_hash("text", {"a": 1}) != content_hash("text", {"a": 2})
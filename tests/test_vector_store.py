@@ -0,0 +1,126 @@
+# test_vector_store.py
+# Tests for LocalVectorStore: exact search, metadata filters, IVF, and saving
+# Run with: python -m pytest tests
+# Jimmy
+
+import numpy as np
+import pytest
+
+from nyt_pipeline import vector_store
+from nyt_pipeline.vector_store import LocalVectorStore, metadata_filter, published_day
+
+DIM = 8
+
+
+def unit(i):
+    vector = np.zeros(DIM, dtype=np.float32)
+    vector[i % DIM] = 1.0
+    return vector
+
+
+@pytest.fixture
+def store():
+    store = LocalVectorStore(dimension=DIM)
+    store.upsert([
+        ("a", unit(0), {"per_facet": ["Donald J. Trump"], "geo_facet": ["Iran"], "published_day": 20260201}),
+        ("b", unit(1), {"per_facet": ["Donald J. Trump"], "geo_facet": ["Israel"], "published_day": 20260205}),
+        ("c", unit(2), {"per_facet": ["Kamala D. Harris"], "geo_facet": ["Iran"], "published_day": 20260210}),
+        ("d", unit(3), {"section": "World", "published_day": 20260215}),
+    ])
+    return store
+
+
+def ids(result):
+    return [m["id"] for m in result["matches"]]
+
+# 1. Exact Search #################################
+
+def test_exact_top_k_is_ordered_by_cosine(store):
+    query = unit(0) + 0.5 * unit(1)
+    assert ids(store.query(query, top_k=2)) == ["a", "b"]
+    result = store.query(unit(2), top_k=1, include_metadata=True)
+    assert result["matches"][0]["score"] == pytest.approx(1.0)
+    assert result["matches"][0]["metadata"]["geo_facet"] == ["Iran"]
+
+
+def test_unknown_namespace_is_empty(store):
+    assert store.query(unit(0), namespace="other") == {"matches": [], "namespace": "other"}
+
+# 2. Filters #################################
+
+def test_facet_filters_and_or(store):
+    assert sorted(ids(store.query(unit(0), top_k=10, filter=metadata_filter({"geo": ["Iran"]})))) == ["a", "c"]
+    flt = metadata_filter({"per": ["Donald J. Trump"], "geo": ["Iran", "Israel"]})
+    assert sorted(ids(store.query(unit(0), top_k=10, filter=flt))) == ["a", "b"]
+    assert ids(store.query(unit(0), top_k=10, filter={"per_facet": {"$nin": ["Donald J. Trump"]},
+                                                       "section": "World"})) == ["d"]
+
+
+def test_date_range_filter(store):
+    flt = metadata_filter(start_date="2026-02-05", end_date="2026-02-10")
+    assert flt == {"published_day": {"$gte": 20260205, "$lte": 20260210}}
+    assert sorted(ids(store.query(unit(0), top_k=10, filter=flt))) == ["b", "c"]
+
+
+def test_filters_follow_updates_and_deletes(store):
+    flt = metadata_filter({"geo": ["Iran"]})
+    store.upsert([("b", unit(1), {"geo_facet": ["Iran"], "published_day": 20260205})])
+    store.delete(ids=["a"])
+    assert sorted(ids(store.query(unit(0), top_k=10, filter=flt))) == ["b", "c"]
+    assert ids(store.query(unit(3), top_k=10, filter={"section": "World"})) == ["d"]
+    assert store.describe_index_stats()["total_vector_count"] == 3
+
+
+def test_bad_filters_raise(store):
+    with pytest.raises(ValueError):
+        metadata_filter({"people": ["x"]})
+    with pytest.raises(ValueError):
+        published_day("Feb 5")
+    with pytest.raises(ValueError):
+        store.query(unit(0), filter={"section": {"$gt": 1}})
+    with pytest.raises(ValueError):
+        store.query(unit(0), filter={"section": {"$regex": "W"}})
+
+# 3. IVF #################################
+
+def test_ivf_finds_the_same_neighbours_as_exact_search(monkeypatch):
+    monkeypatch.setattr(vector_store, "IVF_MIN_VECTORS", 100)
+    rng = np.random.default_rng(0)
+    centres = rng.normal(size=(10, 16))
+    points = np.concatenate([c + 0.05 * rng.normal(size=(60, 16)) for c in centres]).astype(np.float32)
+    rows = [(f"v{i}", p, {}) for i, p in enumerate(points)]
+
+    exact = LocalVectorStore(dimension=16)
+    approx = LocalVectorStore(dimension=16, approximate=True, nprobe=3)
+    exact.upsert(rows)
+    approx.upsert(rows)
+
+    queries = points[::37]
+    hits = sum(ids(approx.query(q, top_k=5))[0] == ids(exact.query(q, top_k=5))[0] for q in queries)
+    assert approx._namespaces[""].centroids is not None
+    assert hits == len(queries)
+
+
+def test_ivf_with_every_list_probed_is_exact(monkeypatch):
+    monkeypatch.setattr(vector_store, "IVF_MIN_VECTORS", 50)
+    rng = np.random.default_rng(1)
+    points = rng.normal(size=(200, DIM)).astype(np.float32)
+    store = LocalVectorStore(dimension=DIM, approximate=True, nprobe=1000)
+    store.upsert([(f"v{i}", p, {}) for i, p in enumerate(points)])
+    exact = LocalVectorStore(dimension=DIM)
+    exact.upsert([(f"v{i}", p, {}) for i, p in enumerate(points)])
+    for q in points[:10]:
+        assert ids(store.query(q, top_k=5)) == ids(exact.query(q, top_k=5))
+
+    # Rows added after training are filed under a list too
+    store.upsert([("new", points[0] * 2, {})])
+    assert "new" in ids(store.query(points[0], top_k=2))
+
+# 4. Saving #################################
+
+def test_save_and_load_round_trip(store, tmp_path):
+    store.save(str(tmp_path))
+    loaded = LocalVectorStore.load(str(tmp_path))
+    assert loaded.dimension == DIM
+    assert ids(loaded.query(unit(2), top_k=1)) == ["c"]
+    assert sorted(ids(loaded.query(unit(0), top_k=10, filter=metadata_filter({"geo": ["Iran"]})))) == ["a", "c"]